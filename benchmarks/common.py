@@ -0,0 +1,106 @@
+# benchmarks/common.py
+'''
+Shared helpers for the benchmark scripts: latency percentiles, peak RSS, and stored baselines.
+'''
+import json
+import math
+import os
+import platform
+import sys
+from datetime import datetime
+
+BASELINES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+# Metrics where bigger is better; every other numeric metric is treated as smaller-is-better.
+HIGHER_IS_BETTER = ("points_per_s", "requests_per_s", "rows_per_s", "samples_per_s")
+
+def percentile(values, q: float) -> float:
+    """Nearest-rank percentile, q in [0, 100]. Returns 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process, in MB."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS reports bytes.
+        return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / 1024 / 1024
+
+class LatencyRecorder:
+    """Attach to a requests.Session to record each response's elapsed time."""
+    def __init__(self):
+        self.latencies = []
+
+    def hook(self, response, *args, **kwargs):
+        self.latencies.append(response.elapsed.total_seconds())
+        return response
+
+    def attach(self, session):
+        session.hooks.setdefault("response", []).append(self.hook)
+        return session
+
+    def summary(self) -> dict:
+        return {
+            "requests": len(self.latencies),
+            "p50_ms": round(1000 * percentile(self.latencies, 50), 3),
+            "p99_ms": round(1000 * percentile(self.latencies, 99), 3),
+        }
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "recorded": datetime.now().isoformat(timespec="seconds"),
+    }
+
+def baseline_path(name: str) -> str:
+    return os.path.join(BASELINES_DIR, f"{name}.json")
+
+def save_baseline(name: str, results: dict):
+    os.makedirs(BASELINES_DIR, exist_ok=True)
+    with open(baseline_path(name), "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"Baseline saved to: \n{baseline_path(name)}")
+
+def load_baseline(name: str):
+    path = baseline_path(name)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def compare_to_baseline(name: str, results: dict, tolerance: float = 0.2) -> list:
+    """
+    Compare {scenario: {metric: value}} against the stored baseline.
+    Returns a list of human-readable regressions; empty if none (or if there is no baseline).
+    """
+    baseline = load_baseline(name)
+    if baseline is None:
+        print(f"No baseline stored for '{name}'. Run with --save-baseline to create one.")
+        return []
+    regressions = []
+    for scenario, metrics in results.items():
+        for metric, value in metrics.items():
+            old = baseline["results"].get(scenario, {}).get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or old == 0:
+                continue
+            change = (value - old) / old
+            worse = change < -tolerance if metric in HIGHER_IS_BETTER else change > tolerance
+            if worse and (metric in HIGHER_IS_BETTER or metric.endswith(("_ms", "_s", "_mb"))):
+                regressions.append(f"{scenario}.{metric}: {old} -> {value} ({change:+.0%})")
+    return regressions
+
+def print_table(results: dict):
+    for scenario, metrics in results.items():
+        print(f"\n[{scenario}]")
+        for metric, value in metrics.items():
+            print(f"  {metric:<16} {value}")
@@ -0,0 +1,195 @@
+# benchmarks/datapath.py
+'''
+Title: datapath.py
+
+Purpose:
+Offline micro-benchmarks of the data path on synthetic history, for N points x M years of 5-minute samples
+(one year is 105,120 rows per point; compare live_data_EFF.csv / live_data_INF.csv at 17,520 rows each).
+
+At each scale it generates a synthetic aggregate file and a checkpoint file, then times:
+    sanitizer.sanitize_data_for_aggregated_storage   over the whole history, in daily batches
+    storage.store_live_values                        over the whole history, in daily batches, and one live cycle appended to the full file
+    aggregator.aggregate_and_send                    with send_data_to_rjn2 stubbed out, against the full file and checkpoint
+    load_query_rows_from_csv_files                   over query files holding the N points
+
+The scaling curves are printed and written as CSV (--out). The aggregate_and_send curve is extrapolated so that it is
+known ahead of deployment at what history size the hourly job stops fitting its window (--window-s).
+
+Usage:
+    poetry run python -m benchmarks.datapath
+    poetry run python -m benchmarks.datapath --points 2 10 50 --years 0.25 1 2 --sent-fraction 0.99 --out scaling.csv
+'''
+import argparse
+import contextlib
+import csv
+import io
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+from benchmarks.common import compare_to_baseline, peak_rss_mb, save_baseline
+from benchmarks.standins import bench_query_rows
+
+from src.pipeline.queriesmanager import load_query_rows_from_csv_files
+from projects.eds_to_rjn.code import aggregator, sanitizer, storage
+
+BASELINE_NAME = "datapath"
+STEP_S = 300
+SAMPLES_PER_DAY = 86400 // STEP_S
+SAMPLES_PER_YEAR = 365 * SAMPLES_PER_DAY
+
+def _raw_rows_for_day(query_rows, day_start):
+    """Rows shaped like collector.collect_live_values() output: the query row plus the EDS point data."""
+    rows = []
+    for ts in range(day_start, day_start + 86400, STEP_S):
+        for i, row in enumerate(query_rows):
+            rows.append({**row, "ts": ts, "value": 50 + ((ts // STEP_S + i) % 97) / 9.7, "un": "MGD"})
+    return rows
+
+def generate_history(query_rows, years, work_dir):
+    """Write the aggregate file through the real sanitizer and storage, timing each. Returns (data_file, timings, rows)."""
+    data_file = os.path.join(work_dir, "live_data.csv")
+    days = max(1, round(years * 365))
+    first_day = (int(time.time()) // 86400 - days) * 86400
+    sanitize_s = store_s = 0.0
+    total_rows = 0
+    for day in range(days):
+        raw = _raw_rows_for_day(query_rows, first_day + day * 86400)
+        start = time.perf_counter()
+        clean = sanitizer.sanitize_data_for_aggregated_storage(raw)
+        sanitize_s += time.perf_counter() - start
+        start = time.perf_counter()
+        storage.store_live_values(clean, data_file)
+        store_s += time.perf_counter() - start
+        total_rows += len(clean)
+    return data_file, {"sanitize_s": sanitize_s, "store_s": store_s}, total_rows
+
+def generate_checkpoint(data_file, work_dir, sent_fraction):
+    """Mark the oldest sent_fraction of the history as already sent, as the hourly job would have."""
+    checkpoint_file = os.path.join(work_dir, "sent_data.csv")
+    with open(data_file, newline="") as f_in, open(checkpoint_file, "w", newline="") as f_out:
+        reader = csv.DictReader(f_in)
+        rows = [(r["rjn_siteid"], r["rjn_entityid"], r["timestamp"]) for r in reader]
+        csv.writer(f_out).writerows(rows[:int(len(rows) * sent_fraction)])
+    return checkpoint_file, int(len(rows) * sent_fraction)
+
+def write_query_files(query_rows, work_dir, n_files=2):
+    paths = []
+    for k in range(n_files):
+        path = os.path.join(work_dir, f"points-{k}.csv")
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=query_rows[0].keys())
+            writer.writeheader()
+            writer.writerows(query_rows[k::n_files])
+        paths.append(path)
+    return paths
+
+def bench_scale(n_points, years, sent_fraction):
+    query_rows = bench_query_rows(n_points)
+    sent_samples = []
+    def stub_send(session, base_url, project_id, entity_id, timestamps, values):
+        sent_samples.append(len(timestamps))
+        return timestamps
+
+    with tempfile.TemporaryDirectory() as work_dir, contextlib.redirect_stdout(io.StringIO()):
+        data_file, timings, rows = generate_history(query_rows, years, work_dir)
+        checkpoint_file, checkpointed = generate_checkpoint(data_file, work_dir, sent_fraction)
+
+        one_cycle = sanitizer.sanitize_data_for_aggregated_storage(_raw_rows_for_day(query_rows, 0)[:n_points])
+        start = time.perf_counter()
+        storage.store_live_values(one_cycle, data_file)
+        append_cycle_s = time.perf_counter() - start
+
+        real_send = aggregator.send_data_to_rjn2
+        aggregator.send_data_to_rjn2 = stub_send
+        try:
+            start = time.perf_counter()
+            stub_session = SimpleNamespace(custom_dict={"url": "http://stub/"})
+            aggregator.aggregate_and_send(stub_session, data_file, checkpoint_file, "http://stub/", headers_rjn=None)
+            aggregate_s = time.perf_counter() - start
+        finally:
+            aggregator.send_data_to_rjn2 = real_send
+
+        query_paths = write_query_files(query_rows, work_dir)
+        start = time.perf_counter()
+        load_query_rows_from_csv_files(query_paths)
+        load_queries_s = time.perf_counter() - start
+        file_mb = os.path.getsize(data_file) / 1024 / 1024
+
+    return {
+        "points": n_points,
+        "years": years,
+        "rows": rows,
+        "file_mb": round(file_mb, 1),
+        "checkpoint_rows": checkpointed,
+        "sanitize_s": round(timings["sanitize_s"], 4),
+        "store_s": round(timings["store_s"], 4),
+        "append_cycle_s": round(append_cycle_s, 5),
+        "aggregate_s": round(aggregate_s, 4),
+        "aggregate_sent_samples": sum(sent_samples),
+        "load_queries_s": round(load_queries_s, 5),
+        "rows_per_s": round(rows / timings["store_s"], 1) if timings["store_s"] else 0,
+    }
+
+def fit_per_row(results, metric):
+    """Least-squares slope through the origin: seconds per row for a stage."""
+    num = sum(r["rows"] * r[metric] for r in results)
+    den = sum(r["rows"] ** 2 for r in results)
+    return num / den if den else 0.0
+
+def print_curves(results, window_s):
+    columns = ["points", "years", "rows", "file_mb", "sanitize_s", "store_s", "append_cycle_s", "aggregate_s", "load_queries_s"]
+    print("  ".join(f"{c:>14}" for c in columns))
+    for r in results:
+        print("  ".join(f"{r[c]:>14}" for c in columns))
+
+    per_row = fit_per_row(results, "aggregate_s")
+    print(f"\naggregate_and_send: {per_row * 1e6:.2f} us per stored row (all history is re-read every hour)")
+    if per_row:
+        max_rows = window_s / per_row
+        print(f"The hourly job exceeds a {window_s:.0f} s window at about {max_rows:,.0f} stored rows, i.e.:")
+        for n_points in sorted({r["points"] for r in results}):
+            print(f"  {n_points:>6} points -> {max_rows / n_points / SAMPLES_PER_YEAR:8.2f} years of history")
+
+def write_curves(results, path):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=results[0].keys())
+        writer.writeheader()
+        writer.writerows(results)
+    print(f"Scaling curves written to: \n{path}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline data-path scaling benchmarks on synthetic history.")
+    parser.add_argument("--points", type=int, nargs="+", default=[2, 10])
+    parser.add_argument("--years", type=float, nargs="+", default=[0.1, 0.5, 1.0])
+    parser.add_argument("--sent-fraction", type=float, default=0.99, help="Share of the history already in the checkpoint file.")
+    parser.add_argument("--window-s", type=float, default=300.0, help="Time budget of the hourly job, for the extrapolation.")
+    parser.add_argument("--out", default=None, help="Write the scaling curves to this CSV file.")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results = []
+    for n_points in args.points:
+        for years in args.years:
+            print(f"scale: {n_points} points x {years} years ...")
+            results.append(bench_scale(n_points, years, args.sent_fraction))
+    print()
+    print_curves(results, args.window_s)
+    print(f"\npeak RSS: {peak_rss_mb():.1f} MB")
+    if args.out:
+        write_curves(results, args.out)
+
+    keyed = {f"{r['points']}x{r['years']}": {k: v for k, v in r.items() if k.endswith("_s") or k == "rows_per_s"} for r in results}
+    if args.save_baseline:
+        save_baseline(BASELINE_NAME, keyed)
+        return 0
+    regressions = compare_to_baseline(BASELINE_NAME, keyed, tolerance=args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+# benchmarks/replay.py
+'''
+Title: replay.py
+
+Purpose:
+Measure the client-side cost (CPU time, wall time, peak Python allocations) of a pipeline function while its
+EDS/RJN traffic is served from a recorded transport archive (src/pipeline/replay.py), so changes to EdsClient,
+the collector or send_data_to_rjn2 can be compared offline on real production traffic shapes.
+
+Record once, on a box with EDS access:
+    PIPELINE_TRANSPORT_MODE=record poetry run python -m projects.eds_to_rjn.scripts.daemon_runner live
+Then, anywhere:
+    poetry run python -m benchmarks.replay exports/transport_archive.jsonl.gz projects.eds_to_rjn.scripts.daemon_runner:run_live_cycle --repeat 5
+'''
+import argparse
+import contextlib
+import importlib
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+from benchmarks.common import compare_to_baseline, print_table, save_baseline
+from src.pipeline import replay
+
+def load_callable(target: str):
+    module_name, _, function_name = target.partition(":")
+    return getattr(importlib.import_module(module_name), function_name)
+
+def bench_replay(fn, repeat: int, pace: str, trace_allocations: bool = True, verbose: bool = False) -> dict:
+    cpu_times, wall_times, peaks = [], [], []
+    for _ in range(repeat):
+        if trace_allocations:
+            tracemalloc.start()
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        with contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO()):
+            fn()
+        cpu_times.append(time.process_time() - cpu_start)
+        wall_times.append(time.perf_counter() - wall_start)
+        if trace_allocations:
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    results = {
+        "cpu_min_ms": round(1000 * min(cpu_times), 3),
+        "cpu_mean_ms": round(1000 * sum(cpu_times) / repeat, 3),
+        "wall_mean_ms": round(1000 * sum(wall_times) / repeat, 3),
+        "pace": pace,
+    }
+    if peaks:
+        results["alloc_peak_mb"] = round(max(peaks) / 1024 / 1024, 3)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Client-side cost of a pipeline function on replayed traffic.")
+    parser.add_argument("archive", help="Archive written with PIPELINE_TRANSPORT_MODE=record.")
+    parser.add_argument("target", help="module:function to run, e.g. projects.eds_to_rjn.scripts.daemon_runner:run_live_cycle")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--pace", choices=["fast", "recorded"], default="fast")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="Skip allocation tracing (it slows the run down).")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    # Set before the target is imported or called, so every login_to_session picks up the replay adapter.
+    os.environ[replay.MODE_ENV] = "replay"
+    os.environ[replay.ARCHIVE_ENV] = args.archive
+    os.environ[replay.PACE_ENV] = args.pace
+
+    fn = load_callable(args.target)
+    results = {args.target: bench_replay(fn, args.repeat, args.pace, not args.no_tracemalloc, args.verbose)}
+    print_table(results)
+
+    baseline_name = "replay_" + args.target.replace(":", "_").replace(".", "_")
+    if args.save_baseline:
+        save_baseline(baseline_name, results)
+        return 0
+    regressions = compare_to_baseline(baseline_name, results, tolerance=args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
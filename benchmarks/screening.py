@@ -0,0 +1,77 @@
+# benchmarks/screening.py
+'''
+Title: screening.py
+
+Purpose:
+Time the quality screening (src/pipeline/screening.py) over synthetic 5-minute history, to check it still fits
+in the hourly path: by default a year of samples for 300 points.
+
+Usage:
+    poetry run python -m benchmarks.screening
+    poetry run python -m benchmarks.screening --points 500 --years 2 --save-baseline
+'''
+import argparse
+import math
+import random
+import sys
+import time
+
+from benchmarks.common import compare_to_baseline, print_table, save_baseline
+from src.pipeline import screening
+
+BASELINE_NAME = "screening"
+STEP_S = 300
+
+def synthetic_series(n_samples: int, seed: int):
+    """A daily cycle plus noise, with a flatline, a spike and an out-of-range value planted in it."""
+    rng = random.Random(seed)
+    start = 1_700_000_000
+    times = [start + STEP_S * i for i in range(n_samples)]
+    values = [50 + 10 * math.sin(i * 2 * math.pi / 288) + rng.random() for i in range(n_samples)]
+    for i in range(n_samples // 3, min(n_samples, n_samples // 3 + 24)):
+        values[i] = 42.0
+    values[n_samples // 2] = 500.0
+    values[-1] = -5.0
+    if screening.np is not None:
+        return screening.np.array(times, dtype=float), screening.np.array(values)
+    return times, values
+
+def bench_screening(n_points: int, years: float) -> dict:
+    n_samples = int(years * 365 * 86400 / STEP_S)
+    series = [synthetic_series(n_samples, seed) for seed in range(min(n_points, 8))]  # reused round-robin
+    flagged = 0
+    start = time.perf_counter()
+    for p in range(n_points):
+        times, values = series[p % len(series)]
+        flags = screening.screen_series(times, values, lo=0.0, hi=120.0)
+        flagged += sum(1 for mask in flags if mask) if p < len(series) else 0
+    wall = time.perf_counter() - start
+    return {
+        "backend": "numpy" if screening.np is not None else "python",
+        "samples": n_points * n_samples,
+        "wall_s": round(wall, 3),
+        "per_point_ms": round(1000 * wall / n_points, 3),
+        "samples_per_s": round(n_points * n_samples / wall, 1),
+        "flagged_first_points": flagged,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Quality screening over synthetic 5-minute history.")
+    parser.add_argument("--points", type=int, default=300)
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results = {f"{args.points}x{args.years:g}y": bench_screening(args.points, args.years)}
+    print_table(results)
+    if args.save_baseline:
+        save_baseline(BASELINE_NAME, results)
+        return 0
+    regressions = compare_to_baseline(BASELINE_NAME, results, tolerance=args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+# benchmarks/standins.py
+'''
+Title: standins.py
+
+Purpose:
+Local HTTP stand-ins for the EDS REST API and the RJN Clarity API, speaking just enough of each protocol
+for the endpoints used in src/pipeline/api/eds.py and src/pipeline/api/rjn.py.
+
+    EDS: login, logout, points/query, trend/tabular (create + fetch), requests, points/export
+    RJN: auth, projects/{project_id}/entities/{entity_id}/data
+
+Each stand-in has a configurable latency (fixed + jitter), point count and error rate (HTTP 503), and counts
+the requests it served per endpoint.
+
+    with EdsStandIn(n_points=500, latency_ms=5) as eds, RjnStandIn() as rjn:
+        session = login_to_session(eds.url, "bench", "bench")
+'''
+import gzip
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from collections import Counter
+from urllib.parse import urlparse, parse_qs
+
+BENCH_SITE_ID = "00000000-0000-0000-0000-00000000BE0C"
+
+def bench_iess(i: int) -> str:
+    return f"BENCH{i:05d}.UNIT0@NET0"
+
+def bench_query_rows(n_points: int, zd: str = "Bench") -> list:
+    """Rows shaped like points-maxson.csv, for the stand-in's points."""
+    return [{
+        "zd": zd,
+        "idcs": f"BENCH{i:05d}",
+        "iess": bench_iess(i),
+        "sid": str(10000 + i),
+        "shortdesc": f"BENCH{i}",
+        "rjn_siteid": BENCH_SITE_ID,
+        "rjn_entityid": str(1000 + i),
+        "rjn_name": f"Bench {i}",
+    } for i in range(n_points)]
+
+class _StandInServer:
+    name = "standin"
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.counts = Counter()
+        self.errors = Counter()
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/v1/"
+
+    def _delay_and_maybe_fail(self, endpoint: str) -> bool:
+        with self._lock:
+            self.counts[endpoint] += 1
+            delay = self.latency_ms + self.random.uniform(0, self.jitter_ms)
+            fail = self.random.random() < self.error_rate
+            if fail:
+                self.errors[endpoint] += 1
+        if delay:
+            time.sleep(delay / 1000)
+        return fail
+
+    def handle(self, method: str, path: str, query: dict, body):
+        """Return (status, payload). payload is dict/list (sent as JSON) or str (sent as text)."""
+        raise NotImplementedError
+
+    def _make_handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without this, Nagle plus delayed ACK adds ~40 ms per response.
+            disable_nagle_algorithm = True
+
+            def _dispatch(self, method):
+                parsed = urlparse(self.path)
+                path = parsed.path.replace("//", "/")
+                path = path[len("/api/v1/"):] if path.startswith("/api/v1/") else path.lstrip("/")
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                if raw and self.headers.get("Content-Encoding") == "gzip":
+                    raw = gzip.decompress(raw)
+                try:
+                    body = json.loads(raw) if raw else None
+                except ValueError:
+                    body = None
+                endpoint = path.split("/")[0] if not path.startswith("projects/") else "data"
+                if standin._delay_and_maybe_fail(endpoint):
+                    status, payload = 503, {"error": "stand-in injected failure"}
+                else:
+                    status, payload = standin.handle(method, path, parse_qs(parsed.query), body)
+                if isinstance(payload, str):
+                    data, content_type = payload.encode("utf-8"), "text/plain; charset=utf-8"
+                else:
+                    data, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name=self.name, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+class EdsStandIn(_StandInServer):
+    name = "EdsStandIn"
+
+    def __init__(self, n_points: int = 100, step: int = 300, **kwargs):
+        super().__init__(**kwargs)
+        self.n_points = n_points
+        self.step = step
+        self.known_iess = {bench_iess(i): i for i in range(n_points)}
+        self.tabular_requests = {}
+        self._next_request_id = 1
+
+    def _value(self, index: int, ts: int) -> float:
+        return round(50 + 10 * ((ts // self.step + index) % 97) / 97, 4)
+
+    def _point(self, iess: str, ts: int) -> dict:
+        index = self.known_iess[iess]
+        return {"iess": iess, "sid": 10000 + index, "ts": ts, "value": self._value(index, ts), "un": "MGD",
+                "shortdesc": f"BENCH{index}", "tss": ts, "quality": "G"}
+
+    def handle(self, method, path, query, body):
+        if path == "login":
+            return 200, {"sessionId": f"bench-session-{threading.get_ident()}"}
+        if path == "logout":
+            return 200, {}
+        if path == "license":
+            return 200, {"license": "stand-in"}
+        if path == "points/query":
+            now = int(time.time())
+            wanted = [iess for f in (body or {}).get("filters", []) for iess in f.get("iess", [])]
+            return 200, {"points": [self._point(iess, now) for iess in wanted if iess in self.known_iess]}
+        if path == "points/export":
+            lines = [f"POINT SID={10000 + i} IESS='{bench_iess(i)}' ZD='Bench' IDCS='BENCH{i:05d}' DESC='Bench point {i}'"
+                     for i in range(self.n_points)]
+            return 200, "\n".join(lines)
+        if path == "trend/tabular" and method == "POST":
+            with self._lock:
+                req_id = self._next_request_id
+                self._next_request_id += 1
+                self.tabular_requests[req_id] = body
+            return 200, {"id": req_id}
+        if path == "trend/tabular" and method == "GET":
+            req_id = int(query["id"][0])
+            request = self.tabular_requests.pop(req_id, None)
+            if request is None:
+                return 200, [{"status": "LAST", "items": []}]
+            start, till = request["period"]["from"], request["period"]["till"]
+            step = request.get("step", self.step)
+            items = []
+            for item in request["items"]:
+                index = self.known_iess.get(item["pointId"]["iess"], 0)
+                items.append([[ts, self._value(index, ts), "G"] for ts in range(start, till, step)])
+            return 200, [{"status": "LAST", "items": items}]
+        if path == "requests":
+            req_id = query["id"][0]
+            return 200, {req_id: {"status": "SUCCESS", "message": ""}}
+        return 404, {"error": f"unknown endpoint {path}"}
+
+class RjnStandIn(_StandInServer):
+    name = "RjnStandIn"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.samples_received = 0
+        self.stored = {}  # (project_id, entity_id) -> {timestamp: value}, read back by src/pipeline/verify.py
+
+    def handle(self, method, path, query, body):
+        if path == "auth":
+            return 200, {"token": "bench-token"}
+        if path.startswith("projects/") and path.endswith("/data") and method == "POST":
+            _, project_id, _, entity_id, _ = path.split("/")
+            data = (body or {}).get("data", {})
+            with self._lock:
+                self.samples_received += len(data)
+                self.stored.setdefault((project_id, entity_id), {}).update(data)
+            return 200, {"status": "ok"}
+        if path.startswith("projects/") and path.endswith("/data") and method == "GET":
+            _, project_id, _, entity_id, _ = path.split("/")
+            start, end = query.get("start", [""])[0], query.get("end", ["~"])[0]
+            with self._lock:
+                stored = self.stored.get((project_id, entity_id), {})
+                return 200, {"data": {ts: value for ts, value in stored.items() if start <= ts <= end}}
+        return 404, {"error": f"unknown endpoint {path}"}
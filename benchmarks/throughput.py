@@ -0,0 +1,156 @@
+# benchmarks/throughput.py
+'''
+Title: throughput.py
+
+Purpose:
+End-to-end throughput of the real client code paths against local EDS/RJN stand-ins (benchmarks/standins.py):
+    live     : login, collector.collect_live_values, sanitizer, storage.store_live_values, per cycle
+    backfill : create_tabular_request, wait_for_request_execution_session, EdsClient.get_tabular_mod
+    hourly   : aggregator.aggregate_and_send over an hour of stored samples per point
+
+Reports points/s (or samples/s), requests/s, p50/p99 request latency and peak RSS, and compares against the
+stored baseline in benchmarks/baselines/throughput.json.
+
+Usage:
+    poetry run python -m benchmarks.throughput
+    poetry run python -m benchmarks.throughput --points 1000 --latency-ms 20 --error-rate 0.01
+    poetry run python -m benchmarks.throughput --save-baseline
+'''
+import argparse
+import contextlib
+import copy
+import io
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.common import LatencyRecorder, compare_to_baseline, peak_rss_mb, print_table, save_baseline
+from benchmarks.standins import EdsStandIn, RjnStandIn, bench_iess, bench_query_rows
+
+from src.pipeline.api import eds, rjn
+from projects.eds_to_rjn.code import aggregator, collector, sanitizer, storage
+
+BASELINE_NAME = "throughput"
+
+def _quiet(verbose: bool):
+    # The pipeline prints per point; keep the benchmark output readable unless asked.
+    return contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+
+def bench_live(eds_standin, query_rows, cycles, work_dir, verbose=False):
+    recorder = LatencyRecorder()
+    data_file = os.path.join(work_dir, "live_data.csv")
+    collected = 0
+    start = time.perf_counter()
+    with _quiet(verbose):
+        for _ in range(cycles):
+            session = recorder.attach(eds.login_to_session(eds_standin.url, "bench", "bench"))
+            session.custom_dict = {"url": eds_standin.url, "zd": "Bench"}
+            data = collector.collect_live_values(session, copy.deepcopy(query_rows))
+            if data:
+                storage.store_live_values(sanitizer.sanitize_data_for_aggregated_storage(data), data_file)
+            collected += len(data)
+    wall = time.perf_counter() - start
+    return {
+        "wall_s": round(wall, 3),
+        "points": collected,
+        "points_per_s": round(collected / wall, 1),
+        "requests_per_s": round(len(recorder.latencies) / wall, 1),
+        **recorder.summary(),
+    }
+
+def bench_backfill(eds_standin, n_points, hours, verbose=False):
+    recorder = LatencyRecorder()
+    point_list = [bench_iess(i) for i in range(n_points)]
+    endtime = int(time.time()) // 300 * 300
+    starttime = endtime - hours * 3600
+    start = time.perf_counter()
+    with _quiet(verbose):
+        session = recorder.attach(eds.login_to_session(eds_standin.url, "bench", "bench"))
+        session.custom_dict = {"url": eds_standin.url, "zd": "Bench"}
+        request_id = eds.create_tabular_request(session, eds_standin.url, starttime, endtime, points=point_list)
+        eds.wait_for_request_execution_session(session, eds_standin.url, request_id)
+        results = eds.EdsClient.get_tabular_mod(session, request_id, point_list)
+    wall = time.perf_counter() - start
+    samples = sum(len(r) for r in results)
+    return {
+        "wall_s": round(wall, 3),
+        "samples": samples,
+        "samples_per_s": round(samples / wall, 1),
+        "requests_per_s": round(len(recorder.latencies) / wall, 1),
+        **recorder.summary(),
+    }
+
+def _write_hour_of_samples(query_rows, data_file):
+    hour_start = int(time.time()) // 3600 * 3600 - 3600
+    rows = []
+    for ts in range(hour_start, hour_start + 3600, 300):
+        for i, row in enumerate(query_rows):
+            rows.append({**row, "ts": ts, "value": 50 + i % 10})
+    storage.store_live_values(sanitizer.sanitize_data_for_aggregated_storage(rows), data_file)
+    return len(rows)
+
+def bench_hourly(rjn_standin, query_rows, work_dir, verbose=False):
+    recorder = LatencyRecorder()
+    data_file = os.path.join(work_dir, "hourly_live_data.csv")
+    checkpoint_file = os.path.join(work_dir, "hourly_sent_data.csv")
+    with _quiet(verbose):
+        stored = _write_hour_of_samples(query_rows, data_file)
+    start = time.perf_counter()
+    with _quiet(verbose):
+        session_rjn = recorder.attach(rjn.login_to_session(rjn_standin.url, "bench", "bench"))
+        session_rjn.custom_dict = {"url": rjn_standin.url}
+        aggregator.aggregate_and_send(session_rjn, data_file, checkpoint_file, rjn_standin.url, headers_rjn=None)
+    wall = time.perf_counter() - start
+    return {
+        "wall_s": round(wall, 3),
+        "samples": rjn_standin.samples_received,
+        "samples_stored": stored,
+        "samples_per_s": round(rjn_standin.samples_received / wall, 1),
+        "requests_per_s": round(len(recorder.latencies) / wall, 1),
+        **recorder.summary(),
+    }
+
+def run(args) -> dict:
+    query_rows = bench_query_rows(args.points)
+    standin_kwargs = dict(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate, seed=args.seed)
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir, \
+            EdsStandIn(n_points=args.points, **standin_kwargs) as eds_standin, \
+            RjnStandIn(**standin_kwargs) as rjn_standin:
+        if "live" in args.scenarios:
+            results["live"] = bench_live(eds_standin, query_rows, args.cycles, work_dir, args.verbose)
+        if "backfill" in args.scenarios:
+            results["backfill"] = bench_backfill(eds_standin, args.points, args.hours, args.verbose)
+        if "hourly" in args.scenarios:
+            results["hourly"] = bench_hourly(rjn_standin, query_rows, work_dir, args.verbose)
+    results["process"] = {"peak_rss_mb": round(peak_rss_mb(), 1)}
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end throughput benchmark against local EDS/RJN stand-ins.")
+    parser.add_argument("--points", type=int, default=200, help="Points known to the EDS stand-in and queried per cycle.")
+    parser.add_argument("--cycles", type=int, default=3, help="Live cycles to run.")
+    parser.add_argument("--hours", type=int, default=24, help="Hours of 5-minute history requested by the backfill.")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="Fixed stand-in latency per request.")
+    parser.add_argument("--jitter-ms", type=float, default=1.0, help="Uniform random latency added per request.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 503.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scenarios", nargs="+", default=["live", "backfill", "hourly"], choices=["live", "backfill", "hourly"])
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Relative change that counts as a regression.")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own printing.")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    print_table(results)
+    if args.save_baseline:
+        save_baseline(BASELINE_NAME, results)
+        return 0
+    regressions = compare_to_baseline(BASELINE_NAME, results, tolerance=args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,5 @@
 #pipeline.aggregator.py
+import contextlib
 import csv
 import datetime
 from collections import defaultdict
@@ -6,8 +7,72 @@ import os
 from pprint import pprint
 
 from src.pipeline.api.rjn import send_data_to_rjn2
+from src.pipeline import metrics, screening, timebuckets
+from src.pipeline.rotation import row_ts
+from src.pipeline.uploadscheduler import UploadScheduler
 
-def aggregate_and_send(session_rjn, data_file, checkpoint_file, rjn_base_url, headers_rjn):
+@contextlib.contextmanager
+def _open_data_rows(data_file, since_ts=None):
+    if hasattr(data_file, "iter_rows"):
+        yield data_file.iter_rows(start=since_ts)
+        return
+    with open(data_file, newline='') as f:
+        reader = csv.DictReader(f)
+        if since_ts is None:
+            yield reader
+        else:
+            yield (row for row in reader if row_ts(row) >= since_ts)
+
+def _screening_history(data_file, grouped, history_s):
+    """
+    {(siteid, entityid): [(timestamp, value, epoch, source ts), ...]} read back from storage for the entities about
+    to be sent: their unsent samples and history_s of stored samples before them, sent or not, oldest first.
+    """
+    starts = {key: min(epoch for _, _, epoch in records) - history_s for key, records in grouped.items() if records}
+    history = defaultdict(dict)
+    if not starts:
+        return history
+    with _open_data_rows(data_file, min(starts.values())) as reader:
+        for row in reader:
+            key = (row.get("rjn_siteid"), row.get("rjn_entityid"))
+            if key not in starts or row.get("value") in ("", None) or not row.get("timestamp"):
+                continue
+            epoch = row_ts(row)
+            if epoch >= starts[key]:
+                source_ts = row.get("source_ts")
+                # One record per timestamp string, the earliest, as the "first" fold policy picks
+                record = (row["timestamp"], float(row["value"]), epoch, float(source_ts) if source_ts not in (None, "") else None)
+                if row["timestamp"] not in history[key] or epoch < history[key][row["timestamp"]][2]:
+                    history[key][row["timestamp"]] = record
+    return {key: sorted(records.values(), key=lambda record: record[2]) for key, records in history.items()}
+
+@metrics.timed("screening")
+def record_flags(siteid, entityid, history, pending, lo_hi, flags_file=None):
+    # history: [(timestamp, value, epoch, source ts), ...] oldest first; only samples in pending (timestamps about
+    # to be sent) are reported, the rest is context for the rolling windows
+    flags = screening.screen_records([(epoch, value, source_ts) for _, value, epoch, source_ts in history], *lo_hi)
+    flagged = [(ts, value, mask) for (ts, value, _, _), mask in zip(history, flags) if mask and ts in pending]
+    for name, count in screening.summarize(mask for _, _, mask in flagged).items():
+        if count:
+            metrics.inc("pipeline_samples_flagged_total", count, flag=name)
+    if flagged and flags_file:
+        with open(flags_file, 'a', newline='') as f:
+            writer = csv.writer(f)
+            for ts, value, mask in flagged:
+                writer.writerow([siteid, entityid, ts, value, "|".join(screening.flag_names(mask))])
+    return flags
+
+@metrics.timed("aggregate_and_send")
+def aggregate_and_send(session_rjn, data_file, checkpoint_file, rjn_base_url, headers_rjn, since_ts=None, limits=None, flags_file=None, fold_policy="first", scheduler=None,
+                     screen_history_s=screening.DEFAULT_CONFIG.spike_window * screening.DEFAULT_CONFIG.step_s):
+    # data_file: a CSV path, or a src.pipeline.rotation.PartitionedStore
+    # since_ts: ignore rows older than this; with a PartitionedStore, older partitions are not even opened
+    # limits: {(siteid, entityid): (lo, hi)} for the range check of the quality screening
+    # flags_file: CSV that flagged samples are appended to; screening flags, it never drops or alters data
+    # fold_policy: which sample a local timestamp string gets when two share it, as in the repeated fall-back
+    #   hour ("first", "last" or "mean"; see src/pipeline/timebuckets.py)
+    # scheduler: an UploadScheduler; its time_budget_s caps how long backlog is sent before the rest waits for the next run
+    # screen_history_s: stored history screened ahead of the unsent samples, so the rolling checks have context
 
     # Prepare single timestamp (top of the hour UTC)
     #timestamp = datetime.datetime.now(datetime.timezone.utc).replace(minute=0, second=0, microsecond=0)
@@ -27,62 +92,57 @@ def aggregate_and_send(session_rjn, data_file, checkpoint_file, rjn_base_url, he
 
     # Load all available data from the live data CSV
     grouped = defaultdict(list)
-    with open(data_file, newline='') as f:
-        reader = csv.DictReader(f)
+    unsanitized = 0
+    with _open_data_rows(data_file, since_ts) as reader:
         for row in reader:
             if row["value"] == "":
                  #print("Skipping empty row")
                  continue
-            elif "timestamp" not in row:
-                print(row.keys())
-                print("timestamp not in row")
+            elif not row.get("timestamp"):
+                unsanitized += 1 # raw collector rows; the live cycle stores sanitized rows (sanitizer.py)
                 continue
             timestamp = row["timestamp"]
             siteid = row["rjn_siteid"]
             entityid = row["rjn_entityid"]
             value = float(row["value"])
             key = (siteid, entityid)
-            # Only include if not already sent
+            # Only include if not already sent; repeats of a timestamp are resolved by fold_policy below
             if (siteid, entityid, timestamp) not in already_sent:
-                grouped[key].append((timestamp, value))
+                grouped[key].append((timestamp, value, row_ts(row)))
 
+    if unsanitized:
+        print(f"Skipped {unsanitized} rows without a timestamp column")
     print(f"len(grouped) = {len(grouped)}")
 
-    # Send data per entity
+    # One value per local timestamp per entity, sorted
+    history = _screening_history(data_file, grouped, screen_history_s)
+    series = {}
     for (siteid, entityid), records in grouped.items():
-        print(f"siteid = {siteid}")
-        # Sort timestamps if needed
-        records.sort(key=lambda x: x[0])
-
-        timestamps = [ts for ts, _ in records]
-        values = [round(val, 2) for _, val in records]
+        records = timebuckets.resolve_folds(records, fold_policy)
+        record_flags(siteid, entityid, history.get((siteid, entityid), []), {ts for ts, _ in records},
+                     (limits or {}).get((siteid, entityid), (None, None)), flags_file)
+        series[(siteid, entityid)] = [(ts, round(val, 2)) for ts, val in records]
+        if not records:
+            print(f"No new data to send for {siteid} / {entityid}")
 
-        if timestamps:
-            print(f"Attempting to send {len(timestamps)} values to RJN for entity {entityid} at site {siteid}")
-            '''
-            send_data_to_rjn(
-                base_url=rjn_base_url,
-                project_id=siteid,
-                entity_id=entityid,
-                headers=headers_rjn,
-                timestamps=timestamps,
-                values=values
-            )
-            '''
-            send_data_to_rjn2(
+    # Every entity's newest samples first, then the backlog round-robin (src/pipeline/uploadscheduler.py)
+    scheduler = scheduler or UploadScheduler()
+    for job in scheduler.jobs(series):
+        print(f"Attempting to send {len(job.timestamps)} {job.lane} values to RJN for entity {job.entityid} at site {job.siteid}")
+        sent = send_data_to_rjn2(
             session_rjn,
             base_url = session_rjn.custom_dict["url"],
-            project_id=row["rjn_siteid"],
-            entity_id=row["rjn_entityid"],
-            timestamps=timestamps,
-            values=[round(row["value"], 2)]
+            project_id=job.siteid,
+            entity_id=job.entityid,
+            timestamps=job.timestamps,
+            values=job.values
         )
 
-            # Record successful sends
-            if os.path.exists(checkpoint_file):
-                with open(checkpoint_file, 'a', newline='') as f:
-                    writer = csv.writer(f)
-                    for ts in timestamps:
-                        writer.writerow([siteid, entityid, ts])
-        else:
-            print(f"No new data to send for {siteid} / {entityid}")
\ No newline at end of file
+        # Record successful sends; chunks that failed are sent again next time
+        if checkpoint_file and sent:
+            with open(checkpoint_file, 'a', newline='') as f:
+                writer = csv.writer(f)
+                for ts in sent:
+                    writer.writerow([job.siteid, job.entityid, ts])
+    if scheduler.deferred_samples:
+        print(f"Backlog: {scheduler.deferred_samples} samples left for the next run")
\ No newline at end of file
@@ -5,7 +5,9 @@ logger = logging.getLogger(__name__)
 
 from src.pipeline.helpers import round_time_to_nearest_five_minutes
 from src.pipeline.api.eds import fetch_eds_data, EdsClient
+from src.pipeline import metrics
 
+@metrics.timed("collect_live_values")
 def collect_live_values(session, queries_defaultdict):   
     data = []
     for row in queries_defaultdict:
@@ -44,7 +46,9 @@ def collect_live_values(session, queries_defaultdict):
             '''
             row.update(point_data)
             data.append(row)
+            metrics.inc("pipeline_points_collected_total")
         except Exception as e:
             print(f"Error on row: {e}")
+            metrics.inc("pipeline_collect_errors_total")
     return data
 
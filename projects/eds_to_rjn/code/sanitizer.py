@@ -7,9 +7,8 @@ Purpose:
 I like it when data gathered is data returned. Sanitization should not happen during import. If not entirely probitive, the entirety of the raw should be available for unforeseen use cases.
 So. We need explicit and discernible sanitization scenarios, called a scripted approach, following the preparation, collection, and aggregation, insert buzz words here, etc.
 '''
-from datetime import datetime
 #from ..code import collector, storage, aggregator
-from src.pipeline.helpers import round_time_to_nearest_five_minutes
+from src.pipeline import metrics, timebuckets
 
 def sanitize_data_for_printing(data):
     #data_sanitized_for_printing = data
@@ -17,23 +16,29 @@ def sanitize_data_for_printing(data):
     #return data_sanitized_for_printing
     return data
 
+@metrics.timed("sanitize")
 def sanitize_data_for_aggregated_storage(data):
+    # Bucketed in bulk in the site's zone (src/pipeline/timebuckets.py), rather than a fromtimestamp() per row.
+    # arguably not appropriate at this point. round at transmission
+    timestamps, folds = timebuckets.to_local_buckets([row["ts"] for row in data], sep="T")
+    bucket_epochs = timebuckets.from_local_buckets(timestamps, folds)
     sanitized = []
-    for row in data:
-        rounded_dt = round_time_to_nearest_five_minutes(datetime.fromtimestamp(row["ts"])) # arguably not appropriate at this point. round at transmission
+    for row, timestamp, bucket_epoch in zip(data, timestamps, bucket_epochs):
         #row["timestamp_sani"] = rounded_dt
         #row["value_rounded"] = round(row["value"], 2)
+        value = row.get("value")
 
         sanitized.append({
-            "timestamp": rounded_dt.isoformat(),
-            "ts": rounded_dt.timestamp(),
+            "timestamp": timestamp,
+            "ts": float(bucket_epoch),
+            "source_ts": float(row["ts"]), # the EDS sample time, for the quality screening's STALE check
             "iess": row.get("iess"),
             "sid": row.get("sid"),
             "un": row.get("un"),
             "shortdesc": row.get("shortdesc"),
             "rjn_siteid": row.get("rjn_siteid"),
             "rjn_entityid": row.get("rjn_entityid"),
-            "value": round(row.get("value"), 2)
+            "value": round(value, 2) if value is not None else "" # no reading: stored empty, skipped at upload
         })
                 
     data_sanitized_for_aggregated_storage = sanitized
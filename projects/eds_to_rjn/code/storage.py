@@ -1,9 +1,21 @@
 import csv
 from datetime import datetime
+from src.pipeline import metrics
+
+@metrics.timed("storage_append")
 def store_live_values(data, path):
     with open(path, 'a', newline='') as f:
         writer = csv.DictWriter(f, fieldnames=data[0].keys())
         if f.tell() == 0:  # file is empty
             writer.writeheader()
         writer.writerows(data)
-    print(f"Live values stored, {datetime.now()} to {path}")
\ No newline at end of file
+    metrics.inc("pipeline_rows_stored_total", len(data))
+    print(f"Live values stored, {datetime.now()} to {path}")
+
+@metrics.timed("storage_append")
+def store_live_values_partitioned(data, store):
+    # store: src.pipeline.rotation.PartitionedStore; one file per day/month instead of one file forever
+    store.append(data)
+    store.rotate()
+    metrics.inc("pipeline_rows_stored_total", len(data))
+    print(f"Live values stored, {datetime.now()} to {store.dir}")
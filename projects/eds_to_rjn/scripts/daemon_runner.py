@@ -1,15 +1,91 @@
 #projects/eds_to_rjndaemon_runner.py
 import schedule, time
 import logging
+import os
 import datetime
 from ..code import collector, storage, aggregator, sanitizer
-from src.pipeline.api.eds import login_to_session # actually generalized beyond EDS
-from .main import get_eds_maxson_token_and_headers, get_rjn_tokens_and_headers
-from src.pipeline.env import SecretsYaml
+from src.pipeline.api import rjn
+from .main import get_rjn_tokens_and_headers
+from src.pipeline.env import SecretsYaml, find_urls
 from src.pipeline.projectmanager import ProjectManager
 from src.pipeline.queriesmanager import QueriesManager
 from src.pipeline.queriesmanager import load_query_rows_from_csv_files, group_queries_by_api_url
+from src.pipeline.daemon.status import update_status
+from src.pipeline.daemon.feed import publish_live_values
+from src.pipeline import metrics, screening, probe
+from src.pipeline.sessionpool import SESSION_POOL
+from src.pipeline.uploadscheduler import UploadScheduler
 
+# Aggregate output is partitioned by day, and closed days are gzipped (src/pipeline/rotation.py).
+AGGREGATE_GRANULARITY = "day"
+AGGREGATE_CODEC = "gzip"
+UPLOAD_LOOKBACK_S = 7 * 24 * 3600 # the hourly upload only scans partitions this recent
+# After an outage the hourly upload sends every entity's newest hour first, then backlog for at most this long;
+# the rest goes in the following hours (src/pipeline/uploadscheduler.py). Jobs share one scheduler thread, so this
+# stays well under the 5-minute live interval: a longer upload would make the live cycle miss runs.
+UPLOAD_BACKLOG_BUDGET_S = 2 * 60
+# Likewise for the trend sync: after an EDS outage the gap is fetched in bounded windows (src/pipeline/trendsync.py)
+# for at most this long per run, and the following runs resume from the stored watermarks.
+TREND_SYNC_BUDGET_S = 2 * 60
+# Unchanged live values are not stored or sent again; a point whose value holds steady is re-sent this often.
+CHANGE_HEARTBEAT_S = 3600
+# Each verify cycle reads back this fraction of the entities, a few windows each (src/pipeline/verify.py).
+VERIFY_ENTITY_FRACTION = 0.1
+VERIFY_WINDOWS_PER_ENTITY = 2
+
+def get_aggregate_store(project_manager, stem="live_data"):
+    from src.pipeline.rotation import PartitionedStore
+    return PartitionedStore(project_manager.get_aggregate_dir(), stem, granularity=AGGREGATE_GRANULARITY, codec=AGGREGATE_CODEC)
+
+_dedup_indexes = {}
+
+def get_dedup_index(project_manager, stem="live_data"):
+    # One index per process, kept in memory between cycles and persisted beside the aggregate data.
+    # One index per store: keys are only (bucket, iess), so a mark must mean "stored in *this* store", or a sample
+    # stored in one store would stop the same bucket from ever reaching the other.
+    from src.pipeline.dedup import DedupIndex
+    path = os.path.join(project_manager.get_aggregate_dir(), f"dedup_index_{stem}.log")
+    if path not in _dedup_indexes:
+        _dedup_indexes[path] = DedupIndex(path)
+    return _dedup_indexes[path]
+
+_change_detectors = {}
+
+def get_change_detector(project_manager, consumer="storage"):
+    # Like the dedup index: kept in memory between cycles, checkpointed beside the aggregate data.
+    # One detector per consumer: each records what *it* has stored or posted, so one cannot suppress the other's rows.
+    from src.pipeline.changedetect import ChangeDetector
+    file_name = "change_state.json" if consumer == "storage" else f"change_state_{consumer}.json"
+    path = os.path.join(project_manager.get_aggregate_dir(), file_name)
+    if path not in _change_detectors:
+        _change_detectors[path] = ChangeDetector(path, heartbeat_s=CHANGE_HEARTBEAT_S)
+    return _change_detectors[path]
+
+_upload_verifiers = {}
+
+def get_upload_verifier(project_manager):
+    # Like the dedup index: one per process, with its verified windows checkpointed beside the aggregate data.
+    from src.pipeline.verify import UploadVerifier
+    path = os.path.join(project_manager.get_aggregate_dir(), "verify_state.json")
+    if path not in _upload_verifiers:
+        _upload_verifiers[path] = UploadVerifier(path, entity_fraction=VERIFY_ENTITY_FRACTION,
+                                                 windows_per_entity=VERIFY_WINDOWS_PER_ENTITY)
+    return _upload_verifiers[path]
+
+_sharded_collector = None
+
+def get_sharded_collector():
+    # Started on first use and kept for the life of the process, so the workers keep their sessions between cycles.
+    global _sharded_collector
+    from src.pipeline import sharding
+    workers = sharding.workers_from_env()
+    if workers <= 1:
+        return None
+    if _sharded_collector is None:
+        _sharded_collector = sharding.ShardedCollector(collector.collect_live_values, workers=workers)
+    return _sharded_collector
+
+@metrics.timed("live_cycle")
 def run_live_cycle():
     logging.info("Running live cycle...")
     #test_connection_to_internet()  
@@ -20,8 +96,12 @@ def run_live_cycle():
     queries_manager = QueriesManager(project_manager)
     sessions = {}
 
-    session_maxson = login_to_session(api_url = secrets_dict["eds_apis"]["Maxson"]["url"] ,username = secrets_dict["eds_apis"]["Maxson"]["username"], password = secrets_dict["eds_apis"]["Maxson"]["password"])
-    session_maxson.custom_dict = secrets_dict["eds_apis"]["Maxson"]
+    if probe.is_known_down(secrets_dict["eds_apis"]["Maxson"]["url"]):
+        update_status("warning", "live cycle: skipped, EDS Maxson is down according to the probes")
+        return
+
+    # Logged-in sessions are shared across cycles, and across projects hosted in the same daemon process.
+    session_maxson = SESSION_POOL.get_eds_session(secrets_dict["eds_apis"]["Maxson"])
     sessions.update({"Maxson":session_maxson})
 
     queries_dictlist = load_query_rows_from_csv_files(queries_manager.get_default_query_file_paths_list())
@@ -33,24 +113,129 @@ def run_live_cycle():
     session = sessions[key] 
 
     queries_defaultdict = queries_defaultdictlist.get(key,[])        
-    data = collector.collect_live_values(session, queries_defaultdict) # need a way to for the eds_api method refernce to land on the other end
+    sharded_collector = get_sharded_collector()
+    if sharded_collector is not None:
+        # Worker processes collect; this process stays the single writer of live_data.csv.
+        data = sharded_collector.collect({key: session.custom_dict}, {key: queries_defaultdict})
+    else:
+        data = collector.collect_live_values(session, queries_defaultdict) # need a way to for the eds_api method refernce to land on the other end
     #print(f"data = {data}")
-    if len(data)==0:
+    collected_count = len(data)
+    dedup_index = get_dedup_index(project_manager, "live_data")
+    data = dedup_index.filter_new(data, mark=False) # unchanged EDS values and re-run cycles are dropped here
+    change_detector = get_change_detector(project_manager)
+    data = change_detector.filter_changed(data) # as are steady values between heartbeats
+    if collected_count and len(data)==0:
+        print("No collected value changed since it was last stored. Skipping storage.store_live_values()")
+        update_status("ok", f"live cycle: no changed values for {key}")
+    elif len(data)==0:
         print("No data retrieved via collector.collect_live_values(). Skipping storage.store_live_values()")
+        SESSION_POOL.invalidate(session.custom_dict) # the login may have expired; log in afresh next cycle
+        update_status("warning", f"live cycle: no data retrieved for {key}")
     else:
-        storage.store_live_values(data, project_manager.get_aggregate_dir()+"\live_data.csv") # project_manager.get_live_data_csv_file
+        # Stored in the aggregated shape (local 5-minute "timestamp" string, rounded value) that aggregate_and_send
+        # and the upload verifier read; raw collector rows carry only the EDS ts.
+        storage.store_live_values_partitioned(sanitizer.sanitize_data_for_aggregated_storage(data),
+                                              get_aggregate_store(project_manager, "live_data"))
+        dedup_index.mark(data)
+        change_detector.commit(data)
+        publish_live_values(data) # latest-value feed for the TUI
+        update_status("ok", f"live cycle: stored {len(data)} values for {key}")
 
+@metrics.timed("hourly_cycle")
 def run_hourly_cycle(): 
     print("Running hourly cycle...")
     project_name = 'eds_to_rjn' # project_name = ProjectManager.identify_default_project()
     project_manager = ProjectManager(project_name)
     secrets_dict = SecretsYaml.load_config(secrets_file_path = project_manager.get_configs_secrets_file_path())
+    if probe.is_known_down(secrets_dict["contractor_apis"]["RJN"]["url"]):
+        update_status("warning", "hourly cycle: skipped, RJN is down according to the probes")
+        return
     rjn_api, headers_rjn = get_rjn_tokens_and_headers(secrets_dict)
-    aggregator.aggregate_and_send(data_file = project_manager.get_aggregate_dir()+"\live_data.csv",
-                                  checkpoint_file = project_manager.get_aggregate_dir()+"\sent_data.csv",
+    session_rjn = SESSION_POOL.get_rjn_session(secrets_dict["contractor_apis"]["RJN"])
+    queries_manager = QueriesManager(project_manager)
+    limits = screening.limits_from_query_rows(load_query_rows_from_csv_files(queries_manager.get_default_query_file_paths_list()))
+    # Spot-check earlier uploads first, so any window it re-queues goes out in this same upload.
+    verify_uploads(project_manager, secrets_dict, session_rjn)
+    aggregator.aggregate_and_send(session_rjn,
+                                  data_file = get_aggregate_store(project_manager, "live_data"),
+                                  checkpoint_file = os.path.join(project_manager.get_aggregate_dir(), "sent_data.csv"),
                                   rjn_base_url=rjn_api.config['url'],
-                                  headers_rjn=headers_rjn)
+                                  headers_rjn=headers_rjn,
+                                  since_ts=time.time() - UPLOAD_LOOKBACK_S,
+                                  limits=limits,
+                                  flags_file=os.path.join(project_manager.get_aggregate_dir(), "screening_flags.csv"),
+                                  scheduler=UploadScheduler(time_budget_s=UPLOAD_BACKLOG_BUDGET_S))
+    update_status("ok", "hourly cycle: aggregate sent")
     
+@metrics.timed("verify_uploads")
+def verify_uploads(project_manager, secrets_dict, session_rjn):
+    """Read back a sample of uploaded windows from RJN; mismatched windows are re-queued for the next upload."""
+    summary = get_upload_verifier(project_manager).run(session_rjn,
+                                                      base_url = secrets_dict["contractor_apis"]["RJN"]["url"],
+                                                      data_file = get_aggregate_store(project_manager, "live_data"),
+                                                      checkpoint_file = os.path.join(project_manager.get_aggregate_dir(), "sent_data.csv"),
+                                                      since_ts=time.time() - UPLOAD_LOOKBACK_S)
+    state = "warning" if summary["mismatched"] or summary["errors"] else "ok"
+    update_status(state, f"verify cycle: {summary['matched']} of {summary['windows']} windows matched, "
+                         f"{summary['mismatched']} re-queued ({summary['requeued_rows']} samples), {summary['errors']} errors")
+    return summary
+
+def run_verify_cycle():
+    # Manual run of the check that run_hourly_cycle does before each upload.
+    project_manager = ProjectManager('eds_to_rjn')
+    secrets_dict = SecretsYaml.load_config(secrets_file_path = project_manager.get_configs_secrets_file_path())
+    if probe.is_known_down(secrets_dict["contractor_apis"]["RJN"]["url"]):
+        update_status("warning", "verify cycle: skipped, RJN is down according to the probes")
+        return
+    verify_uploads(project_manager, secrets_dict, SESSION_POOL.get_rjn_session(secrets_dict["contractor_apis"]["RJN"]))
+
+@metrics.timed("trend_sync_cycle")
+def run_trend_sync_cycle():
+    """
+    Incremental backfill: fetch only each point's missing tail of 5-minute trend data since its own watermark,
+    and append it, sanitized for aggregated storage, to the aggregate/live_data/ partitions, so the hourly upload
+    sends it to RJN. The live_data dedup index keeps out buckets the live cycle has already stored, and vice versa.
+    """
+    from src.pipeline.trendsync import WatermarkStore, sync_trends
+    print("Running trend sync cycle...")
+    project_name = 'eds_to_rjn' # project_name = ProjectManager.identify_default_project()
+    project_manager = ProjectManager(project_name)
+    secrets_dict = SecretsYaml.load_config(secrets_file_path = project_manager.get_configs_secrets_file_path())
+    queries_manager = QueriesManager(project_manager)
+    queries_defaultdictlist = group_queries_by_api_url(load_query_rows_from_csv_files(queries_manager.get_default_query_file_paths_list()))
+    store = WatermarkStore(project_manager.get_watermarks_file_path())
+    live_store = get_aggregate_store(project_manager, "live_data")
+
+    key = "Maxson"
+    if probe.is_known_down(secrets_dict["eds_apis"][key]["url"]):
+        update_status("warning", f"trend sync: skipped, EDS {key} is down according to the probes")
+        return
+    rows_by_iess = {row["iess"]: row for row in queries_defaultdictlist.get(key, [])}
+    dedup_index = get_dedup_index(project_manager, "live_data")
+    def persist(api_id, samples_by_point):
+        data = [{**rows_by_iess[iess], "ts": ts, "value": value}
+                for iess, samples in samples_by_point.items() for ts, value, *_ in samples]
+        data = dedup_index.filter_new(data, mark=False)
+        if data:
+            storage.store_live_values_partitioned(sanitizer.sanitize_data_for_aggregated_storage(data), live_store)
+            dedup_index.mark(data)
+
+    session = SESSION_POOL.get_eds_session(secrets_dict["eds_apis"][key])
+    summary = sync_trends(session, key, list(rows_by_iess.values()), store, persist, time_budget_s=TREND_SYNC_BUDGET_S)
+    update_status("ok", f"trend sync: {summary['samples']} samples for {summary['points_synced']} points in {summary['requests']} requests"
+                        f", {summary['requests_deferred']} left for the next run")
+
+@metrics.timed("probe_cycle")
+def run_probe_cycle():
+    # TCP/TLS/HTTP checks of every API URL at once; the other cycles read the result through probe.is_known_down().
+    project_manager = ProjectManager('eds_to_rjn')
+    secrets_dict = SecretsYaml.load_config(secrets_file_path = project_manager.get_configs_secrets_file_path())
+    summary = probe.get_probe_monitor().run(find_urls(secrets_dict))
+    down = [url for url, stats in summary.items() if stats["state"] == "down"]
+    if down:
+        update_status("warning", f"probes: down: {', '.join(down)}")
+
 def run_hourly_cycle_manual(): 
     print("Running RJN upload, with manual file slection ...")
     project_name = 'eds_to_rjn' # project_name = ProjectManager.identify_default_project()
@@ -61,13 +246,27 @@ def run_hourly_cycle_manual():
     print("secrets_dict, created.")
     rjn_api, headers_rjn = get_rjn_tokens_and_headers(secrets_dict)
     print("rjn_api & headers_rjn, created.")
+    session_rjn = rjn.login_to_session(api_url = secrets_dict["contractor_apis"]["RJN"]["url"] ,client_id = secrets_dict["contractor_apis"]["RJN"]["client_id"], password = secrets_dict["contractor_apis"]["RJN"]["password"])
+    session_rjn.custom_dict = secrets_dict["contractor_apis"]["RJN"]
     data_file_manual = str(input("CSV filepath (like \live_data.csv), paste: "))
-    aggregator.aggregate_and_send(data_file = data_file_manual,
-                                  #checkpoint_file = project_manager.get_aggregate_dir()+"\sent_data.csv",
+    aggregator.aggregate_and_send(session_rjn,
+                                  data_file = data_file_manual,
+                                  #checkpoint_file = os.path.join(project_manager.get_aggregate_dir(), "sent_data.csv"),
                                   checkpoint_file = "",
                                   rjn_base_url=rjn_api.config['url'],
                                   headers_rjn=headers_rjn)
     
+def run_instrumented(cycle_name, cycle_fn):
+    # Count each scheduled cycle and publish this process's metrics for the status API's /metrics endpoint.
+    outcome = "error"
+    try:
+        cycle_fn()
+        outcome = "ok"
+    finally:
+        metrics.inc("pipeline_cycles_total", cycle=cycle_name, outcome=outcome)
+        metrics.set_gauge("pipeline_last_cycle_timestamp_seconds", time.time(), cycle=cycle_name)
+        metrics.write_textfile()
+
 def defunct_setup_schedules():
 
     print("projects\eds_to_rjn\scripts\daemon_runner.py")
@@ -81,8 +280,12 @@ def defunct_setup_schedules():
     schedule.every(5).minutes.do(run_live_cycle)
     schedule.every().hour.at(":00").do(run_hourly_cycle)
 
-def setup_schedules():
-    print("projects\eds_to_rjn\scripts\daemon_runner.py")
+def setup_schedules(scheduler=schedule):
+    """
+    Register this project's cycles. scheduler is the schedule module itself when run standalone,
+    or the shared scheduler handed out by src.pipeline.daemon.host.ProjectHost.
+    """
+    print("projects\\eds_to_rjn\\scripts\\daemon_runner.py")
     now = datetime.datetime.now()
 
     # Calculate how many minutes to the next 5-minute mark (05, 10, 15, etc.)
@@ -93,23 +296,55 @@ def setup_schedules():
     first_run_time_str = first_run_time.strftime("%H:%M")
     
     # Schedule tasks to run every 5 minutes at the "hh:05, hh:10, hh:15, etc."
-    schedule.every().day.at(first_run_time_str).do(run_live_cycle)  # First run time
-    schedule.every(5).minutes.do(run_live_cycle)  # After first run, every 5 minutes
+    scheduler.every().day.at(first_run_time_str).do(run_instrumented, "live", run_live_cycle)  # First run time
+    scheduler.every(5).minutes.do(run_instrumented, "live", run_live_cycle)  # After first run, every 5 minutes
     
+    # Upload the aggregate to RJN at the top of every hour: a read-back spot check of earlier uploads, then
+    # newest values first, then a slice of any backlog.
+    scheduler.every().hour.at(":00").do(run_instrumented, "hourly", run_hourly_cycle)
+
+    # Fill gaps in the 5-minute trend data from each point's watermark, half-way between uploads. Usually only the
+    # last hour's tail per point; after an EDS outage the gap is fetched a few windows per run, within TREND_SYNC_BUDGET_S.
+    scheduler.every().hour.at(":30").do(run_instrumented, "sync", run_trend_sync_cycle)
+
+    # Probe the servers every minute, so a cycle can skip a server that is down instead of waiting out its timeouts.
+    scheduler.every(1).minutes.do(run_instrumented, "probe", run_probe_cycle)
+
     # Log the next scheduled task
     print(f"Next live cycle scheduled at: {first_run_time_str}")
 
+def run_profile(args):
+    """
+    profile [live|hourly|sync] [cycles] [deterministic|sampling]
+    Runs the cycles back to back and writes the profiles into exports/profiles/<cycle>_<timestamp>/.
+    """
+    from src.pipeline.profiler import profile_cycles, PROFILE_MODES
+    cycle_name = args[0] if len(args) > 0 else "live"
+    cycles = int(args[1]) if len(args) > 1 else 3
+    mode = args[2] if len(args) > 2 else "deterministic"
+    cycle_fns = {"live": run_live_cycle, "hourly": run_hourly_cycle, "sync": run_trend_sync_cycle}
+    if cycle_name not in cycle_fns or mode not in PROFILE_MODES:
+        print(f"Usage: profile [{'|'.join(cycle_fns)}] [cycles] [{'|'.join(PROFILE_MODES)}]")
+        return
+
+    project_manager = ProjectManager('eds_to_rjn')
+    out_dir = project_manager.get_exports_file_path(
+        os.path.join("profiles", f"{cycle_name}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"))
+    profile_cycles(cycle_fns[cycle_name], cycles=cycles, mode=mode, out_dir=out_dir)
+
 def main():
     print(f"Starting daemon_runner at {datetime.datetime.now()}...")
     #logging.info("Daemon started and running...")
     setup_schedules()
+    update_status("running", "daemon_runner started")
     while True:
         schedule.run_pending()
         time.sleep(1)
 
-if __name__ == "__main__":
+def cli(argv=None):
     import sys
-    cmd = sys.argv[1] if len(sys.argv) > 1 else "default"
+    argv = sys.argv[1:] if argv is None else argv
+    cmd = argv[0] if len(argv) > 0 else "default"
 
     if cmd == "main":
         main()
@@ -117,8 +352,23 @@ if __name__ == "__main__":
         run_live_cycle()
     elif cmd == "hourly":
         run_hourly_cycle()
+    elif cmd == "sync":
+        run_trend_sync_cycle()
+    elif cmd == "probe":
+        run_probe_cycle()
+    elif cmd == "verify":
+        run_verify_cycle()
+    elif cmd == "profile":
+        run_profile(argv[1:])
     else:
         print("Usage options: \n"
         "poetry run python -m projects.eds_to_rjn.scripts.daemon_runner main \n"
         "poetry run python -m projects.eds_to_rjn.scripts.daemon_runner live \n"
-        "poetry run python -m projects.eds_to_rjn.scripts.daemon_runner hourly")
+        "poetry run python -m projects.eds_to_rjn.scripts.daemon_runner hourly \n"
+        "poetry run python -m projects.eds_to_rjn.scripts.daemon_runner sync \n"
+        "poetry run python -m projects.eds_to_rjn.scripts.daemon_runner probe \n"
+        "poetry run python -m projects.eds_to_rjn.scripts.daemon_runner verify \n"
+        "poetry run python -m projects.eds_to_rjn.scripts.daemon_runner profile [live|hourly|sync] [cycles] [deterministic|sampling]")
+
+if __name__ == "__main__":
+    cli()
@@ -5,8 +5,8 @@ import sys
 from pathlib import Path
 from requests import Session # if you aren'ty using this, you should be
 
-from pipeline.api import eds
-from pipeline.api import rjn
+from src.pipeline.api import eds
+from src.pipeline.api import rjn
 
 # Add the root project path so that 'src' can be found
 ROOT = Path(__file__).resolve().parents[2]  # pipeline/projects/eds_to_rjn/scripts -> pipeline
@@ -28,11 +28,7 @@ from src.pipeline.queriesmanager import load_query_rows_from_csv_files, group_qu
 
 import logging
 
-logging.basicConfig(level=logging.DEBUG)  # or INFO, WARNING, ERROR
-
 logger = logging.getLogger()
-logger.setLevel(logging.DEBUG)
-logger.setLevel(logging.INFO)  
 
 def main():
     sketch_daemon_runner_main()
@@ -70,26 +66,25 @@ def sketch_maxson():
     queries_defaultdict = queries_defaultdictlist.get(key,[])
     # data_updated should probably be  nested dictionaries rather than flattened rows, with keys for discerning source (localquery vs EDS vs RJN)
     data_updated = collector.collect_live_values(session, queries_defaultdict) # This returns everything known plus everything recieved. It is glorious. It is complete. It is not sanitized.
+    from .daemon_runner import get_change_detector
+    change_detector = get_change_detector(project_manager, consumer="rjn_post") # not the live cycle's storage detector
+    data_updated = change_detector.filter_changed(data_updated) # points whose ts and value have not moved are not posted again
     data_sanitized_for_printing = sanitizer.sanitize_data_for_printing(data_updated)
     data_sanitized_for_aggregated_storage = sanitizer.sanitize_data_for_aggregated_storage(data_updated)
 
-    for row in data_sanitized_for_aggregated_storage:
+    posted = []
+    for raw_row, row in zip(data_updated, data_sanitized_for_aggregated_storage):
         EdsClient.print_point_info_row(row)
 
         #print(f"queries_defaultdict = {queries_defaultdict}")
         #print(f"data_updated = {data_updated}")
 
-        # Process timestamp
-        
-        #for row in data_updated:
-        dt = datetime.fromtimestamp(row["ts"])
-        rounded_dt = round_time_to_nearest_five_minutes(dt)
-        timestamp = rounded_dt
-        timestamp_str = timestamp.strftime('%Y-%m-%d %H:%M:%S')
+        # Process timestamp: already bucketed in the site's zone by the sanitizer; RJN takes it with a space
+        timestamp_str = row["timestamp"].replace("T", " ")
     
         # Send data to RJN
         
-        send_data_to_rjn2(
+        sent = send_data_to_rjn2(
             session_rjn,
             base_url = session_rjn.custom_dict["url"],
             project_id=row["rjn_siteid"],
@@ -97,6 +92,9 @@ def sketch_maxson():
             timestamps=[timestamp_str],
             values=[round(row["value"], 2)]
         )
+        if timestamp_str in sent:
+            posted.append(raw_row)
+    change_detector.commit(posted) # a failed post is not recorded, so it is tried again next time
 
 
 def get_rjn_tokens_and_headers(secrets_dict):
@@ -109,6 +107,7 @@ def get_rjn_tokens_and_headers(secrets_dict):
 
 if __name__ == "__main__":
     import sys
+    logging.basicConfig(level=logging.INFO)  # or DEBUG, WARNING, ERROR
     cmd = sys.argv[1] if len(sys.argv) > 1 else "default"
 
     if cmd == "sketch":
@@ -2,4 +2,4 @@
 cd C:\Users\george.bennett\OneDrive - City of Memphis\Documents\dev\pipeline
 poetry --version
 timeout /t 5
-poetry run python -m tasks.watchdog_trigger
\ No newline at end of file
+poetry run pipeline watchdog
\ No newline at end of file
@@ -1,12 +1,19 @@
 from textual.app import App, ComposeResult
 from textual.containers import Vertical
-from textual.widgets import DataTable
-import asyncio
+from textual.widgets import DataTable, Footer
+from collections import OrderedDict
 import datetime
-import random
+
+from src.pipeline.daemon.feed import LIVE_FEED_RING_PATH, LiveFeedSubscriber
 
 class LiveFeedApp(App):
-    """A Textual app for streaming live feed in a columnar table."""
+    """
+    A Textual app for watching the daemon's live values in a columnar table.
+
+    Values come from the daemon's latest-value feed (src/pipeline/daemon/feed.py). Each point has one row,
+    keyed by iess; on every poll only the cells of points whose value or timestamp changed are updated in place.
+    At most max_rows rows are shown; when a new point arrives beyond that, the least recently updated row goes.
+    """
 
     CSS = """
     Vertical {
@@ -17,64 +24,57 @@ class LiveFeedApp(App):
     }
     """
 
+    COLUMNS = (("Name", "shortdesc"), ("Value", "value"), ("Units", "un"), ("IESS", "iess"), ("SID", "sid"), ("Datetime", "ts"))
+
+    def __init__(self, feed_path: str = LIVE_FEED_RING_PATH, max_rows: int = 500, poll_interval: float = 1.0):
+        super().__init__()
+        self.subscriber = LiveFeedSubscriber(feed_path, max_points=max_rows)
+        self.max_rows = max_rows
+        self.poll_interval = poll_interval
+        self.shown = OrderedDict()  # iess -> tuple of displayed cell values, least recently updated first
+
     def compose(self) -> ComposeResult:
         """Create the layout."""
         with Vertical():
             self.table = DataTable()
-            self.table.add_columns("Name", "Avg", "IDCS", "SID", "Datetime")
+            for label, key in self.COLUMNS:
+                self.table.add_column(label, key=key)
             yield self.table
+        yield Footer()
 
     async def on_mount(self) -> None:
-        """Populate the table with initial data and set up live updates."""
-        # Initial data
-        self.data = [
-            {"Name": "EFF", "Avg": "51.45", "IDCS": "FI8001", "SID": "8528", "Datetime": "2025-04-16 01:12:54"},
-            {"Name": "INFLU", "Avg": "44.48", "IDCS": "M100FI", "SID": "2308", "Datetime": "2025-04-16 01:12:54"}
-        ]
+        """Start polling the feed."""
+        self.sub_title = "waiting for the daemon's live feed..."
+        self.update_live_feed()
+        self.set_interval(self.poll_interval, self.update_live_feed)
 
-        # Populate the table
-        for item in self.data:
-            self.table.add_row(item["Name"], item["Avg"], item["IDCS"], item["SID"], item["Datetime"])
+    @staticmethod
+    def format_cells(record) -> tuple:
+        ts = record.get("ts")
+        when = datetime.datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S") if isinstance(ts, (int, float)) else str(ts)
+        value = record.get("value")
+        value = f"{value:.2f}" if isinstance(value, (int, float)) else str(value)
+        return (str(record.get("shortdesc") or ""), value, str(record.get("un") or ""),
+                str(record.get("iess")), str(record.get("sid") or ""), when)
 
-        # Start live updates
-        self.set_interval(1.0, self.update_live_feed)
-
-
-    async def update_live_feed(self) -> None:
-        """Simulate live data updates."""
-        # Simulating a new data feed
-        new_data = {
-            "Name": "NEW",
-            "Avg": f"{round(40 + 10 * (await self.random_float()), 2)}",
-            "IDCS": f"ID{await self.random_int()}",
-            "SID": f"{await self.random_int()}",
-            "Datetime": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        }
-
-        # Add new row
-        self.table.add_row(
-            new_data["Name"],
-            new_data["Avg"],
-            new_data["IDCS"],
-            new_data["SID"],
-            new_data["Datetime"],
-        )
-    async def generate_multiple_random_floats():
-        # Generate multiple random floats asynchronously
-        results = await asyncio.gather(self.random_float(), self.random_float(), self.random_float())
-        return results
-    
-    async def random_float(self):
-        return random.random()  # Returns a random float between 0.0 and 1.0
-
-    async def random_int(self, min_val=1000, max_val=9999):
-        # Simulate an async delay (if needed)
-        await asyncio.sleep(0.1)  # Mimics async behavior, can be omitted if not required
-        return random.randint(min_val, max_val)  # Returns a random integer between min_val and max_val
-    
-    def run(self):
-        print("what can go here?")
-        super().run()
+    def update_live_feed(self) -> None:
+        """Apply the points that changed since the last poll."""
+        changed = self.subscriber.poll()
+        for iess, record in changed.items():
+            cells = self.format_cells(record)
+            previous = self.shown.pop(iess, None)
+            if previous is None:
+                if len(self.shown) >= self.max_rows:
+                    evicted, _ = self.shown.popitem(last=False)
+                    self.table.remove_row(evicted)
+                self.table.add_row(*cells, key=iess)
+            else:
+                for (_, column_key), old, new in zip(self.COLUMNS, previous, cells):
+                    if old != new:
+                        self.table.update_cell(iess, column_key, new)
+            self.shown[iess] = cells
+        if changed:
+            self.sub_title = f"{len(self.shown)} points, last update {datetime.datetime.now().strftime('%H:%M:%S')}"
 
     def run_logging(self):
         import logging
@@ -91,4 +91,4 @@ class LiveFeedApp(App):
 
 if __name__ == "__main__":
     app = LiveFeedApp()
-    app.run_logging()
\ No newline at end of file
+    app.run_logging()
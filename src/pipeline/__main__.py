@@ -1,5 +1,7 @@
-# src/__main__.py
+# src/pipeline/__main__.py
+# poetry run python -m src.pipeline <command> [args]
+import sys
 
-import services
+from src.pipeline.cli import main
 
-services.run_tomorrow()
\ No newline at end of file
+sys.exit(main())
@@ -7,14 +7,13 @@ import requests
 import sys
 import time
 
-from src.pipeline.calls import make_request, call_ping
+from src.pipeline.calls import make_request
 from src.pipeline.env import find_urls
 from src.pipeline import helpers
+from src.pipeline import metrics
+from src.pipeline import transport
+from src.pipeline import probe
 from src.pipeline.queriesmanager import load_query_rows_from_csv_files, group_queries_by_api_url
-from pprint import pprint
-
-# Configure logging (adjust level as needed)
-logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
 class EdsClient:
     def __init__(self,config):
@@ -22,7 +21,8 @@ class EdsClient:
     
     @staticmethod
     def get_license(session,api_url:str):
-        response = session.get(api_url + 'license', json={}, verify=False).json()
+        from pprint import pprint
+        response = session.get(api_url + 'license', json={}).json()
         pprint(response)
         return response
 
@@ -44,7 +44,9 @@ class EdsClient:
             }],
             'order' : ['iess']
             }
-        response = session.post(api_url + 'points/query', json=query, verify=False).json()
+        with metrics.timed("eds_points_query"):
+            response = session.post(api_url + 'points/query', json=query).json()
+        metrics.inc("pipeline_eds_requests_total", endpoint="points/query")
         #print(f"response = {response}")
         
         if response is None:
@@ -64,7 +66,9 @@ class EdsClient:
         results = [[] for _ in range(len(point_list))]
         while True:
             api_url = session.custom_dict['url']
-            response = session.get(f'{api_url}trend/tabular?id={req_id}', verify=False).json()
+            with metrics.timed("eds_trend_tabular_fetch"):
+                response = session.get(f'{api_url}trend/tabular?id={req_id}').json()
+            metrics.inc("pipeline_eds_requests_total", endpoint="trend/tabular")
             for chunk in response:
                 if chunk['status'] == 'TIMEOUT':
                     raise RuntimeError('timeout')
@@ -82,7 +86,9 @@ class EdsClient:
         order = 'iess'
         query = '?zd={}&iess={}&order={}'.format(zd, iess_filter, order)
         request_url = api_url + 'points/export' + query
-        response = session.get(request_url, json={}, verify=False)
+        with metrics.timed("eds_points_export"):
+            response = session.get(request_url, json={}, timeout=(transport.DEFAULT_TIMEOUT[0], 300)) # a full export is large
+        metrics.inc("pipeline_eds_requests_total", endpoint="points/export")
         #print(f"Status Code: {response.status_code}, Content-Type: {response.headers.get('Content-Type')}, Body: {response.text[:500]}")
         decoded_str = response.text
         return decoded_str
@@ -107,11 +113,14 @@ def fetch_eds_data_row(session, iess):
     point_data = EdsClient.get_points_live_mod(session, iess)
     return point_data
 
-def login_to_session(api_url, username, password):
-    session = requests.Session()
+def login_to_session(api_url, username, password, config=None):
+    # config: the secrets.yaml eds_apis block, for its optional transport keys (verify_ssl, timeout, pool_maxsize)
+    session = transport.make_session(config, service="eds")
 
     data = {'username': username, 'password': password, 'type': 'script'}
-    response = session.post(api_url + 'login', json=data, verify=False).json()
+    with metrics.timed("eds_login"):
+        response = session.post(api_url + 'login', json=data).json()
+    metrics.inc("pipeline_eds_requests_total", endpoint="login")
     #print(f"response = {response}")
     session.headers['Authorization'] = 'Bearer ' + response['sessionId']
     return session
@@ -130,7 +139,9 @@ def create_tabular_request(session, api_url, starttime, endtime, points):
             'function': 'AVG'
         } for p in points],
     }
-    response = session.post(api_url + 'trend/tabular', json=data, verify=False).json()
+    with metrics.timed("eds_trend_tabular_create"):
+        response = session.post(api_url + 'trend/tabular', json=data).json()
+    metrics.inc("pipeline_eds_requests_total", endpoint="trend/tabular")
     #print(f"response = {response}")
     return response['id']
 
@@ -138,7 +149,8 @@ def wait_for_request_execution_session(session, api_url, req_id):
     st = time.time()
     while True:
         time.sleep(1)
-        res = session.get(f'{api_url}requests?id={req_id}', verify=False).json()
+        res = session.get(f'{api_url}requests?id={req_id}').json()
+        metrics.inc("pipeline_eds_requests_total", endpoint="requests")
         status = res[str(req_id)]
         if status['status'] == 'FAILURE':
             raise RuntimeError('request [{}] failed: {}'.format(req_id, status['message']))
@@ -147,6 +159,7 @@ def wait_for_request_execution_session(session, api_url, req_id):
         elif status['status'] == 'EXECUTING':
             print('request [{}] progress: {:.2f}\n'.format(req_id, time.time() - st))
 
+    metrics.observe(metrics.STAGE_HISTOGRAM, time.time() - st, stage="eds_trend_tabular_wait")
     print('request [{}] executed in: {:.3f} s\n'.format(req_id, time.time() - st))
 
 def demo_get_trabular_trend():
@@ -185,7 +198,7 @@ def demo_get_trabular_trend():
         request_id = create_tabular_request(session, session.custom_dict["url"], starttime, endtime, points=point_list)
         wait_for_request_execution_session(session, session.custom_dict["url"], request_id)
         results = EdsClient.get_tabular_mod(session, request_id, point_list)
-        session.post(session.custom_dict["url"] + 'logout', verify=False)
+        session.post(session.custom_dict["url"] + 'logout')
         #queries_manager.update_success(api_id=key) # not appropriate here in demo without successful transmission to 3rd party API
 
         for idx, iess in enumerate(point_list):
@@ -244,13 +257,14 @@ def ping():
     project_manager = ProjectManager(project_name)
     secrets_dict = SecretsYaml.load_config(secrets_file_path = project_manager.get_configs_secrets_file_path())
     url_set = find_urls(secrets_dict)
-    for url in url_set:
-        if "43084" in url or "43080" in url: # Expected REST or SOAP API ports for the EDS 
-            print(f"ping url: {url}")
-            call_ping(url)
+    urls = [url for url in url_set if "43084" in url or "43080" in url] # Expected REST or SOAP API ports for the EDS
+    # TCP, TLS and HTTP checks of every URL at once (src/pipeline/probe.py)
+    probe.print_probe_results(probe.probe_urls(urls))
 
 if __name__ == "__main__":
     import sys
+    # Configure logging (adjust level as needed). Done here rather than at import, so importers keep their own config.
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
     cmd = sys.argv[1] if len(sys.argv) > 1 else "default"
 
     if cmd == "demo-points-export":
@@ -1,6 +1,15 @@
+import time
+
 import requests
-from src.pipeline.calls import make_request, call_ping
+from src.pipeline.calls import make_request
 from src.pipeline.env import find_urls
+from src.pipeline import metrics
+from src.pipeline import transport
+from src.pipeline import probe
+from src.pipeline import rjnpayload
+
+PAYLOAD_RETRIES = 2
+RETRY_STATUSES = (429, 502, 503, 504)
 
 class RjnClient:
     def __init__(self,config):
@@ -40,11 +49,14 @@ class RjnClient:
             print(f"Failed to post point {payload.get('rjn_name')}: {response.status_code}")
 
 
-def login_to_session(api_url, client_id, password):
-    session = requests.Session()
+def login_to_session(api_url, client_id, password, config=None):
+    # config: the secrets.yaml contractor_apis block, for its optional transport keys (compress_requests_over, ...)
+    session = transport.make_session(config, service="rjn")
 
     data = {'client_id': client_id, 'password': password, 'type': 'script'}
-    response = session.post(api_url + 'auth', json=data, verify=True).json()
+    with metrics.timed("rjn_login"):
+        response = session.post(api_url + 'auth', json=data).json()
+    metrics.inc("pipeline_rjn_requests_total", endpoint="auth")
     #print(f"response = {response}")
     session.headers['Authorization'] = 'Bearer ' + response['token']
     return session
@@ -76,13 +88,16 @@ def send_data_to_rjn(base_url:str, project_id:str, entity_id:int, headers:dict,
 
     response = None
     try:
-        response = make_request(url=url, headers=headers, params = params, method="POST", data=body)
+        with metrics.timed("rjn_post"):
+            response = make_request(url=url, headers=headers, params = params, method="POST", data=body)
+        metrics.inc("pipeline_rjn_requests_total", endpoint="data")
         if response is None:
             print("Response = None, job cancelled")
         else:
             response.raise_for_status()
             #print(f"Sent {timestamps} -> {values} to entity {entity_id} (HTTP {response.status_code})")
             print(f"Sent timestamps and values to entity {entity_id} (HTTP {response.status_code})")
+            metrics.inc("pipeline_rows_sent_total", len(timestamps))
     except ConnectionError as e:
         print("Skipping RjnClient.send_data_to_rjn() due to connection error")
         print(e)
@@ -91,7 +106,31 @@ def send_data_to_rjn(base_url:str, project_id:str, entity_id:int, headers:dict,
         if response is not None:# and response.status_code != 500:
             print(f"Response content: {response.text}")  # Print error response
         
+def _post_payload(session, url, params, payload, retries: int = PAYLOAD_RETRIES):
+    """POST one pre-encoded chunk. Retries re-send the same bytes; nothing is re-encoded or re-compressed."""
+    delay = 1.0
+    for attempt in range(retries + 1):
+        try:
+            with metrics.timed("rjn_post"):
+                response = session.post(url=url, data=payload.body, headers=payload.headers, params=params)
+            metrics.inc("pipeline_rjn_requests_total", endpoint="data")
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                return response
+            print(f"RJN returned HTTP {response.status_code}, retrying in {delay:.0f} s")
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt == retries:
+                raise
+            print(f"RJN post failed ({e}), retrying in {delay:.0f} s")
+        metrics.inc("pipeline_rjn_payload_retries_total")
+        time.sleep(delay)
+        delay *= 2
+
 def send_data_to_rjn2(session, base_url:str, project_id:str, entity_id:int, timestamps, values):
+    """
+    Post timestamps/values to one RJN entity, in chunks of at most max_payload_samples samples and
+    max_payload_bytes bytes of JSON (optional keys of the RJN block in secrets.yaml; see src/pipeline/rjnpayload.py).
+    Returns the timestamps RJN accepted, so callers checkpoint only what was actually sent.
+    """
     if timestamps is None:
         raise ValueError("timestamps cannot be None")
     if values is None:
@@ -111,30 +150,54 @@ def send_data_to_rjn2(session, base_url:str, project_id:str, entity_id:int, time
         "import_mode": "OverwriteExistingData",
         "incoming_time": "DST"
     }
-    body = {
-    "comments": "Imported from EDS.",
-    "data": dict(zip(timestamps, values))  # Works for single or multiple entries
-    }
-
-    response = None
-    try:
-        #response = make_request(url=url, headers=headers, params = params, method="POST", data=body)
-        response = session.post(url=url, json= body, params = params)
-        print(f"response.json() = {response.json()}")
-        
-        if response is None:
-            print("Response = None, job cancelled")
-        else:
+    options = getattr(session, "custom_dict", None) or {}
+    payloads = rjnpayload.iter_payloads(
+        timestamps, values,
+        max_samples=int(options.get("max_payload_samples", rjnpayload.DEFAULT_MAX_SAMPLES)),
+        max_bytes=int(options.get("max_payload_bytes", rjnpayload.DEFAULT_MAX_BYTES)),
+        compress_min_bytes=getattr(session, "compress_min_bytes", None), # gzip only where the RJN block asks for it
+    )
+
+    sent = []
+    for payload in payloads:
+        metrics.inc("pipeline_rjn_payloads_total")
+        metrics.inc("pipeline_rjn_payload_bytes_total", len(payload.body))
+        response = None
+        try:
+            response = _post_payload(session, url, params, payload)
             response.raise_for_status()
-            #print(f"Sent {timestamps} -> {values} to entity {entity_id} (HTTP {response.status_code})")
-            print(f"Sent timestamps and values to entity {entity_id} (HTTP {response.status_code})")
-    except ConnectionError as e:
-        print("Skipping RjnClient.send_data_to_rjn() due to connection error")
-        print(e)
-    except requests.exceptions.RequestException as e:
-        print(f"Error sending data to RJN: {e}")
-        if response is not None:# and response.status_code != 500:
-            print(f"Response content: {response.text}")  # Print error response
+            print(f"Sent {payload.n_samples} timestamps and values to entity {entity_id} "
+                  f"({len(payload.body)} bytes, HTTP {response.status_code})")
+            metrics.inc("pipeline_rows_sent_total", payload.n_samples)
+            sent.extend(payload.timestamps)
+        except ConnectionError as e:
+            print("Skipping RjnClient.send_data_to_rjn() due to connection error")
+            print(e)
+            break
+        except requests.exceptions.RequestException as e:
+            print(f"Error sending data to RJN: {e}")
+            if response is not None:# and response.status_code != 500:
+                print(f"Response content: {response.text}")  # Print error response
+            break # later chunks would fail the same way; they stay unsent and are retried next cycle
+    return sent
+
+def fetch_rjn_data(session, base_url:str, project_id:str, entity_id:int, start:str, end:str) -> dict:
+    """
+    Read back an entity's stored samples between two local timestamp strings (inclusive), for src/pipeline/verify.py.
+    Same endpoint and time convention as send_data_to_rjn2; the response mirrors the upload body: {"data": {timestamp: value}}.
+    """
+    url = f"{base_url}/projects/{project_id}/entities/{entity_id}/data"
+    params = {
+        "interval": 300,
+        "incoming_time": "DST",
+        "start": start,
+        "end": end
+    }
+    with metrics.timed("rjn_read_back"):
+        response = session.get(url=url, params=params)
+    metrics.inc("pipeline_rjn_requests_total", endpoint="data_read")
+    response.raise_for_status()
+    return (response.json() or {}).get("data") or {}
 
 def ping():
     from src.pipeline.env import SecretsYaml
@@ -147,10 +210,9 @@ def ping():
     sessions = {}
 
     url_set = find_urls(secrets_dict)
-    for url in url_set:
-        if "rjn" in url.lower():
-            print(f"ping url: {url}")
-            call_ping(url)
+    urls = [url for url in url_set if "rjn" in url.lower()]
+    # TCP, TLS and HTTP checks of every URL at once (src/pipeline/probe.py)
+    probe.print_probe_results(probe.probe_urls(urls))
 
 if __name__ == "__main__":
     import sys
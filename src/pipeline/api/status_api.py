@@ -1,9 +1,31 @@
 # src/api/status_api.py
-from fastapi import FastAPI
-from src.pipeline.daemon.status import get_latest_status
+from fastapi import FastAPI, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from src.pipeline.daemon.status import get_latest_status, get_status_history, stream_status, STATUS_RING_CAPACITY
+from src.pipeline import metrics
+from src.pipeline.probe import read_probe_state
 
 app = FastAPI()
 
 @app.get("/status")
 def read_status():
     return get_latest_status()
+
+@app.get("/status/history")
+def read_status_history(n: int = Query(20, ge=1, le=STATUS_RING_CAPACITY)):
+    return get_status_history(n)
+
+@app.get("/status/stream")
+def read_status_stream():
+    return StreamingResponse(stream_status(), media_type="text/event-stream")
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    # This process's own registry, then whatever the daemon last wrote after a cycle.
+    return PlainTextResponse(metrics.render_prometheus() + metrics.read_textfile(),
+                             media_type="text/plain; version=0.0.4")
+
+@app.get("/probes")
+def read_probes():
+    # Rolling TCP/TLS/HTTP probe statistics per API URL, as last written by the daemon's probe cycle.
+    return read_probe_state()
@@ -8,7 +8,7 @@ import logging
 from urllib.parse import urlparse
 from urllib3.exceptions import NewConnectionError
 
-logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
+from src.pipeline import transport
 
 def test_connection_to_internet():
     try:
@@ -31,20 +31,14 @@ def make_request(url, data=None, params = None, method="POST", headers=None, ret
 
     verify = certifi.where() if verify_ssl else False
 
-    request_func = {
-        "POST": requests.post,
-        "GET": requests.get,
-        "PUT": requests.put,
-        "DELETE": requests.delete,
-        "PATCH": requests.patch,
-    }.get(method.upper())
-
-    if not request_func:
+    if method.upper() not in ("POST", "GET", "PUT", "DELETE", "PATCH"):
         logging.error(f"Unsupported HTTP method: {method}")
         return None
         #raise ValueError(f"Unsupported HTTP method: {method}")
     try:
-        response = request_func(
+        # The shared transport session keeps connections alive between calls (src/pipeline/transport.py).
+        response = transport.get_shared_session().request(
+            method.upper(),
             url,
             json=data,
             params=params,
@@ -0,0 +1,118 @@
+# src/pipeline/changedetect.py
+'''
+Title: changedetect.py
+
+Purpose:
+Change-only publishing. Every live cycle fetches every point, but many points update slowly: EDS returns the same
+ts, or a new ts with the same value, cycle after cycle. ChangeDetector keeps each point's last published
+(ts, value) in memory, checkpointed to a small JSON file, and drops rows that carry nothing new before they are
+stored or posted to RJN:
+
+    - a point never seen before                      -> kept
+    - ts has not advanced                            -> dropped
+    - ts advanced, value within value_tolerance      -> dropped, unless heartbeat_s has passed since the point
+                                                        was last published (a heartbeat re-send)
+    - ts advanced, value changed                     -> kept
+
+    detector = ChangeDetector("exports/aggregate/change_state.json", heartbeat_s=3600)
+    data = detector.filter_changed(data)   # nothing is recorded yet
+    store(data)
+    detector.commit(data)                  # only once stored/sent, so a failed write is retried next cycle
+
+heartbeat_s=None turns heartbeats off; heartbeat_s=0 keeps every row whose ts advanced.
+'''
+import json
+import logging
+import os
+import time
+
+from src.pipeline import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEARTBEAT_S = 3600
+
+class ChangeDetector:
+    def __init__(self, path: str = None, heartbeat_s: float = DEFAULT_HEARTBEAT_S, value_tolerance: float = 0.0):
+        self.path = path
+        self.heartbeat_s = heartbeat_s
+        self.value_tolerance = value_tolerance
+        self._last = {}  # iess -> [ts, value, published_at]
+        if path:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._last = json.load(f)
+        except FileNotFoundError:
+            return
+        except ValueError as e:
+            logger.warning(f"ChangeDetector: ignoring unreadable checkpoint {self.path}: {e}")
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._last, f)
+        os.replace(tmp_path, self.path)
+
+    def _same_value(self, old, new) -> bool:
+        try:
+            return abs(float(new) - float(old)) <= self.value_tolerance
+        except (TypeError, ValueError):
+            return new == old
+
+    def classify(self, row, now: float = None) -> str:
+        """'new', 'changed', 'heartbeat' or 'unchanged'."""
+        last = self._last.get(str(row.get("iess")))
+        if last is None:
+            return "new"
+        ts, value, published_at = last
+        try:
+            advanced = float(row.get("ts")) > float(ts)
+        except (TypeError, ValueError):
+            return "changed"  # no usable ts: let it through rather than lose it
+        if not advanced:
+            return "unchanged"
+        if not self._same_value(value, row.get("value")):
+            return "changed"
+        now = time.time() if now is None else now
+        if self.heartbeat_s is not None and now - published_at >= self.heartbeat_s:
+            return "heartbeat"
+        return "unchanged"
+
+    def filter_changed(self, rows: list, now: float = None) -> list:
+        """Rows worth storing and publishing, in their original order. Nothing is recorded until commit()."""
+        kept, heartbeats = [], 0
+        for row in rows:
+            kind = self.classify(row, now)
+            if kind != "unchanged":
+                kept.append(row)
+                heartbeats += kind == "heartbeat"
+        dropped = len(rows) - len(kept)
+        if dropped:
+            metrics.inc("pipeline_unchanged_dropped_total", dropped)
+        if heartbeats:
+            metrics.inc("pipeline_heartbeats_total", heartbeats)
+        logger.info(f"ChangeDetector: kept {len(kept)} of {len(rows)} row(s) ({heartbeats} heartbeat(s)).")
+        return kept
+
+    def commit(self, rows: list, now: float = None):
+        """Record rows as published, and checkpoint."""
+        now = time.time() if now is None else now
+        for row in rows:
+            iess = row.get("iess")
+            if iess not in (None, "") and row.get("ts") not in (None, ""):
+                self._last[str(iess)] = [row["ts"], row.get("value"), now]
+        if self.path and rows:
+            self.save()
+
+    def __len__(self):
+        return len(self._last)
+
+if __name__ == "__main__":
+    from src.pipeline.helpers import function_view
+    function_view()
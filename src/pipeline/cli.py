@@ -0,0 +1,146 @@
+# src/pipeline/cli.py
+'''
+Title: cli.py
+
+Purpose:
+One entry point for the pipeline commands, with a fast cold start. Watchdog restarts, scheduled-task triggers
+and Termux runs start a fresh interpreter every time, so this module imports nothing heavy: each subcommand's
+module (and with it requests, urllib3, yaml, psutil, ...) is imported only when that subcommand runs.
+
+Usage:
+    poetry run pipeline <command> [args]
+    poetry run python -m src.pipeline <command> [args]
+
+    poetry run pipeline run live                    # the default project's daemon_runner, e.g. live | hourly | sync | main | profile
+    poetry run pipeline eds-ping
+    poetry run pipeline import-budget --budget-ms 50
+'''
+import importlib
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # pipeline/src/pipeline/cli.py -> pipeline
+
+# command -> (module, function, passes argv, help). Nothing here is imported until the command is chosen.
+COMMANDS = {
+    "run": (None, None, True, "Run the default project's daemon_runner: run main | live | hourly | sync | probe | profile ..."),
+    "env": ("src.pipeline.env", "demo_secrets", False, "Print the default project's secrets.yaml."),
+    "eds-points-export": ("src.pipeline.api.eds", "demo_eds_save_point_export", False, "Save the EDS point export to the project's exports directory."),
+    "eds-trend": ("src.pipeline.api.eds", "demo_get_trabular_trend", False, "Fetch the tabular trend for the default queries."),
+    "eds-license": ("src.pipeline.api.eds", "demo_get_license", False, "Print the EDS license."),
+    "point-search": ("src.pipeline.pointsearch", "point_search_cli", True, "Search the EDS point export and write query CSV rows or imports/*.toml: point-search [export.txt ...]"),
+    "eds-ping": ("src.pipeline.api.eds", "ping", False, "Check connectivity to the EDS servers."),
+    "probe": ("src.pipeline.probe", "demo_probe", False, "Probe every API URL in secrets.yaml at once (TCP, TLS, HTTP)."),
+    "rjn-ping": ("src.pipeline.api.rjn", "ping", False, "Check connectivity to RJN."),
+    "daemon": ("src.pipeline.daemon.controller", "main_cli", True, "Control the daemon: daemon -start | -stop | -status"),
+    "watchdog": ("src.pipeline.daemon.watchdog", "check_and_restart_if_needed", False, "Restart the daemon if it is not running."),
+    "import-budget": ("src.pipeline.cli", "check_import_budget", True, "Fail if importing this dispatcher exceeds the startup budget."),
+}
+
+# Modules that must never be imported just to start the dispatcher.
+HEAVY_MODULES = ("requests", "urllib3", "certifi", "yaml", "toml", "psutil", "fastapi", "schedule", "textual", "numpy", "pprint")
+
+def _ensure_root_on_path():
+    # The console script runs with the installed 'pipeline' package, but the code imports 'src.pipeline' and 'projects'.
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+def _run_default_project(argv):
+    from src.pipeline.projectmanager import ProjectManager
+    project_name = ProjectManager.identify_default_project()
+    module = importlib.import_module(f"projects.{project_name}.scripts.daemon_runner")
+    return module.cli(argv)
+
+def _call_with_argv(fn, prog, argv):
+    # Older entry points read sys.argv themselves.
+    saved = sys.argv
+    sys.argv = [prog] + list(argv)
+    try:
+        return fn()
+    finally:
+        sys.argv = saved
+
+def print_usage():
+    print("Usage: pipeline <command> [args]\n")
+    for name, (_, _, _, help_text) in COMMANDS.items():
+        print(f"  {name:<18} {help_text}")
+
+DEFAULT_IMPORT_BUDGET_MS = 50.0
+
+def _import_times(code: str) -> list:
+    """[(self_us, cumulative_us, module name), ...] for every import made running code in a fresh interpreter."""
+    import subprocess
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"{code} failed:\n{completed.stderr}")
+    times = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        times.append((int(self_us), int(cumulative_us), name))
+    return times
+
+def measure_import(module: str = "src.pipeline.cli"):
+    """
+    Import module in a fresh interpreter under -X importtime.
+    Returns (total self time in ms, [(cumulative_us, module name), ...], sorted heavy module names imported).
+    What the interpreter imports before running any code (site, .pth files) is measured with a bare
+    "python -c pass" and left out: it is the same for every command and not the dispatcher's doing.
+    """
+    startup = {name for _, _, name in _import_times("pass")}
+    times = [record for record in _import_times(f"import {module}") if record[2] not in startup]
+    modules = [(cumulative_us, name) for _, cumulative_us, name in times]
+    heavy = sorted({name for _, name in modules if name.split(".")[0] in HEAVY_MODULES})
+    return sum(self_us for self_us, _, _ in times) / 1000, modules, heavy
+
+def check_import_budget(argv=None):
+    """
+    import-budget [--budget-ms MS] [--module MODULE]
+    Imports the dispatcher (or MODULE) in a fresh interpreter under -X importtime and fails (exit code 1) if it
+    takes longer than the budget or if it pulls in any of HEAVY_MODULES. tests/test_import_budget.py checks the
+    modules on every run, and the time only where PIPELINE_IMPORT_BUDGET_MS is set.
+    """
+    import argparse
+    parser = argparse.ArgumentParser(prog="pipeline import-budget")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_IMPORT_BUDGET_MS)
+    parser.add_argument("--module", default="src.pipeline.cli")
+    args = parser.parse_args(argv)
+
+    try:
+        total_ms, modules, heavy = measure_import(args.module)
+    except RuntimeError as e:
+        print(e)
+        return 1
+    print(f"{args.module} import: {total_ms:.1f} ms (budget {args.budget_ms:.1f} ms), {len(modules)} modules")
+    for cumulative_us, name in sorted(modules, reverse=True)[:5]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+    if heavy:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(heavy)}")
+    if total_ms > args.budget_ms:
+        print("FAIL: over budget")
+    return 1 if heavy or total_ms > args.budget_ms else 0
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help", "help") or argv[0] not in COMMANDS:
+        print_usage()
+        return 0 if argv and argv[0] in ("-h", "--help", "help") else 2
+    _ensure_root_on_path()
+
+    command, rest = argv[0], argv[1:]
+    module_name, function_name, passes_argv, _ = COMMANDS[command]
+    import logging
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    if command == "run":
+        return _run_default_project(rest)
+
+    fn = getattr(importlib.import_module(module_name), function_name)
+    if not passes_argv:
+        return fn()
+    if function_name == "main_cli":
+        return _call_with_argv(fn, f"pipeline {command}", rest)
+    return fn(rest)
+
+if __name__ == "__main__":
+    sys.exit(main())
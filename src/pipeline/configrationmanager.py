@@ -3,20 +3,225 @@ Title: configurationmanager.py
 Author: George Clayton Bennett
 Created : 05 June 2025
 
-Purpose: Modularized file-based configuration via a Singlteon class. In this case, configuration is just credentials.
+Purpose: Modularized file-based configuration via a Singlteon class (one instance per project).
 
 Attributes:
-    - Load default config values from a TOML file
-    - No fallbacks for secret.yaml files. 
-    - Tracking history of changes to allow undo functionality if values are changed from the default during p(unexpected in this case).
+    - Loads a project's configuration files once, into one validated, immutable ConfigSnapshot:
+        secrets/secrets.yaml          (C YAML loader when PyYAML was built with libyaml)
+        projects/default-project.toml
+        queries/default-queries.toml
+        secrets/config_time.toml      (optional)
+    - Snapshot values are FrozenDict / tuple all the way down, so a snapshot can be shared by every caller
+      without copying, and nobody can change it under anyone else.
+    - Hot reload: the files' mtimes are checked at most every check_interval_s, on access, or continuously by
+      start_watching(). A changed file is re-read, validated, and the snapshot swapped in one assignment.
+      An edit that fails validation is logged and the previous snapshot is kept.
+    - No fallbacks for secret.yaml files: a project without one gets FileNotFoundError from SecretsYaml.load_config().
+
+    config = ConfigurationManager.instance("eds_to_rjn")
+    secrets_dict = config.snapshot.secrets
+    SecretsYaml.load_config(path)         # delegates here, so the daemon's per-cycle calls cost a dict lookup
 '''
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECK_INTERVAL_S = 2.0
+
+class ConfigurationError(ValueError):
+    pass
+
+class FrozenDict(dict):
+    """A dict that refuses changes. Still a dict, so isinstance checks, ** unpacking and pickling work."""
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("configuration snapshots are read-only")
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = __ior__ = _readonly
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+    def __hash__(self):
+        return hash(tuple(sorted(self.items(), key=lambda item: str(item[0]))))
+
+def freeze(value):
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+def load_yaml(path: str):
+    import yaml
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)  # libyaml is several times faster than pure Python
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            return yaml.load(f, Loader=loader)
+        except yaml.YAMLError as e:
+            raise ConfigurationError(f"{path}: {e}") from e
+
+def load_toml(path: str):
+    import tomllib
+    with open(path, "rb") as f:
+        return tomllib.load(f)
 
+def validate_secrets(secrets, path: str = "secrets.yaml"):
+    if not isinstance(secrets, dict):
+        raise ConfigurationError(f"{path}: expected a mapping at the top level, got {type(secrets).__name__}")
+    required = {"eds_apis": ("url", "username", "password"), "contractor_apis": ("url",)}
+    for section, keys in required.items():
+        apis = secrets.get(section) or {}
+        if not isinstance(apis, dict):
+            raise ConfigurationError(f"{path}: '{section}' must be a mapping of API names to settings")
+        for name, api in apis.items():
+            if not isinstance(api, dict):
+                raise ConfigurationError(f"{path}: {section}.{name} must be a mapping")
+            missing = [key for key in keys if key not in api]
+            if missing:
+                raise ConfigurationError(f"{path}: {section}.{name} is missing {', '.join(missing)}")
 
-import toml
-# import os
-# from colletion import defaultdict
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    project_name: str
+    secrets: FrozenDict             # None when secrets.yaml is absent
+    default_project: FrozenDict
+    default_queries: FrozenDict
+    config_time: FrozenDict         # empty when config_time.toml is absent
+    query_files: tuple              # default-queries.toml [default-query] files
+    mtimes: FrozenDict              # path -> st_mtime_ns (None if absent) at load time
+    loaded_at: float
 
 class ConfigurationManager:
-    
-    def __init__(self):
-        self._instance = None
\ No newline at end of file
+    _instances = {}
+    _instances_lock = threading.Lock()
+    _by_secrets_path = {}  # secrets_file_path as passed in -> manager, or None for paths outside any project
+
+    def __init__(self, project_name: str, check_interval_s: float = DEFAULT_CHECK_INTERVAL_S):
+        from src.pipeline.projectmanager import ProjectManager
+        project_manager = ProjectManager(project_name)
+        self.project_name = project_name
+        self.check_interval_s = check_interval_s
+        self.paths = {
+            "secrets": os.path.join(project_manager.get_configs_dir(), ProjectManager.SECRETS_YAML_FILE_NAME),
+            "default_project": os.path.join(project_manager.get_projects_dir(), ProjectManager.DEFAULT_PROJECT_TOML_FILE_NAME),
+            "default_queries": os.path.join(project_manager.get_queries_dir(), "default-queries.toml"),
+            "config_time": os.path.join(project_manager.get_configs_dir(), "config_time.toml"),
+        }
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._failed_mtimes = None  # mtimes of an edit that failed validation, so it is reported once
+        self._next_check = 0.0
+        self._snapshot = self._load()  # a broken configuration at start-up is an error, not a warning
+        self._next_check = time.monotonic() + self.check_interval_s
+
+    @classmethod
+    def instance(cls, project_name: str = None):
+        if project_name is None:
+            from src.pipeline.projectmanager import ProjectManager
+            project_name = ProjectManager.identify_default_project()
+        with cls._instances_lock:
+            if project_name not in cls._instances:
+                cls._instances[project_name] = cls(project_name)
+            return cls._instances[project_name]
+
+    @classmethod
+    def for_secrets_path(cls, secrets_file_path: str):
+        """The manager whose project owns this secrets.yaml (projects/<name>/secrets/secrets.yaml), or None."""
+        if secrets_file_path in cls._by_secrets_path:
+            return cls._by_secrets_path[secrets_file_path]
+        from src.pipeline.projectmanager import ProjectManager
+        path = os.path.abspath(secrets_file_path)
+        project_name = os.path.basename(os.path.dirname(os.path.dirname(path)))
+        expected = os.path.join(ProjectManager(project_name).get_configs_dir(), ProjectManager.SECRETS_YAML_FILE_NAME)
+        manager = cls.instance(project_name) if os.path.abspath(expected) == path else None
+        cls._by_secrets_path[secrets_file_path] = manager
+        return manager
+
+    def _mtimes(self) -> dict:
+        mtimes = {}
+        for path in self.paths.values():
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                mtimes[path] = None
+        return mtimes
+
+    def _load(self) -> ConfigSnapshot:
+        mtimes = self._mtimes()
+        secrets = None  # no fallback: SecretsYaml.load_config() raises FileNotFoundError for a project without one
+        if mtimes[self.paths["secrets"]] is not None:
+            secrets = load_yaml(self.paths["secrets"])
+            validate_secrets(secrets, self.paths["secrets"])
+        default_project = load_toml(self.paths["default_project"]) if mtimes[self.paths["default_project"]] else {}
+        default_queries = load_toml(self.paths["default_queries"]) if mtimes[self.paths["default_queries"]] else {}
+        config_time = load_toml(self.paths["config_time"]) if mtimes[self.paths["config_time"]] else {}
+        query_files = default_queries.get("default-query", {}).get("files", [])
+        if not isinstance(query_files, list):
+            raise ConfigurationError(f"{self.paths['default_queries']}: expected a list under 'files'")
+        return ConfigSnapshot(
+            project_name=self.project_name,
+            secrets=freeze(secrets),
+            default_project=freeze(default_project),
+            default_queries=freeze(default_queries),
+            config_time=freeze(config_time),
+            query_files=freeze(query_files),
+            mtimes=freeze(mtimes),
+            loaded_at=time.time(),
+        )
+
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        # Between checks this is one clock read and a comparison.
+        if time.monotonic() >= self._next_check:
+            self.reload()
+        return self._snapshot
+
+    def reload(self, force: bool = False) -> bool:
+        """Re-read the files if any changed (or if force). Returns True if a new snapshot was swapped in."""
+        with self._reload_lock:
+            self._next_check = time.monotonic() + self.check_interval_s
+            mtimes = self._mtimes()
+            if not force and (mtimes == self._snapshot.mtimes or mtimes == self._failed_mtimes):
+                return False
+            try:
+                snapshot = self._load()
+            except (OSError, ValueError) as e:  # ConfigurationError and TOML parse errors are ValueErrors
+                logger.error(f"ConfigurationManager: keeping the previous configuration for {self.project_name}: {e}")
+                self._failed_mtimes = mtimes
+                return False
+            self._failed_mtimes = None
+            self._snapshot = snapshot
+            logger.info(f"ConfigurationManager: configuration for {self.project_name} reloaded.")
+            return True
+
+    def start_watching(self, interval_s: float = None):
+        """Poll the files from a daemon thread, so edits apply even while nobody reads the configuration."""
+        if self._watcher is not None:
+            return self._watcher
+        interval_s = interval_s or self.check_interval_s
+        def watch():
+            while True:
+                time.sleep(interval_s)
+                self.reload()
+        self._watcher = threading.Thread(target=watch, name=f"config-watch-{self.project_name}", daemon=True)
+        self._watcher.start()
+        return self._watcher
+
+def demo_configuration_manager():
+    config = ConfigurationManager.instance()
+    snapshot = config.snapshot
+    print(f"project: {snapshot.project_name}")
+    print(f"eds_apis: {list(snapshot.secrets.get('eds_apis', {}))}")
+    print(f"contractor_apis: {list(snapshot.secrets.get('contractor_apis', {}))}")
+    print(f"query files: {list(snapshot.query_files)}")
+    start = time.perf_counter()
+    for _ in range(100_000):
+        config.snapshot.secrets
+    print(f"snapshot access: {1e6 * (time.perf_counter() - start) / 100_000:.2f} us")
+
+if __name__ == "__main__":
+    from src.pipeline.helpers import function_view
+    function_view()
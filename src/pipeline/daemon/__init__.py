@@ -1,15 +1,13 @@
 # pipeline/daemon/__init__.py
-from src.pipeline.daemon.controller import main_cli
-from src.pipeline.daemon.watchdog import is_daemon_running, check_and_restart_if_needed  
-
-import sys
-import os
+# Imports are inside the functions, so that importing a submodule (e.g. daemon.status for the status API)
+# does not also pull in the controller, the watchdog and psutil.
 import sys
 import os
 
 #sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "projects")))
 
 def main():
+    from src.pipeline.daemon.watchdog import is_daemon_running, check_and_restart_if_needed
     # Check if the daemon is already running
     if is_daemon_running():
         print("Daemon is already running.")
@@ -28,4 +26,5 @@ if __name__ == "__main__":
     if len(sys.argv) != 2:
         print("Usage: python -m pipeline.daemon -start | -stop | -status")
     else:
+        from src.pipeline.daemon.controller import main_cli
         main_cli(sys.argv[1])
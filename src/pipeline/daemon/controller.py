@@ -13,7 +13,6 @@ STATUS_LOG = os.path.join(RUNTIME_DIR, "daemon_status.log")
 os.makedirs(RUNTIME_DIR, exist_ok=True)
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
 def log_status(message: str):
     """Logs a message both to a file and to the console."""
@@ -43,7 +42,24 @@ def load_module_from_path(module_path: str, module_name: str = "main"):
 
 def start_daemon():
     """
-    Starts the daemon process for the identified project and runs its `run_daemon()` function.
+    Starts the daemon process. The projects listed under [daemon] in default-project.toml are hosted together,
+    sharing one scheduler, session pool and metrics registry; if none of them can be hosted, the default
+    project's main() is run as before.
+    """
+    from src.pipeline.daemon.host import ProjectHost
+    host = ProjectHost(ProjectManager.identify_daemon_projects())
+    if host.load_projects():
+        write_running_flag()
+        try:
+            host.run_forever()
+        finally:
+            remove_running_flag()
+        return
+    start_default_project_main()
+
+def start_default_project_main():
+    """
+    Runs the default project's scripts/main.py `main()` function.
     """
     # Get project directory via ProjectManager
     project_name = ProjectManager.identify_default_project()
@@ -61,14 +77,11 @@ def start_daemon():
     main()
     remove_running_flag()
     """
-    # Dynamically import the main module using the project directory
-    #module_path = f"{project_dir}.scripts.main"
-    module_path = project_manager.get_scripts_file_path(filename="main.py")
-    # Dynamically load the module from that path
+    # Import the main module as part of its project package, so its relative imports resolve and its name
+    # (projects.<name>.scripts.main) cannot collide with another project's main.
+    module_path = f"projects.{project_name}.scripts.main"
     try:
-        project_module = load_module_from_path(module_path)
-        if project_module is None:
-            return
+        project_module = importlib.import_module(module_path)
     except ModuleNotFoundError as e:
         logger.error(f"Could not import module '{module_path}': {e}")
         return
@@ -113,6 +126,7 @@ def status_daemon():
 
 def main_cli():
     """CLI interface to control the daemon."""
+    logging.basicConfig(level=logging.INFO)
     if len(sys.argv) < 2:
         print("Usage: python -m src.pipeline.daemon.controller [-start | -stop | -status]")
         sys.exit(1)
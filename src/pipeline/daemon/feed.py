@@ -0,0 +1,76 @@
+# src/pipeline/daemon/feed.py
+'''
+Title: feed.py
+
+Purpose:
+Latest-value feed. The daemon publishes every point value it collects into a memory-mapped ring buffer
+(src/pipeline/ringbuffer.py); consoles such as the Textual TUI (src/example/tui.py) subscribe to it and receive
+only the points whose value or timestamp changed since their last poll.
+
+    publish_live_values(data)                  # daemon, after each live cycle
+    subscriber = LiveFeedSubscriber()
+    changed = subscriber.poll()                # {iess: {"iess", "sid", "shortdesc", "un", "ts", "value"}}
+
+The ring and the subscriber's per-point table are both bounded, so a console can run for weeks.
+'''
+from src.pipeline.ringbuffer import RingBuffer
+
+LIVE_FEED_RING_PATH = "exports/live_feed_ring.bin"
+LIVE_FEED_RING_CAPACITY = 8192
+LIVE_FEED_RING_SLOT_SIZE = 256
+FEED_FIELDS = ("iess", "sid", "shortdesc", "un", "ts", "value")
+MAX_SHORTDESC = 40
+
+_writer_ring = None
+
+def _get_writer_ring():
+    global _writer_ring
+    if _writer_ring is None:
+        _writer_ring = RingBuffer(LIVE_FEED_RING_PATH, capacity=LIVE_FEED_RING_CAPACITY, slot_size=LIVE_FEED_RING_SLOT_SIZE)
+    return _writer_ring
+
+def publish_live_values(data: list) -> int:
+    """Publish the collected rows (collector.collect_live_values output). Returns how many were published."""
+    ring = _get_writer_ring()
+    published = 0
+    for row in data:
+        if not row.get("iess"):
+            continue
+        record = {key: row.get(key) for key in FEED_FIELDS}
+        if isinstance(record["shortdesc"], str):
+            record["shortdesc"] = record["shortdesc"][:MAX_SHORTDESC]
+        try:
+            ring.append(record)
+            published += 1
+        except (ValueError, TypeError):
+            continue  # oversized or not JSON-serialisable; the feed is best-effort
+    return published
+
+class LiveFeedSubscriber:
+    """
+    Read side of the feed. poll() returns only the points that changed since the previous poll.
+    At most max_points points are tracked; the least recently changed ones are forgotten first.
+    """
+    def __init__(self, path: str = LIVE_FEED_RING_PATH, max_points: int = 2000):
+        self.ring = RingBuffer(path, create=False)
+        self.max_points = max_points
+        self.latest = {}  # iess -> record, in order of last change
+        self._seq = 0
+
+    def poll(self) -> dict:
+        self._seq, records = self.ring.read_since(self._seq)
+        changed = {}
+        for record in records:
+            iess = record.get("iess")
+            previous = self.latest.get(iess)
+            if previous is not None and (previous.get("ts"), previous.get("value")) == (record.get("ts"), record.get("value")):
+                continue
+            self.latest.pop(iess, None)
+            self.latest[iess] = record
+            changed[iess] = record
+        while len(self.latest) > self.max_points:
+            self.latest.pop(next(iter(self.latest)))
+        return changed
+
+    def close(self):
+        self.ring.close()
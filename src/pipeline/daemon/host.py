@@ -0,0 +1,83 @@
+# src/pipeline/daemon/host.py
+'''
+Title: host.py
+
+Purpose:
+Run several project pipelines (eds_to_rjn, eds_to_termux, ...) in one daemon process, sharing one scheduler,
+one pool of logged-in sessions (src/pipeline/sessionpool.py) and one metrics registry.
+
+Each project is imported as its own package, projects.<name>.scripts.daemon_runner, so module namespaces stay
+isolated (no more sys.modules["main"]). A project takes part by defining:
+
+    def setup_schedules(scheduler): ...     # register its cycles on the shared schedule.Scheduler
+
+Projects without a daemon_runner, or without setup_schedules(), are skipped with a warning.
+A cycle that raises is logged and reported in the daemon status, and does not stop the other projects. Counting
+and timing cycles is left to the project (eds_to_rjn wraps each cycle in run_instrumented), so nothing is counted twice.
+
+The projects to host come from default-project.toml:
+    [daemon]
+    projects = ["eds_to_rjn", "eds_to_termux"]
+'''
+import functools
+import importlib
+import logging
+import time
+
+from src.pipeline.daemon.status import update_status
+
+logger = logging.getLogger(__name__)
+
+class _ProjectScheduler:
+    """Thin view of the shared scheduler that wraps every job registered by one project."""
+    def __init__(self, host, project_name):
+        self._host = host
+        self._project_name = project_name
+
+    def every(self, interval=1):
+        job = self._host.scheduler.every(interval)
+        do = job.do
+        project_name = self._project_name
+        host = self._host
+        def guarded_do(job_func, *args, **kwargs):
+            return do(host.run_guarded, project_name, functools.partial(job_func, *args, **kwargs))
+        job.do = guarded_do
+        return job
+
+class ProjectHost:
+    def __init__(self, project_names, scheduler=None):
+        import schedule
+        self.scheduler = scheduler if scheduler is not None else schedule.Scheduler()
+        self.project_names = list(project_names)
+        self.modules = {}
+
+    def load_projects(self):
+        for project_name in self.project_names:
+            module_name = f"projects.{project_name}.scripts.daemon_runner"
+            try:
+                module = importlib.import_module(module_name)
+            except ModuleNotFoundError as e:
+                logger.warning(f"Project '{project_name}' has no daemon_runner ({e}). Skipping.")
+                continue
+            if not hasattr(module, "setup_schedules"):
+                logger.warning(f"{module_name} does not define setup_schedules(scheduler). Skipping.")
+                continue
+            module.setup_schedules(_ProjectScheduler(self, project_name))
+            self.modules[project_name] = module
+            logger.info(f"Hosting project '{project_name}'.")
+        return self.modules
+
+    def run_guarded(self, project_name, job):
+        try:
+            job()
+        except Exception as e:
+            logger.exception(f"Cycle failed for project '{project_name}': {e}")
+            update_status("error", f"{project_name}: {e}")
+
+    def run_forever(self, poll_interval: float = 1.0):
+        if not self.modules:
+            self.load_projects()
+        update_status("running", f"hosting projects: {', '.join(self.modules) or 'none'}")
+        while True:
+            self.scheduler.run_pending()
+            time.sleep(poll_interval)
@@ -1,8 +1,31 @@
 # src/daemon/status.py
 from datetime import datetime
+import asyncio
 import json, os
 
-STATUS_PATH = "exports/status_daemon_log.txt"
+from src.pipeline.ringbuffer import RingBuffer
+
+STATUS_PATH = "exports/status_daemon_log.txt" # append-only audit trail, never read by the API
+STATUS_RING_PATH = "exports/status_ring.bin" # bounded, what /status, /status/history and /status/stream serve from
+STATUS_RING_CAPACITY = 1024
+STATUS_RING_SLOT_SIZE = 512
+UNKNOWN_STATUS = {"status": "unknown", "message": ""}
+
+_writer_ring = None
+_reader_ring = None
+
+def _get_writer_ring():
+    global _writer_ring
+    if _writer_ring is None:
+        _writer_ring = RingBuffer(STATUS_RING_PATH, capacity=STATUS_RING_CAPACITY, slot_size=STATUS_RING_SLOT_SIZE)
+    return _writer_ring
+
+def _get_reader_ring():
+    # Read-only mapping, so that the API process can never corrupt what the daemon publishes.
+    global _reader_ring
+    if _reader_ring is None:
+        _reader_ring = RingBuffer(STATUS_RING_PATH, create=False)
+    return _reader_ring
 
 def update_status(state: str, msg: str = ""):
     entry = {
@@ -10,12 +33,35 @@ def update_status(state: str, msg: str = ""):
         "status": state,
         "message": msg,
     }
+    os.makedirs(os.path.dirname(STATUS_PATH), exist_ok=True)
     with open(STATUS_PATH, "a") as f:
         f.write(json.dumps(entry) + "\n")
 
+    ring = _get_writer_ring()
+    # Long messages are clipped for the ring only; the audit log above keeps the full text.
+    while True:
+        try:
+            ring.append(entry)
+            break
+        except ValueError:
+            if not entry["message"]:
+                raise
+            entry = {**entry, "message": entry["message"][:len(entry["message"]) // 2]}
+
 def get_latest_status():
-    if not os.path.exists(STATUS_PATH):
-        return {"status": "unknown", "message": ""}
-    with open(STATUS_PATH) as f:
-        lines = f.readlines()
-        return json.loads(lines[-1]) if lines else {"status": "unknown", "message": ""}
+    latest = _get_reader_ring().latest()
+    return latest if latest is not None else dict(UNKNOWN_STATUS)
+
+def get_status_history(n: int = 20):
+    """Up to n most recent entries, oldest first. Bounded by STATUS_RING_CAPACITY."""
+    return _get_reader_ring().tail(n)
+
+async def stream_status(poll_interval: float = 1.0):
+    """Yield each new status entry as a server-sent event, starting from the latest one."""
+    ring = _get_reader_ring()
+    seq = max(ring.seq() - 1, 0)
+    while True:
+        seq, entries = ring.read_since(seq)
+        for entry in entries:
+            yield f"data: {json.dumps(entry)}\n\n"
+        await asyncio.sleep(poll_interval)
@@ -5,7 +5,6 @@ import logging
 
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
 def is_daemon_running():
     """
@@ -28,7 +27,6 @@ def check_and_restart_if_needed():
 
 
 import os
-import psutil
 import subprocess
 from src.pipeline.projectmanager import ProjectManager
 import logging
@@ -38,6 +36,7 @@ logger = logging.getLogger(__name__)
 PID_FILE = "daemon.pid"  # Could be placed in %APPDATA% or a temp dir
 
 def is_process_running(pid):
+    import psutil # only the watchdog needs it; keep it off every other command's startup path
     return psutil.pid_exists(pid) and psutil.Process(pid).status() != psutil.STATUS_ZOMBIE
 
 def check_and_restart_if_needed():
@@ -0,0 +1,145 @@
+# src/pipeline/dedup.py
+'''
+Title: dedup.py
+
+Purpose:
+Ingestion-time deduplication. points/query returns the same sample again when EDS has not updated a point
+(same ts), and a re-run cycle returns the whole set again; without a check those rows land in live_data and
+are uploaded to RJN twice. DedupIndex remembers (iess, ts bucket) keys for a bounded window, checks membership
+in O(1), and is persisted as an append-only log so the check survives daemon restarts.
+
+    index = DedupIndex("exports/aggregate/dedup_index_live_data.log", bucket_s=300, window_s=7 * 24 * 3600)
+    data = index.filter_new(data, mark=False)   # drops rows already seen, and duplicates within data itself
+    store(data)
+    index.mark(data)                            # only once stored, so a failed write is retried next cycle
+
+Keys carry no store, so each store needs an index of its own. Rows older than the window cannot be checked and are
+passed through.
+The log is compacted on load once it holds more than twice the live keys.
+'''
+import logging
+import os
+
+from src.pipeline import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKET_S = 300
+DEFAULT_WINDOW_S = 7 * 24 * 3600
+
+class DedupIndex:
+    def __init__(self, path: str = None, bucket_s: int = DEFAULT_BUCKET_S, window_s: int = DEFAULT_WINDOW_S):
+        self.path = path
+        self.bucket_s = bucket_s
+        self.window_buckets = max(1, window_s // bucket_s)
+        self._buckets = {}  # bucket -> set of iess
+        self._newest = None
+        self._size = 0
+        if path:
+            self._load()
+
+    def bucket(self, ts) -> int:
+        # Floor, like the sanitizer's bucketing (round_time_to_nearest_five_minutes() floors despite its name),
+        # so a sample is keyed to the same bucket it is stored under.
+        return int(float(ts) // self.bucket_s)
+
+    def _load(self):
+        lines = 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    bucket, _, iess = line.rstrip("\n").partition(" ")
+                    if iess:
+                        self._add(int(bucket), iess)
+                        lines += 1
+        except FileNotFoundError:
+            return
+        self._evict()
+        if lines > 2 * max(self._size, 1):
+            self._compact()
+
+    def _compact(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for bucket, points in self._buckets.items():
+                f.writelines(f"{bucket} {iess}\n" for iess in points)
+        os.replace(tmp_path, self.path)
+
+    def _add(self, bucket, iess):
+        points = self._buckets.get(bucket)
+        if points is None:
+            points = self._buckets[bucket] = set()
+        if iess not in points:
+            points.add(iess)
+            self._size += 1
+        if self._newest is None or bucket > self._newest:
+            self._newest = bucket
+
+    def _evict(self):
+        if self._newest is None:
+            return
+        oldest_kept = self._newest - self.window_buckets
+        # At most window_buckets keys (plus a few late ones), so the scan is cheap next to a cycle.
+        for bucket in [b for b in self._buckets if b < oldest_kept]:
+            self._size -= len(self._buckets.pop(bucket))
+
+    def seen(self, iess, ts) -> bool:
+        points = self._buckets.get(self.bucket(ts))
+        return points is not None and str(iess) in points
+
+    def _key(self, row, ts_key):
+        iess, ts = row.get("iess"), row.get(ts_key)
+        if iess in (None, "") or ts in (None, ""):
+            return None
+        bucket = self.bucket(ts)
+        if self._newest is not None and bucket < self._newest - self.window_buckets:
+            return None  # older than the window: cannot tell
+        return bucket, str(iess)
+
+    def filter_new(self, rows: list, ts_key: str = "ts", mark: bool = True) -> list:
+        """
+        Rows whose (iess, ts bucket) has not been seen, in their original order, without duplicates among themselves.
+        With mark=False nothing is recorded yet; call mark(rows) once they are safely stored.
+        """
+        fresh, batch_keys = [], set()
+        for row in rows:
+            key = self._key(row, ts_key)
+            if key is not None:
+                points = self._buckets.get(key[0])
+                if key in batch_keys or (points is not None and key[1] in points):
+                    continue
+                batch_keys.add(key)
+            fresh.append(row)
+        dropped = len(rows) - len(fresh)
+        if dropped:
+            metrics.inc("pipeline_duplicates_dropped_total", dropped)
+            logger.info(f"DedupIndex: dropped {dropped} duplicate row(s) of {len(rows)}.")
+        if mark:
+            self.mark(fresh, ts_key)
+        return fresh
+
+    def mark(self, rows: list, ts_key: str = "ts"):
+        """Record rows as seen, in memory and in the log."""
+        new_keys = []
+        for row in rows:
+            key = self._key(row, ts_key)
+            if key is None:
+                continue
+            points = self._buckets.get(key[0])
+            if points is None or key[1] not in points:
+                self._add(*key)
+                new_keys.append(key)
+        self._evict()
+        if self.path and new_keys:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.writelines(f"{bucket} {iess}\n" for bucket, iess in new_keys)
+
+    def __len__(self):
+        return self._size
+
+if __name__ == "__main__":
+    from src.pipeline.helpers import function_view
+    function_view()
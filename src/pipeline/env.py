@@ -1,10 +1,10 @@
 #env.__main__.py
  
-import yaml
 from src.pipeline.projectmanager import ProjectManager 
 
 '''
-migrate this to ConfigurationManager
+SecretsYaml.load_config() delegates to ConfigurationManager (src/pipeline/configrationmanager.py), which parses
+each project's secrets.yaml once and hands out the same read-only snapshot until the file changes.
 '''
 
 class SecretsYaml:
@@ -13,8 +13,16 @@ class SecretsYaml:
 
     @staticmethod
     def load_config(secrets_file_path): 
-        with open(secrets_file_path, 'r') as f:
-            return yaml.safe_load(f)
+        from src.pipeline.configrationmanager import ConfigurationManager, load_yaml
+        manager = ConfigurationManager.for_secrets_path(secrets_file_path)
+        if manager is not None:
+            secrets = manager.snapshot.secrets # read-only; cached until secrets.yaml changes
+            if secrets is None and manager.reload(): # it may have been created since the last check
+                secrets = manager.snapshot.secrets
+            if secrets is None:
+                raise FileNotFoundError(f"Configuration file not found: {secrets_file_path}")
+            return secrets
+        return load_yaml(secrets_file_path) # a secrets file outside any project
         
     def print_config(self):
         # Print the values
@@ -35,7 +43,7 @@ def find_urls(config, url_set=None):
                 url_set.add(value)
             else:
                 find_urls(value, url_set)
-    elif isinstance(config, list):
+    elif isinstance(config, (list, tuple)):
         for item in config:
             find_urls(item, url_set)
 
@@ -0,0 +1,196 @@
+# src/pipeline/histreader.py
+'''
+Title: histreader.py
+
+Purpose:
+Fast reads from large aggregate CSVs (live_data_EFF.csv, live_data_INF.csv, uncompressed rotation partitions, ...)
+without parsing the whole file with csv.DictReader.
+
+On first open the file is memory-mapped and scanned once to build a sparse index: every BLOCK_LINES lines, the byte
+offsets of the block, its time bounds and the set of points it contains. The index is cached beside the file as
+<file>.idx.json and extended incrementally when the file has grown (append-only files). A query then parses only
+the blocks whose time bounds and point sets match.
+
+    with HistReader("exports/aggregate/live_data_EFF.csv") as reader:
+        reader.points()                                      # ['8528']
+        reader.read("8528", start, end)                      # [(ts, value), ...]
+        reader.read_downsampled("8528", start, end, every_s=3600, how="mean")
+
+The point column is the first of iess / sid present in the header, and the time column is ts (epoch) or
+timestamp (ISO), unless given explicitly.
+'''
+import csv
+import json
+import mmap
+import os
+from datetime import datetime
+
+INDEX_VERSION = 1
+BLOCK_LINES = 256
+POINT_COLUMNS = ("iess", "sid")
+TIME_COLUMNS = ("ts", "timestamp")
+DOWNSAMPLE_FUNCTIONS = {
+    "mean": lambda values: sum(values) / len(values),
+    "min": min,
+    "max": max,
+    "first": lambda values: values[0],
+    "last": lambda values: values[-1],
+}
+
+def _parse_time(text: str, iso: bool) -> float:
+    return datetime.fromisoformat(text).timestamp() if iso else float(text)
+
+class HistReader:
+    def __init__(self, path: str, point_column: str = None, time_column: str = None, block_lines: int = BLOCK_LINES):
+        self.path = path
+        self.index_path = path + ".idx.json"
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        header_end = self._map.find(b"\n")
+        self.header = next(csv.reader([self._map[:header_end if header_end >= 0 else size].decode("utf-8-sig").rstrip("\r")]))
+        self.point_column = point_column or next((c for c in POINT_COLUMNS if c in self.header), None)
+        self.time_column = time_column or next((c for c in TIME_COLUMNS if c in self.header), None)
+        if self.point_column is None or self.time_column is None or "value" not in self.header:
+            raise ValueError(f"{path}: need a point column {POINT_COLUMNS}, a time column {TIME_COLUMNS} and 'value'; header is {self.header}")
+        self._point_i = self.header.index(self.point_column)
+        self._time_i = self.header.index(self.time_column)
+        self._value_i = self.header.index("value")
+        self._iso = self.time_column == "timestamp"
+        self.block_lines = block_lines
+        self.index = self._load_or_build_index(size, header_end + 1 if header_end >= 0 else size)
+
+    # --- index ---
+    def _load_or_build_index(self, size, data_start):
+        index = None
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (FileNotFoundError, ValueError):
+            pass
+        if index is not None and (index.get("version") != INDEX_VERSION or index.get("header") != self.header
+                                  or index.get("block_lines") != self.block_lines or index.get("size", 0) > size):
+            index = None  # different layout, or the file was rewritten: start over
+        if index is not None and index["size"] == size:
+            return index
+        if index is None:
+            index = {"version": INDEX_VERSION, "header": self.header, "block_lines": self.block_lines,
+                     "size": data_start, "points": [], "blocks": []}
+        elif index["blocks"] and index["blocks"][-1][1] == index["size"]:
+            index["blocks"].pop()  # re-scan the last (possibly partial) block together with the new lines
+        start = index["blocks"][-1][1] if index["blocks"] else data_start
+        self._scan(index, start, size)
+        index["size"] = size
+        tmp_path = self.index_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(index, f, separators=(",", ":"))
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            pass  # read-only location: keep the index in memory only
+        return index
+
+    def _scan(self, index, start, size):
+        point_ids = {p: i for i, p in enumerate(index["points"])}
+        offset = start
+        block_start, lines, min_ts, max_ts, block_points = offset, 0, None, None, set()
+        while offset < size:
+            end = self._map.find(b"\n", offset)
+            end = size if end < 0 else end + 1
+            fields = self._split(self._map[offset:end])
+            if fields is not None:
+                ts = _parse_time(fields[self._time_i], self._iso)
+                min_ts = ts if min_ts is None or ts < min_ts else min_ts
+                max_ts = ts if max_ts is None or ts > max_ts else max_ts
+                point = fields[self._point_i]
+                if point not in point_ids:
+                    point_ids[point] = len(index["points"])
+                    index["points"].append(point)
+                block_points.add(point_ids[point])
+            lines += 1
+            offset = end
+            if lines == self.block_lines or offset >= size:
+                if min_ts is not None:
+                    index["blocks"].append([block_start, offset, min_ts, max_ts, sorted(block_points)])
+                block_start, lines, min_ts, max_ts, block_points = offset, 0, None, None, set()
+
+    def _split(self, line: bytes):
+        text = line.decode("utf-8").rstrip("\r\n")
+        if not text:
+            return None
+        fields = text.split(",") if '"' not in text else next(csv.reader([text]))
+        if len(fields) <= max(self._point_i, self._time_i, self._value_i) or fields[self._time_i] == "":
+            return None
+        return fields
+
+    # --- queries ---
+    def points(self) -> list:
+        return list(self.index["points"])
+
+    def time_bounds(self):
+        blocks = self.index["blocks"]
+        if not blocks:
+            return None, None
+        return min(b[2] for b in blocks), max(b[3] for b in blocks)
+
+    def _blocks(self, point, start, end):
+        try:
+            point_id = self.index["points"].index(str(point))
+        except ValueError:
+            return
+        for block_start, block_end, min_ts, max_ts, block_points in self.index["blocks"]:
+            if (start is not None and max_ts < start) or (end is not None and min_ts > end):
+                continue
+            if point_id in block_points:
+                yield block_start, block_end
+
+    def read(self, point, start: float = None, end: float = None) -> list:
+        """[(ts, value), ...] for one point, in file order, with start <= ts <= end."""
+        point = str(point)
+        results = []
+        for block_start, block_end in self._blocks(point, start, end):
+            for line in self._map[block_start:block_end].splitlines():
+                fields = self._split(line)
+                if fields is None or fields[self._point_i] != point or fields[self._value_i] == "":
+                    continue
+                ts = _parse_time(fields[self._time_i], self._iso)
+                if (start is not None and ts < start) or (end is not None and ts > end):
+                    continue
+                results.append((ts, float(fields[self._value_i])))
+        return results
+
+    def read_downsampled(self, point, start: float = None, end: float = None, every_s: int = 3600, how: str = "mean") -> list:
+        """[(bucket_start_ts, aggregated value), ...], buckets aligned to multiples of every_s."""
+        fn = DOWNSAMPLE_FUNCTIONS[how]
+        buckets = {}
+        for ts, value in sorted(self.read(point, start, end)):
+            buckets.setdefault(int(ts // every_s * every_s), []).append(value)
+        return [(bucket, fn(values)) for bucket, values in sorted(buckets.items())]
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def demo_histreader():
+    from src.pipeline.projectmanager import ProjectManager
+    project_manager = ProjectManager(ProjectManager.identify_default_project())
+    for filename in ("live_data_EFF.csv", "live_data_INF.csv"):
+        path = os.path.join(project_manager.get_aggregate_dir(), filename)
+        if not os.path.exists(path):
+            continue
+        with HistReader(path) as reader:
+            first, last = reader.time_bounds()
+            for point in reader.points():
+                daily = reader.read_downsampled(point, first, last, every_s=86400)
+                print(f"{filename} {point}: {len(reader.read(point))} samples, {len(daily)} days, first day mean = {daily[0][1] if daily else None}")
+
+if __name__ == "__main__":
+    from src.pipeline.helpers import function_view
+    function_view()
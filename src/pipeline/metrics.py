@@ -0,0 +1,233 @@
+# src/pipeline/metrics.py
+'''
+Title: metrics.py
+
+Purpose:
+Counters, gauges and latency histograms for every stage of a cycle (EDS login, points/query, sanitise, CSV append,
+RJN post, ...), exported in the Prometheus text format.
+
+Usage:
+    from src.pipeline import metrics
+    metrics.inc("pipeline_eds_requests_total", endpoint="points/query")
+    with metrics.timed("eds_points_query"):
+        ...
+    @metrics.timed("storage_append")
+    def store_live_values(...): ...
+
+Set the environment variable PIPELINE_METRICS=0 to disable recording. When disabled, every call returns
+immediately and timed() hands back a shared no-op context manager, so the instrumented code pays one attribute
+lookup and one branch.
+
+The registry is per process. The daemon calls write_textfile() after each cycle, and the status API serves
+that file at /metrics alongside its own registry.
+'''
+import functools
+import os
+import threading
+import time
+
+ENABLED = os.getenv("PIPELINE_METRICS", "1") != "0"
+METRICS_TEXTFILE_PATH = "exports/metrics.prom"
+STAGE_HISTOGRAM = "pipeline_stage_duration_seconds"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+HELP = {
+    STAGE_HISTOGRAM: "Wall time spent in each pipeline stage.",
+    "pipeline_eds_requests_total": "HTTP requests made to EDS REST endpoints.",
+    "pipeline_rjn_requests_total": "HTTP requests made to RJN endpoints.",
+    "pipeline_points_collected_total": "Live point values returned by EDS.",
+    "pipeline_collect_errors_total": "Live point queries that raised.",
+    "pipeline_rows_stored_total": "Rows appended to aggregate storage.",
+    "pipeline_rows_sent_total": "Samples posted to RJN.",
+    "pipeline_cycles_total": "Scheduled cycles run, by cycle and outcome.",
+    "pipeline_last_cycle_timestamp_seconds": "Unix time at which each cycle last finished.",
+    "pipeline_http_request_duration_seconds": "HTTP round trip per request, by host and method.",
+    "pipeline_http_requests_total": "HTTP responses received, by host and status.",
+    "pipeline_http_request_bytes_saved_total": "Request body bytes saved by gzip compression.",
+    "pipeline_rjn_payloads_total": "Chunked data payloads built for RJN.",
+    "pipeline_rjn_payload_bytes_total": "Bytes of RJN data payloads as sent (after any gzip).",
+    "pipeline_rjn_payload_retries_total": "Re-sends of an already encoded RJN data payload.",
+    "pipeline_upload_jobs_total": "RJN uploads scheduled, by lane (fresh, backlog).",
+    "pipeline_upload_deferred_samples": "Backlog samples the last upload run left for the next one.",
+    "pipeline_verify_windows_total": "Uploaded windows read back from RJN, by outcome (match, mismatch, error).",
+    "pipeline_ratelimit_wait_seconds": "Time requests waited for their host's rate limit, by host.",
+    "pipeline_ratelimit_waits_total": "Requests that had to wait for their host's rate limit, by host.",
+    "pipeline_verify_requeued_rows_total": "Checkpoint rows removed so mismatched windows are uploaded again.",
+    "pipeline_samples_flagged_total": "Samples the quality screening flagged before upload, by flag.",
+    "pipeline_partitions_widened_total": "Aggregate partitions rewritten under a header with new columns, by store.",
+}
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+def _format_labels(label_key: tuple, extra: tuple = ()) -> str:
+    pairs = label_key + extra
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self.gauges[(name, _label_key(labels))] = value
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+            histograms = sorted((k, (h.buckets, list(h.counts), h.total, h.count)) for k, h in self.histograms.items())
+
+        lines = []
+        declared = set()
+        def declare(name, kind):
+            if name not in declared:
+                declared.add(name)
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, label_key), value in counters:
+            declare(name, "counter")
+            lines.append(f"{name}{_format_labels(label_key)} {value}")
+        for (name, label_key), value in gauges:
+            declare(name, "gauge")
+            lines.append(f"{name}{_format_labels(label_key)} {value}")
+        for (name, label_key), (buckets, counts, total, count) in histograms:
+            declare(name, "histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_format_labels(label_key, (('le', repr(float(bound))),))} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(label_key, (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{_format_labels(label_key)} {total}")
+            lines.append(f"{name}_count{_format_labels(label_key)} {count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+REGISTRY = MetricsRegistry()
+
+class _Timer:
+    """Context manager and decorator recording elapsed wall time into the stage histogram."""
+    __slots__ = ("stage", "labels", "start")
+
+    def __init__(self, stage, labels):
+        self.stage = stage
+        self.labels = labels
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        REGISTRY.observe(STAGE_HISTOGRAM, time.perf_counter() - self.start, stage=self.stage, **self.labels)
+        return False
+
+    def __call__(self, fn):
+        stage, labels = self.stage, self.labels
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            with _Timer(stage, labels):
+                return fn(*args, **kwargs)
+        return wrapper
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __call__(self, fn):
+        return fn
+
+_NULL_TIMER = _NullTimer()
+
+def timed(stage: str, **labels):
+    """with timed("rjn_post"): ... or @timed("rjn_post")."""
+    if not ENABLED:
+        return _NULL_TIMER
+    return _Timer(stage, labels)
+
+def inc(name: str, value=1, **labels):
+    if ENABLED:
+        REGISTRY.inc(name, value, **labels)
+
+def set_gauge(name: str, value, **labels):
+    if ENABLED:
+        REGISTRY.set_gauge(name, value, **labels)
+
+def observe(name: str, value, **labels):
+    if ENABLED:
+        REGISTRY.observe(name, value, **labels)
+
+def render_prometheus() -> str:
+    return REGISTRY.render_prometheus()
+
+def write_textfile(path: str = METRICS_TEXTFILE_PATH):
+    """Atomically write this process's metrics where the status API (or a node_exporter textfile collector) can read them."""
+    if not ENABLED:
+        return
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+def read_textfile(path: str = METRICS_TEXTFILE_PATH) -> str:
+    if not os.path.exists(path):
+        return ""
+    with open(path) as f:
+        return f.read()
+
+if __name__ == "__main__":
+    from src.pipeline.helpers import function_view
+    function_view()
@@ -0,0 +1,223 @@
+# src/pipeline/pointsearch.py
+'''
+Title: pointsearch.py
+
+Purpose:
+Interactive point lookup over EDS point exports (export_eds_points_neo.txt, written by eds-points-export), for
+building query CSV rows (points-maxson.csv, points-stiles.csv) and imports/*.toml descriptors without grepping.
+
+The index is built in memory from one or more exports (tens of thousands of POINT records in well under a second):
+    - a sorted token list for prefix lookup (bisect), over IDCS, IESS, DESC, AUX and ZD
+    - a trigram -> record ids map for fuzzy lookup (typos, partial tags in the middle of a name)
+and lookups are ranked: exact IDCS/IESS > IDCS/IESS prefix > DESC/AUX token prefix > trigram similarity.
+
+    index = PointIndex.from_exports([project_manager.get_exports_file_path("export_eds_points_neo.txt")])
+    for score, point in index.search("M100 FI"): ...
+    index.write_query_rows("queries/points-new.csv", points, rjn_siteid=..., rjn_entityid=..., rjn_name=...)
+    index.write_import_toml(project_manager.get_imports_dir(), point)
+
+Interactive:
+    poetry run pipeline point-search [export.txt ...]
+'''
+import bisect
+import csv
+import os
+import re
+from collections import defaultdict
+
+SEARCH_FIELDS = ("IDCS", "IESS", "DESC", "AUX", "ZD")
+QUERY_CSV_COLUMNS = ["zd", "idcs", "iess", "sid", "shortdesc", "rjn_siteid", "rjn_entityid", "rjn_name"]
+FIELD_PATTERN = re.compile(r"(\w+)=(?:'((?:[^'\\]|\\.)*)'|(\S+))")
+TOKEN_SPLIT = re.compile(r"[^A-Z0-9]+")
+
+def parse_export_line(line: str):
+    """One POINT line of an EDS export as a dict of its fields, or None for headers and CONFIG lines."""
+    if not line.startswith("POINT "):
+        return None
+    return {key: quoted if quoted or bare is None else bare for key, quoted, bare in FIELD_PATTERN.findall(line)}
+
+def trigrams(text: str) -> set:
+    text = f"  {text.upper()} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class PointIndex:
+    def __init__(self):
+        self.points = []             # export records, with "SOURCE" added
+        self._tokens = []            # sorted (token, field, point id)
+        self._trigrams = defaultdict(set)
+        self._exact = defaultdict(set)
+
+    @classmethod
+    def from_exports(cls, paths):
+        index = cls()
+        for path in paths:
+            index.add_export(path)
+        index._tokens.sort()
+        return index
+
+    def add_export(self, path: str):
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                point = parse_export_line(line)
+                if point is not None:
+                    point["SOURCE"] = os.path.basename(path)
+                    self._add(point)
+
+    def _add(self, point):
+        point_id = len(self.points)
+        self.points.append(point)
+        for field in SEARCH_FIELDS:
+            value = point.get(field, "").upper()
+            if not value:
+                continue
+            if field in ("IDCS", "IESS"):
+                self._exact[value].add(point_id)
+                self._tokens.append((value, field, point_id))
+            for token in TOKEN_SPLIT.split(value):
+                if token:
+                    self._tokens.append((token, field, point_id))
+            if field != "AUX":  # AUX is long and repetitive; prefix lookup on it is enough
+                for gram in trigrams(value):
+                    self._trigrams[gram].add(point_id)
+
+    def _prefix_hits(self, token):
+        start = bisect.bisect_left(self._tokens, (token,))
+        for i in range(start, len(self._tokens)):
+            value, field, point_id = self._tokens[i]
+            if not value.startswith(token):
+                break
+            yield value, field, point_id
+
+    def search(self, query: str, limit: int = 20, zd: str = None) -> list:
+        """[(score, point), ...], best first. zd restricts the results to one EDS server."""
+        query = query.strip().upper()
+        if not query:
+            return []
+        scores = defaultdict(float)
+        for point_id in self._exact.get(query, ()):
+            scores[point_id] += 100
+        tokens = [t for t in TOKEN_SPLIT.split(query) if t]
+        for token in tokens:
+            best = {}
+            for value, field, point_id in self._prefix_hits(token):
+                weight = (40 if field in ("IDCS", "IESS") else 15 if field == "DESC" else 5) * (1.5 if value == token else 1.0)
+                best[point_id] = max(best.get(point_id, 0), weight)
+            for point_id, weight in best.items():
+                scores[point_id] += weight / len(tokens)
+        query_grams = trigrams(query)
+        counts = defaultdict(int)
+        for gram in query_grams:
+            for point_id in self._trigrams.get(gram, ()):
+                counts[point_id] += 1
+        threshold = max(2, len(query_grams) // 2)
+        for point_id, count in counts.items():
+            if count >= threshold:
+                scores[point_id] += 20 * count / len(query_grams)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self.points[item[0]].get("IDCS", "")))
+        if zd:
+            ranked = [(point_id, score) for point_id, score in ranked if self.points[point_id].get("ZD", "").upper() == zd.upper()]
+        return [(round(score, 1), self.points[point_id]) for point_id, score in ranked[:limit]]
+
+    # --- output ---
+    @staticmethod
+    def to_query_row(point, rjn_siteid="", rjn_entityid="", rjn_name="") -> dict:
+        return {"zd": point.get("ZD", ""), "idcs": point.get("IDCS", ""), "iess": point.get("IESS", ""),
+                "sid": point.get("SID", ""), "shortdesc": point.get("DESC", ""),
+                "rjn_siteid": rjn_siteid, "rjn_entityid": rjn_entityid, "rjn_name": rjn_name}
+
+    @classmethod
+    def write_query_rows(cls, csv_path: str, points, **rjn_fields) -> int:
+        """Append points to a query CSV (header written if new); points whose iess is already there are skipped."""
+        existing = set()
+        if os.path.exists(csv_path):
+            with open(csv_path, newline="") as f:
+                existing = {row.get("iess") for row in csv.DictReader(f)}
+        rows = [cls.to_query_row(point, **rjn_fields) for point in points if point.get("IESS") not in existing]
+        write_header = not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0
+        with open(csv_path, "a", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=QUERY_CSV_COLUMNS)
+            if write_header:
+                writer.writeheader()
+            writer.writerows(rows)
+        return len(rows)
+
+    @staticmethod
+    def write_import_toml(imports_dir: str, point, ip_address="", rjn_siteid="", rjn_entityid="", rjn_name="") -> str:
+        """Write an imports/zd<ZD>_idcs<IDCS>_sid<SID>.toml descriptor, in the layout of the existing ones."""
+        safe_idcs = re.sub(r"[^\w.-]", "_", point.get("IDCS", ""))
+        path = os.path.join(imports_dir, f"zd{point.get('ZD', '')}_idcs{safe_idcs}_sid{point.get('SID', '')}.toml")
+        quote = lambda text: '"' + str(text).replace("\\", "\\\\").replace('"', '\\"') + '"'
+        lines = [
+            "[eds_characteristics]",
+            f"ip_address={quote(ip_address)}",
+            f"idcs={quote(point.get('IDCS', ''))}",
+            f"iess = {quote(point.get('IESS', ''))}",
+            f"sid={int(point['SID']) if str(point.get('SID', '')).isdigit() else quote(point.get('SID', ''))}",
+            f"zd={quote(point.get('ZD', ''))}",
+            "",
+            "[manual_characteristics]",
+            f"shortdesc={quote(point.get('DESC', ''))}",
+            "",
+            "[rjn_characteristics]",
+            f"rjn_siteid={quote(rjn_siteid)}",
+            f"rjn_entityid={quote(rjn_entityid)}",
+            f"rjn_name={quote(rjn_name)}",
+        ]
+        os.makedirs(imports_dir, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+        return path
+
+def print_results(results):
+    for n, (score, point) in enumerate(results):
+        print(f"{n:>3} {score:>6} {point.get('ZD', ''):<8} {point.get('IDCS', ''):<16} {point.get('IESS', ''):<28} SID={point.get('SID', ''):<6} {point.get('DESC', '')}")
+
+def point_search_cli(argv=None):
+    """
+    point-search [export.txt ...]
+    Type a query to search. Then:
+        add 0 3 5                     select results by number
+        csv <path> [siteid entityid name]   append the selection to a query CSV
+        toml [siteid entityid name]   write imports/*.toml descriptors for the selection
+        quit
+    """
+    import time
+    from src.pipeline.projectmanager import ProjectManager
+    project_manager = ProjectManager(ProjectManager.identify_default_project())
+    paths = argv or [project_manager.get_exports_file_path("export_eds_points_neo.txt")]
+    start = time.perf_counter()
+    index = PointIndex.from_exports(paths)
+    print(f"Indexed {len(index.points)} points from {len(paths)} export(s) in {1000 * (time.perf_counter() - start):.0f} ms.")
+    print(point_search_cli.__doc__)
+
+    results, selection = [], []
+    while True:
+        try:
+            line = input("search> ").strip()
+        except EOFError:
+            break
+        command, _, rest = line.partition(" ")
+        args = rest.split()
+        if command in ("quit", "exit"):
+            break
+        elif command == "add":
+            selection += [results[int(n)][1] for n in args if n.isdigit() and int(n) < len(results)]
+            print(f"{len(selection)} selected.")
+        elif command == "csv" and args:
+            written = PointIndex.write_query_rows(project_manager.get_queries_dir() + os.sep + args[0] if not os.path.isabs(args[0]) else args[0],
+                                                  selection, **dict(zip(("rjn_siteid", "rjn_entityid", "rjn_name"), args[1:])))
+            print(f"{written} row(s) written.")
+        elif command == "toml":
+            for point in selection:
+                print(PointIndex.write_import_toml(project_manager.get_imports_dir(), point,
+                                                   **dict(zip(("rjn_siteid", "rjn_entityid", "rjn_name"), args))))
+        elif line:
+            start = time.perf_counter()
+            results = index.search(line)
+            print_results(results)
+            print(f"({1000 * (time.perf_counter() - start):.1f} ms)")
+    return 0
+
+if __name__ == "__main__":
+    from src.pipeline.helpers import function_view
+    function_view()
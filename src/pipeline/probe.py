@@ -0,0 +1,172 @@
+# src/pipeline/probe.py
+'''
+Title: probe.py
+
+Purpose:
+Concurrent health probes for every API URL in secrets.yaml (env.find_urls), replacing the serial ICMP ping()
+calls. ICMP says nothing about whether the EDS REST port (43084/43080) or RJN's HTTPS endpoint actually answers,
+so each URL is checked in three steps, all of its URLs at once:
+
+    tcp   connect to host:port
+    tls   TLS handshake, for https URLs (certificates are not verified here; that is the transport's job)
+    http  HEAD through the shared transport; any HTTP response, even 401/404/405, counts as up
+
+ProbeMonitor keeps rolling statistics per URL (last `window` results: availability, mean/p50/p95 latency,
+consecutive failures) and writes them to exports/probes.json, which the status API serves at /probes and the
+daemon's cycles read through is_known_down() to skip an unreachable server at once instead of timing out.
+
+    monitor = get_probe_monitor()
+    monitor.run(find_urls(secrets_dict))
+    if is_known_down(secrets_dict["eds_apis"]["Maxson"]["url"]): ...
+'''
+import json
+import logging
+import os
+import socket
+import ssl
+import statistics
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+
+from src.pipeline import metrics, transport
+
+logger = logging.getLogger(__name__)
+
+PROBES_PATH = "exports/probes.json"
+DEFAULT_TIMEOUT_S = 3.0
+DEFAULT_WINDOW = 20
+DOWN_AFTER_FAILURES = 2      # consecutive failed probes before a server counts as down
+STATE_MAX_AGE_S = 15 * 60    # older probe results say nothing about now
+
+def probe_url(url: str, timeout_s: float = DEFAULT_TIMEOUT_S) -> dict:
+    """One TCP / TLS / HTTP check of url. Timings are in milliseconds; a failed step ends the probe."""
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    result = {"url": url, "host": parts.hostname, "port": port, "ok": False, "checked_at": time.time(),
+              "tcp_ms": None, "tls_ms": None, "http_ms": None, "http_status": None, "error": None}
+    step = "tcp"
+    try:
+        start = time.perf_counter()
+        with socket.create_connection((parts.hostname, port), timeout=timeout_s) as sock:
+            result["tcp_ms"] = round(1000 * (time.perf_counter() - start), 2)
+            if parts.scheme == "https":
+                step = "tls"
+                context = ssl.create_default_context()
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+                start = time.perf_counter()
+                with context.wrap_socket(sock, server_hostname=parts.hostname):
+                    result["tls_ms"] = round(1000 * (time.perf_counter() - start), 2)
+        step = "http"
+        start = time.perf_counter()
+        response = transport.get_shared_session().head(url, timeout=timeout_s, verify=False, allow_redirects=False,
+                                                      rate_limited=False) # a paced probe would time the queue, not the server
+        result["http_ms"] = round(1000 * (time.perf_counter() - start), 2)
+        result["http_status"] = response.status_code
+        result["ok"] = True
+    except (OSError, requests.exceptions.RequestException) as e:
+        result["error"] = f"{step}: {e.__class__.__name__}: {e}"
+    return result
+
+def probe_urls(urls, timeout_s: float = DEFAULT_TIMEOUT_S) -> list:
+    """Probe every URL at once; the whole batch takes about as long as the slowest URL."""
+    urls = sorted(set(urls))
+    if not urls:
+        return []
+    with ThreadPoolExecutor(max_workers=min(32, len(urls)), thread_name_prefix="probe") as pool:
+        return list(pool.map(lambda url: probe_url(url, timeout_s), urls))
+
+class ProbeMonitor:
+    def __init__(self, path: str = PROBES_PATH, window: int = DEFAULT_WINDOW, timeout_s: float = DEFAULT_TIMEOUT_S):
+        self.path = path
+        self.window = window
+        self.timeout_s = timeout_s
+        self._history = {}  # url -> deque of probe results
+
+    def run(self, urls) -> dict:
+        """Probe, fold the results into the rolling statistics, publish them, and return the summary."""
+        for result in probe_urls(urls, self.timeout_s):
+            self._history.setdefault(result["url"], deque(maxlen=self.window)).append(result)
+            metrics.set_gauge("pipeline_probe_up", 1 if result["ok"] else 0, host=result["host"] or "")
+            if result["ok"]:
+                metrics.observe("pipeline_probe_latency_seconds", result["http_ms"] / 1000, host=result["host"] or "")
+        summary = self.summary()
+        if self.path:
+            write_probe_state(summary, self.path)
+        return summary
+
+    @staticmethod
+    def _stats(history) -> dict:
+        latest = history[-1]
+        latencies = sorted((r["tcp_ms"] or 0) + (r["tls_ms"] or 0) + r["http_ms"] for r in history if r["ok"])
+        failures = 0
+        for r in reversed(history):
+            if r["ok"]:
+                break
+            failures += 1
+        return {
+            "state": "down" if failures >= DOWN_AFTER_FAILURES else "up" if latest["ok"] else "degraded",
+            "consecutive_failures": failures,
+            "availability": round(sum(r["ok"] for r in history) / len(history), 3),
+            "samples": len(history),
+            "latency_mean_ms": round(statistics.fmean(latencies), 2) if latencies else None,
+            "latency_p50_ms": latencies[len(latencies) // 2] if latencies else None,
+            "latency_p95_ms": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] if latencies else None,
+            "latest": latest,
+        }
+
+    def summary(self) -> dict:
+        return {url: self._stats(history) for url, history in self._history.items() if history}
+
+def write_probe_state(summary: dict, path: str = PROBES_PATH):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"updated_at": time.time(), "probes": summary}, f, indent=2)
+    os.replace(tmp_path, path)
+
+def read_probe_state(path: str = PROBES_PATH) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"updated_at": None, "probes": {}}
+
+def is_known_down(url: str, path: str = PROBES_PATH, max_age_s: float = STATE_MAX_AGE_S) -> bool:
+    """True only if recent probes agree the server is down; unknown or stale means go ahead and try."""
+    state = read_probe_state(path)
+    entry = state["probes"].get(url)
+    if entry is None or state["updated_at"] is None or time.time() - state["updated_at"] > max_age_s:
+        return False
+    return entry["state"] == "down"
+
+_monitor = None
+
+def get_probe_monitor() -> ProbeMonitor:
+    # One per process, so the rolling window survives between probe cycles.
+    global _monitor
+    if _monitor is None:
+        _monitor = ProbeMonitor()
+    return _monitor
+
+def print_probe_results(results):
+    for r in results:
+        timings = " ".join(f"{k[:-3]}={r[k]:.0f}ms" for k in ("tcp_ms", "tls_ms", "http_ms") if r[k] is not None)
+        print(f"{'UP  ' if r['ok'] else 'DOWN'} {r['url']:<48} {timings} {r['http_status'] or ''} {r['error'] or ''}")
+
+def demo_probe():
+    from src.pipeline.env import SecretsYaml, find_urls
+    from src.pipeline.projectmanager import ProjectManager
+    project_manager = ProjectManager(ProjectManager.identify_default_project())
+    secrets_dict = SecretsYaml.load_config(secrets_file_path = project_manager.get_configs_secrets_file_path())
+    print_probe_results(probe_urls(find_urls(secrets_dict)))
+
+if __name__ == "__main__":
+    from src.pipeline.helpers import function_view
+    function_view()
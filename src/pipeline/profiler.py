@@ -0,0 +1,159 @@
+# src/pipeline/profiler.py
+'''
+Title: profiler.py
+
+Purpose:
+Profile N runs of a cycle function on the production box, without editing code or attaching external tools.
+
+Modes:
+    deterministic : cProfile around each cycle (exact call counts, higher overhead)
+    sampling      : a background thread samples the cycle's stack every few milliseconds (low overhead)
+
+Both modes run the stack sampler, so either way the output directory holds:
+    cycle_001.prof ...   per-cycle cProfile dumps (deterministic only; open with pstats or snakeviz)
+    cycle_001.folded ... per-cycle collapsed stacks
+    stacks.folded        all cycles merged, in the "frame;frame;frame count" format read by flamegraph.pl and speedscope
+    summary.txt          per-cycle wall times and the top functions
+'''
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILE_MODES = ("deterministic", "sampling")
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class SamplingProfiler:
+    """
+    sampler = SamplingProfiler(interval=0.005)
+    with sampler:
+        run_live_cycle()
+    sampler.stacks  # Counter of "root;...;leaf" -> samples
+    """
+    def __init__(self, interval: float = 0.005, thread_id: int = None):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.reverse()
+            self.stacks[";".join(labels)] += 1
+            self.samples += 1
+
+    def start(self):
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="SamplingProfiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+def write_folded(stacks: Counter, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+
+def summarize_folded(stacks: Counter, top: int = 25) -> str:
+    """Top functions by self samples (leaf frame) and by total samples (anywhere on the stack)."""
+    total = sum(stacks.values()) or 1
+    self_counts = Counter()
+    total_counts = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        self_counts[frames[-1]] += count
+        for label in set(frames):
+            total_counts[label] += count
+
+    lines = [f"{'self%':>7} {'total%':>7}  function"]
+    for label, count in self_counts.most_common(top):
+        lines.append(f"{100 * count / total:7.2f} {100 * total_counts[label] / total:7.2f}  {label}")
+    return "\n".join(lines)
+
+def profile_cycles(cycle_fn, cycles: int = 3, mode: str = "deterministic", out_dir: str = "profiles",
+                   interval: float = 0.005, top: int = 25):
+    """Run cycle_fn() cycles times under the chosen profiler and write the artifacts into out_dir."""
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"mode must be one of {PROFILE_MODES}, got {mode!r}")
+    os.makedirs(out_dir, exist_ok=True)
+
+    merged_stacks = Counter()
+    prof_paths = []
+    wall_times = []
+    for i in range(1, cycles + 1):
+        sampler = SamplingProfiler(interval=interval)
+        profile = cProfile.Profile() if mode == "deterministic" else None
+        start = time.perf_counter()
+        with sampler:
+            if profile is not None:
+                profile.enable()
+            try:
+                cycle_fn()
+            except Exception as e:
+                # A failing cycle is still worth profiling; keep going so the slow path is captured.
+                print(f"cycle {i} raised {e!r}")
+            finally:
+                if profile is not None:
+                    profile.disable()
+        wall_times.append(time.perf_counter() - start)
+
+        if profile is not None:
+            prof_path = os.path.join(out_dir, f"cycle_{i:03d}.prof")
+            profile.dump_stats(prof_path)
+            prof_paths.append(prof_path)
+        write_folded(sampler.stacks, os.path.join(out_dir, f"cycle_{i:03d}.folded"))
+        merged_stacks.update(sampler.stacks)
+        print(f"cycle {i}/{cycles}: {wall_times[-1]:.3f} s, {sampler.samples} samples")
+
+    write_folded(merged_stacks, os.path.join(out_dir, "stacks.folded"))
+
+    summary = io.StringIO()
+    summary.write(f"mode = {mode}, cycles = {cycles}, sample interval = {interval} s\n")
+    for i, wall in enumerate(wall_times, start=1):
+        summary.write(f"cycle {i}: {wall:.3f} s\n")
+    summary.write("\nTop functions by sampled self time:\n")
+    summary.write(summarize_folded(merged_stacks, top=top) + "\n")
+    if prof_paths:
+        summary.write("\nTop functions by cumulative time (cProfile, all cycles merged):\n")
+        stats = pstats.Stats(*prof_paths, stream=summary)
+        stats.sort_stats("cumulative").print_stats(top)
+
+    summary_path = os.path.join(out_dir, "summary.txt")
+    with open(summary_path, "w", encoding="utf-8") as f:
+        f.write(summary.getvalue())
+    print(f"Profile written to: \n{out_dir}")
+    return summary_path
+
+if __name__ == "__main__":
+    from src.pipeline.helpers import function_view
+    function_view()
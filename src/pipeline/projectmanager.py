@@ -1,5 +1,4 @@
 import os
-import toml
 import logging
 from pathlib import Path
 import sys
@@ -22,6 +21,7 @@ class ProjectManager:
     SECRETS_EXAMPLE_YAML_FILE_NAME ='secrets-example.yaml'
     DEFAULT_PROJECT_TOML_FILE_NAME = 'default-project.toml'
     TIMESTAMPS_JSON_FILE_NAME = 'timestamps_success.json'
+    WATERMARKS_JSON_FILE_NAME = 'watermarks_points.json'
     
     def __init__(self, project_name):
         self.project_name = project_name
@@ -112,15 +112,24 @@ class ProjectManager:
         file_path = os.path.join(self.get_queries_dir(), self.TIMESTAMPS_JSON_FILE_NAME)
         return file_path
 
+    def get_watermarks_file_path(self):
+        # Per-point watermarks (ts of the last persisted sample) for the incremental trend sync
+        return os.path.join(self.get_queries_dir(), self.WATERMARKS_JSON_FILE_NAME)
+
     def check_and_create_dirs(self, list_dirs):
         for dir in list_dirs:
             if not os.path.exists(dir):
                 os.makedirs(dir)
     
+    # default-project.toml path -> (mtime, project name). Watchdog restarts and scheduled triggers resolve the
+    # project many times per process; re-parse only when the file has actually changed.
+    _default_project_cache = {}
+
     @classmethod
     def identify_default_project(cls):
         """
         Class method that reads default-project.toml to identify the default-project.
+        The result is cached until the file's modification time changes.
         """
         # This climbs out of /src/pipeline/ to find the root.
         # parents[0] → The directory that contains the Python file.
@@ -129,19 +138,40 @@ class ProjectManager:
         # This organization anticipates PyPi packaging.
         root_dir = Path(__file__).resolve().parents[2]  # This assumes that this python file's directory is two levels below the root. 
         projects_dir = root_dir / cls.PROJECTS_DIR_NAME
-        print(f"projects_dir = {projects_dir}")
         default_toml_path = projects_dir / cls.DEFAULT_PROJECT_TOML_FILE_NAME
 
-        if not os.path.exists(default_toml_path):
+        try:
+            mtime = os.stat(default_toml_path).st_mtime_ns
+        except FileNotFoundError:
             raise FileNotFoundError(f"Missing {cls.DEFAULT_PROJECT_TOML_FILE_NAME} in {projects_dir}")
-
-        with open(default_toml_path, 'r') as f:
-            data = toml.load(f)
-            print(data)
+        cached = cls._default_project_cache.get(default_toml_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        import tomllib # stdlib, and much cheaper to import than toml for this one small file
+        with open(default_toml_path, 'rb') as f:
+            data = tomllib.load(f)
+        logging.debug(f"{default_toml_path} = {data}")
         try:
-            return data['default-project']['project'] # This dictates the proper formatting of the TOML file.
+            project_name = data['default-project']['project'] # This dictates the proper formatting of the TOML file.
         except KeyError as e:
             raise KeyError(f"Missing key in {cls.DEFAULT_PROJECT_TOML_FILE_NAME}: {e}")
+        cls._default_project_cache[default_toml_path] = (mtime, project_name)
+        return project_name
+
+    @classmethod
+    def identify_daemon_projects(cls):
+        """
+        Class method that reads the [daemon] projects list from default-project.toml, i.e. the projects
+        to host together in one daemon process. Falls back to the default project alone.
+        """
+        default_toml_path = Path(__file__).resolve().parents[2] / cls.PROJECTS_DIR_NAME / cls.DEFAULT_PROJECT_TOML_FILE_NAME
+        default_project = cls.identify_default_project()
+        import tomllib
+        with open(default_toml_path, 'rb') as f:
+            data = tomllib.load(f)
+        project_names = data.get('daemon', {}).get('projects') or [default_project]
+        return list(dict.fromkeys(project_names))
 
 def find_project_root():
     """Recursively search for the project's root directory."""
@@ -37,13 +37,10 @@ class QueriesManager:
             paths = [self.project_manager.get_queries_file_path(f) for f in filename]
         else:
             try:
-                default_query_path = os.path.join(
-                    self.project_manager.get_queries_dir(), 'default-queries.toml'
-                )
-                with open(default_query_path, 'r') as f:
-                    query_config = toml.load(f)
-                filenames = query_config['default-query']['files']
-                if not isinstance(filenames, list):
+                # Parsed once and re-read only when default-queries.toml changes (src/pipeline/configrationmanager.py)
+                from src.pipeline.configrationmanager import ConfigurationManager
+                filenames = ConfigurationManager.instance(self.project_manager.project_name).snapshot.query_files
+                if not filenames:
                     raise ValueError("Expected a list under 'files' in default-queries.toml")
                 paths = [self.project_manager.get_queries_file_path(fname) for fname in filenames]
             except Exception as e:
@@ -82,7 +79,7 @@ class QueriesManager:
     
     def update_success(self,api_id,success_time=None):
         # This should be called when data is definitely transmitted to the target API. 
-        # A confirmation algorithm might be in order, like calling back the data and checking it against the original.
+        # Delivery is spot-checked separately: src/pipeline/verify.py reads back a sample of uploaded windows from RJN.
         data = self.load_tracking()
         if api_id not in data:
             data[api_id] = {"timestamps": {}}
@@ -0,0 +1,157 @@
+# src/pipeline/ratelimit.py
+'''
+Title: ratelimit.py
+
+Purpose:
+Per-host token-bucket pacing of EDS and RJN calls, so a large backfill or a multi-server live cycle runs at the
+highest rate the plant historian tolerates instead of flooding it and disturbing the operators' own EDS clients.
+
+    - one TokenBucket per host (host:port), shared by every session, thread and asyncio task in the process
+    - a bucket holds up to burst tokens and refills at rate tokens per second; each request takes one
+    - callers reserve their slot under a lock and sleep outside it, so waiters are served in arrival order and
+      nobody holds the lock while waiting
+    - enforced in transport.PipelineSession.request(), so EdsClient, rjn.py and calls.make_request all pace
+      through it; hosts without a configured limit are not paced
+    - time spent waiting is observed in pipeline_ratelimit_wait_seconds{host}
+
+Optional keys in a secrets.yaml API block (eds_apis.<name> or contractor_apis.<name>):
+    rate_limit_per_s: 20              # requests per second to this API's host; unset means unlimited
+    rate_limit_burst: 40              # default: rate_limit_per_s, but at least 1
+
+    configure_from_config(secrets_dict["eds_apis"]["Maxson"])   # done by transport.make_session()
+    wait_s = acquire("http://172.19.4.127:43084/api/v1/...")   # blocks until the host's bucket allows it
+    wait_s = await acquire_async(url)                           # the same bucket, from a coroutine
+
+Buckets are per process: the sharded collector's worker processes each take 1/workers of the rate (set_share).
+'''
+import asyncio
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+
+from src.pipeline import metrics
+
+logger = logging.getLogger(__name__)
+
+WAIT_HISTOGRAM = "pipeline_ratelimit_wait_seconds"
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float = None, clock=time.monotonic, sleep=time.sleep):
+        self._lock = threading.Lock()
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float("inf")  # starts full: trimmed to burst by configure()
+        self._updated = clock()
+        self.configure(rate, burst)
+        self.configured = (self.rate, self.burst)
+
+    def configure(self, rate: float, burst: float = None):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        with self._lock:
+            self.rate = float(rate)
+            self.burst = max(1.0, float(burst if burst is not None else rate))
+            self._tokens = min(self._tokens, self.burst)
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Take tokens now, going into debt if need be. Returns how long the caller must wait before using them."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        wait_s = self.reserve(tokens)
+        if wait_s > 0:
+            self._sleep(wait_s)
+        return wait_s
+
+    async def acquire_async(self, tokens: float = 1.0) -> float:
+        wait_s = self.reserve(tokens)
+        if wait_s > 0:
+            await asyncio.sleep(wait_s)
+        return wait_s
+
+_buckets = {}  # "host:port" -> TokenBucket
+_buckets_lock = threading.Lock()
+_share = 1.0   # fraction of each configured rate this process may use
+
+def host_key(url: str) -> str:
+    parts = urlsplit(url)
+    port = parts.port or {"http": 80, "https": 443}.get(parts.scheme, 0)
+    return f"{(parts.hostname or '').lower()}:{port}"
+
+def set_share(share: float):
+    """Give this process share (0, 1] of every configured rate, e.g. 1/workers in a sharded worker process."""
+    global _share
+    if not 0 < share <= 1:
+        raise ValueError(f"share must be in (0, 1], got {share}")
+    _share = share
+    with _buckets_lock:
+        for bucket in _buckets.values():
+            bucket.configure(bucket.configured[0] * share, bucket.configured[1] * share)
+
+def configure(url: str, rate: float, burst: float = None) -> TokenBucket:
+    """Set (or change, e.g. after a configuration reload) the limit for url's host. rate None removes it."""
+    key = host_key(url)
+    with _buckets_lock:
+        if rate is None:
+            _buckets.pop(key, None)
+            return None
+        burst = burst if burst is not None else max(1.0, float(rate))
+        bucket = _buckets.get(key)
+        if bucket is None:
+            bucket = _buckets[key] = TokenBucket(rate * _share, burst * _share)
+        else:
+            bucket.configure(rate * _share, burst * _share)
+        bucket.configured = (float(rate), float(burst))
+        return bucket
+
+def configure_from_config(config: dict):
+    """
+    Apply an API block's rate_limit_per_s / rate_limit_burst to its url's host. A block without rate_limit_per_s
+    removes the host's limit, so a configuration reload that drops the key takes effect at the next login.
+    """
+    if not config or not config.get("url"):
+        return None
+    if config.get("rate_limit_per_s") is None:
+        return configure(config["url"], None)
+    burst = config.get("rate_limit_burst")
+    return configure(config["url"], float(config["rate_limit_per_s"]), float(burst) if burst is not None else None)
+
+def get_bucket(url: str):
+    return _buckets.get(host_key(url))
+
+def _record(url: str, wait_s: float):
+    metrics.observe(WAIT_HISTOGRAM, wait_s, host=urlsplit(url).hostname or "")
+    if wait_s > 0:
+        metrics.inc("pipeline_ratelimit_waits_total", host=urlsplit(url).hostname or "")
+
+def acquire(url: str) -> float:
+    """Wait for url's host bucket, if it has one. Returns the seconds waited."""
+    bucket = _buckets.get(host_key(url)) if _buckets else None
+    if bucket is None:
+        return 0.0
+    wait_s = bucket.acquire()
+    _record(url, wait_s)
+    return wait_s
+
+async def acquire_async(url: str) -> float:
+    bucket = _buckets.get(host_key(url)) if _buckets else None
+    if bucket is None:
+        return 0.0
+    wait_s = await bucket.acquire_async()
+    _record(url, wait_s)
+    return wait_s
+
+def limits() -> dict:
+    """{host:port: (rate, burst)} as configured, before this process's share is applied."""
+    with _buckets_lock:
+        return {key: bucket.configured for key, bucket in _buckets.items()}
+
+if __name__ == "__main__":
+    from src.pipeline.helpers import function_view
+    function_view()
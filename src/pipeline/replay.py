@@ -0,0 +1,216 @@
+# src/pipeline/replay.py
+'''
+Title: replay.py
+
+Purpose:
+Record/replay layer under the requests.Session objects made by login_to_session (EDS and RJN), so that real
+production traffic can be captured once and re-run offline, e.g. to measure the client-side CPU and allocation
+cost of changes to EdsClient, the collector or send_data_to_rjn2 without a live EDS.
+
+    record : every request/response pair, with its elapsed time, is appended to a gzip JSON-lines archive
+    replay : responses are served from the archive, either at the recorded latency or as fast as possible
+
+Switch it on without touching code, through the environment:
+    PIPELINE_TRANSPORT_MODE=record|replay     (unset or "off": normal network access)
+    PIPELINE_TRANSPORT_ARCHIVE=path           (default exports/transport_archive.jsonl.gz)
+    PIPELINE_REPLAY_PACE=recorded|fast        (default fast)
+
+Passwords in request bodies and Authorization headers are never written to the archive.
+Replay matches on method, path and query, and request body (falling back to method, path and query alone);
+repeated identical requests (polling loops) get the recorded responses in order, and the last one again once
+they run out. Each new session starts again from the beginning of the archive.
+'''
+import atexit
+import base64
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import timedelta
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+MODE_ENV = "PIPELINE_TRANSPORT_MODE"
+ARCHIVE_ENV = "PIPELINE_TRANSPORT_ARCHIVE"
+PACE_ENV = "PIPELINE_REPLAY_PACE"
+DEFAULT_ARCHIVE_PATH = "exports/transport_archive.jsonl.gz"
+REDACTED = "***"
+SECRET_BODY_KEYS = ("password",)
+
+def _redact_body(body):
+    """Return the request body as text, with secret fields masked. Non-JSON bodies are kept as-is."""
+    if body is None:
+        return None
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", errors="replace")
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return body
+    if isinstance(data, dict):
+        data = {k: (REDACTED if k in SECRET_BODY_KEYS else v) for k, v in data.items()}
+    return json.dumps(data, sort_keys=True, separators=(",", ":"))
+
+def _request_key(method, url, redacted_body):
+    parts = urlsplit(url)
+    path = "/" + "/".join(p for p in parts.path.split("/") if p)  # tolerate the double slashes some callers build
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    body_hash = hashlib.sha1((redacted_body or "").encode("utf-8")).hexdigest()[:16]
+    return f"{method.upper()} {path}?{query} {body_hash}"
+
+class TransportArchive:
+    """Append-only gzip JSON-lines file of request/response records."""
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def append(self, record: dict):
+        with self._lock:
+            if self._file is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._file = gzip.open(self.path, "at", encoding="utf-8")
+                atexit.register(self.close)
+            self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def load(self) -> list:
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"Transport archive not found: {self.path}")
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+class RecordingAdapter(HTTPAdapter):
+    """A normal HTTPAdapter that also appends every exchange to the archive."""
+    def __init__(self, archive: TransportArchive, **kwargs):
+        super().__init__(**kwargs)
+        self.archive = archive
+
+    def send(self, request, **kwargs):
+        start = time.perf_counter()
+        response = super().send(request, **kwargs)
+        content = response.content  # read the body now, so the elapsed time includes it
+        elapsed = time.perf_counter() - start
+        try:
+            body_text, body_b64 = content.decode("utf-8"), None
+        except UnicodeDecodeError:
+            body_text, body_b64 = None, base64.b64encode(content).decode("ascii")
+        redacted = _redact_body(request.body)
+        self.archive.append({
+            "key": _request_key(request.method, request.url, redacted),
+            "method": request.method,
+            "url": request.url,
+            "request_body": redacted,
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() not in ("set-cookie", "content-encoding", "transfer-encoding")},
+            "body": body_text,
+            "body_b64": body_b64,
+            "elapsed": round(elapsed, 6),
+            "recorded_at": time.time(),
+        })
+        return response
+
+class ReplayAdapter(BaseAdapter):
+    """Serves recorded responses; never touches the network."""
+    def __init__(self, records: list, pace: str = "fast"):
+        super().__init__()
+        self.pace = pace
+        self._lock = threading.Lock()
+        self._by_key = defaultdict(deque)
+        self._by_path = defaultdict(deque)
+        self._last = {}
+        for record in records:
+            self._by_key[record["key"]].append(record)
+            self._by_path[record["key"].rsplit(" ", 1)[0]].append(record)
+
+    def _next_record(self, key):
+        with self._lock:
+            for index, lookup in ((self._by_key, key), (self._by_path, key.rsplit(" ", 1)[0])):
+                queue = index.get(lookup)
+                if queue:
+                    record = queue.popleft()
+                    self._last[lookup] = record
+                    return record
+                if lookup in self._last:
+                    return self._last[lookup]
+        return None
+
+    def send(self, request, **kwargs):
+        key = _request_key(request.method, request.url, _redact_body(request.body))
+        record = self._next_record(key)
+        if record is None:
+            raise requests.exceptions.ConnectionError(f"No recorded response for {key}", request=request)
+        if self.pace == "recorded":
+            time.sleep(record["elapsed"])
+
+        response = requests.Response()
+        response.status_code = record["status"]
+        response.reason = record.get("reason")
+        response.headers = CaseInsensitiveDict(record["headers"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = record["body"].encode("utf-8") if record["body"] is not None else base64.b64decode(record["body_b64"])
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(seconds=record["elapsed"])
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
+
+_archives = {}
+_replay_records = {}
+_registry_lock = threading.Lock()
+
+def _get_archive(path):
+    with _registry_lock:
+        if path not in _archives:
+            _archives[path] = TransportArchive(path)
+        return _archives[path]
+
+def _get_replay_records(path):
+    # Loaded once per process. Each new session gets its own queues, so every login replays from the start.
+    with _registry_lock:
+        if path not in _replay_records:
+            _replay_records[path] = TransportArchive(path).load()
+        return _replay_records[path]
+
+def install(session, mode: str, archive_path: str = DEFAULT_ARCHIVE_PATH, pace: str = "fast"):
+    """Mount a recording or replaying adapter on the session. mode "off" leaves it untouched."""
+    if mode in (None, "", "off"):
+        return session
+    if mode == "record":
+        adapter = RecordingAdapter(_get_archive(archive_path))
+    elif mode == "replay":
+        adapter = ReplayAdapter(_get_replay_records(archive_path), pace=pace)
+    else:
+        raise ValueError(f"{MODE_ENV} must be record, replay or off, got {mode!r}")
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def install_from_env(session):
+    return install(session,
+                   mode=os.getenv(MODE_ENV, "off").lower(),
+                   archive_path=os.getenv(ARCHIVE_ENV, DEFAULT_ARCHIVE_PATH),
+                   pace=os.getenv(PACE_ENV, "fast").lower())
+
+if __name__ == "__main__":
+    from src.pipeline.helpers import function_view
+    function_view()
@@ -0,0 +1,154 @@
+# src/pipeline/ringbuffer.py
+'''
+Title: ringbuffer.py
+
+Purpose:
+A bounded, file-backed ring of JSON records, memory-mapped so that one process (the daemon) can publish
+and any number of other processes (the status API, the TUI) can read the newest records in constant time,
+no matter how long the daemon has been running.
+
+Layout:
+    header  : magic, capacity, slot_size, seq (total records ever written)
+    slots   : capacity x slot_size bytes, each holding [length, seq, payload]
+
+A record's slot is seq % capacity. Readers check the seq stored in the slot, so a slot that was overwritten
+while being read is skipped instead of returned half-written.
+Single writer per file. Readers never lock.
+'''
+import json
+import mmap
+import os
+import struct
+import threading
+
+MAGIC = b"PLRING01"
+HEADER_STRUCT = struct.Struct("<8sIIQ")  # magic, capacity, slot_size, seq
+HEADER_SIZE = 64
+SLOT_HEADER_STRUCT = struct.Struct("<IQ")  # payload length, record seq
+SEQ_OFFSET = 16  # byte offset of seq inside the header
+
+class RingBuffer:
+    """
+    ring = RingBuffer("exports/status_ring.bin", capacity=1024, slot_size=512)
+    ring.append({"status": "ok"})
+    ring.latest()
+    ring.tail(10)
+    seq, records = ring.read_since(seq)
+    """
+    def __init__(self, path: str, capacity: int = 1024, slot_size: int = 512, create: bool = True):
+        if slot_size <= SLOT_HEADER_STRUCT.size:
+            raise ValueError(f"slot_size must be larger than {SLOT_HEADER_STRUCT.size}")
+        self.path = path
+        self.capacity = capacity
+        self.slot_size = slot_size
+        self.create = create
+        self._mm = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    @property
+    def payload_size(self):
+        return self.slot_size - SLOT_HEADER_STRUCT.size
+
+    def _file_size(self):
+        return HEADER_SIZE + self.capacity * self.slot_size
+
+    def _open(self):
+        if self._mm is not None:
+            return True
+        if not os.path.exists(self.path):
+            if not self.create:
+                return False
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "wb") as f:
+                f.write(HEADER_STRUCT.pack(MAGIC, self.capacity, self.slot_size, 0).ljust(HEADER_SIZE, b"\0"))
+                f.truncate(self._file_size())
+        self._file = open(self.path, "r+b" if self.create else "rb")
+        magic, capacity, slot_size, _ = HEADER_STRUCT.unpack(self._file.read(HEADER_STRUCT.size))
+        if magic != MAGIC:
+            self._file.close()
+            self._file = None
+            raise ValueError(f"{self.path} is not a ring buffer file")
+        # The file on disk wins over the constructor arguments, so readers need not know the writer's sizes.
+        self.capacity, self.slot_size = capacity, slot_size
+        access = mmap.ACCESS_WRITE if self.create else mmap.ACCESS_READ
+        self._mm = mmap.mmap(self._file.fileno(), self._file_size(), access=access)
+        return True
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def seq(self) -> int:
+        """Total number of records ever appended (0 if the file does not exist yet)."""
+        if not self._open():
+            return 0
+        return struct.unpack_from("<Q", self._mm, SEQ_OFFSET)[0]
+
+    def append(self, record) -> int:
+        """Write one JSON-serialisable record, overwriting the oldest. Returns the record's seq."""
+        payload = json.dumps(record, separators=(",", ":")).encode("utf-8")
+        if len(payload) > self.payload_size:
+            raise ValueError(f"record of {len(payload)} bytes exceeds slot payload of {self.payload_size} bytes")
+        with self._lock:
+            self._open()
+            seq = self.seq()
+            offset = HEADER_SIZE + (seq % self.capacity) * self.slot_size
+            # Invalidate the slot first, then fill it, then publish by bumping the header seq.
+            SLOT_HEADER_STRUCT.pack_into(self._mm, offset, 0, 2**64 - 1)
+            self._mm[offset + SLOT_HEADER_STRUCT.size: offset + SLOT_HEADER_STRUCT.size + len(payload)] = payload
+            SLOT_HEADER_STRUCT.pack_into(self._mm, offset, len(payload), seq)
+            struct.pack_into("<Q", self._mm, SEQ_OFFSET, seq + 1)
+        return seq
+
+    def _read_slot(self, seq):
+        offset = HEADER_SIZE + (seq % self.capacity) * self.slot_size
+        length, slot_seq = SLOT_HEADER_STRUCT.unpack_from(self._mm, offset)
+        if slot_seq != seq or length > self.payload_size:
+            return None
+        start = offset + SLOT_HEADER_STRUCT.size
+        payload = self._mm[start:start + length]
+        # Re-check: the writer may have lapped us while we copied.
+        if SLOT_HEADER_STRUCT.unpack_from(self._mm, offset)[1] != seq:
+            return None
+        return json.loads(payload)
+
+    def latest(self):
+        """Most recent record, or None."""
+        seq = self.seq()
+        if seq == 0:
+            return None
+        return self._read_slot(seq - 1)
+
+    def tail(self, n: int) -> list:
+        """Up to n most recent records, oldest first."""
+        seq = self.seq()
+        n = max(0, min(n, seq, self.capacity))
+        records = (self._read_slot(s) for s in range(seq - n, seq))
+        return [r for r in records if r is not None]
+
+    def read_since(self, since_seq: int):
+        """
+        Records appended since since_seq, oldest first, and the seq to pass next time.
+        If the reader fell more than a full ring behind, only the records still held are returned.
+        """
+        seq = self.seq()
+        start = max(since_seq, seq - self.capacity, 0)
+        records = (self._read_slot(s) for s in range(start, seq))
+        return seq, [r for r in records if r is not None]
+
+if __name__ == "__main__":
+    from src.pipeline.helpers import function_view
+    function_view()
@@ -0,0 +1,74 @@
+# src/pipeline/rjnpayload.py
+'''
+Title: rjnpayload.py
+
+Purpose:
+Build the JSON bodies for RJN's projects/<id>/entities/<id>/data endpoint in bounded chunks, instead of one
+{"comments": ..., "data": dict(zip(timestamps, values))} body per series whatever its length.
+
+    - samples are encoded as they are consumed (timestamps and values may be generators), so a catch-up upload
+      of weeks of data never holds more than one chunk's body in memory
+    - a chunk is closed at max_samples samples or max_bytes of JSON, whichever comes first; a sample that
+      cannot fit under max_bytes even alone is sent in a chunk of its own, never dropped
+    - each body is encoded, and gzip'd when compress_min_bytes is set (RJN block: compress_requests_over),
+      exactly once; a retry re-sends the same bytes
+
+    for payload in iter_payloads(timestamps, values, max_samples=2000, max_bytes=512 * 1024):
+        session.post(url, data=payload.body, headers=payload.headers, params=params)
+'''
+import gzip
+import json
+from dataclasses import dataclass, field
+
+DEFAULT_COMMENTS = "Imported from EDS."
+DEFAULT_MAX_SAMPLES = 2000          # 2000 samples: about a week of 5-minute data per request
+DEFAULT_MAX_BYTES = 512 * 1024
+_encode = json.JSONEncoder(ensure_ascii=False).encode
+
+@dataclass(frozen=True)
+class EncodedPayload:
+    body: bytes
+    timestamps: tuple               # the timestamps in this chunk, in order
+    raw_bytes: int                  # JSON size before compression
+    headers: dict = field(default_factory=dict)
+
+    @property
+    def n_samples(self) -> int:
+        return len(self.timestamps)
+
+def _finish(head: bytes, entries: list, timestamps: list, compress_min_bytes):
+    body = head + b",".join(entries) + b"}}"
+    raw_bytes = len(body)
+    headers = {"Content-Type": "application/json"}
+    if compress_min_bytes is not None and raw_bytes >= compress_min_bytes:
+        body = gzip.compress(body, compresslevel=6, mtime=0)
+        headers["Content-Encoding"] = "gzip"
+    return EncodedPayload(body=body, timestamps=tuple(timestamps), raw_bytes=raw_bytes, headers=headers)
+
+def iter_payloads(timestamps, values, comments: str = DEFAULT_COMMENTS, max_samples: int = DEFAULT_MAX_SAMPLES,
+                  max_bytes: int = DEFAULT_MAX_BYTES, compress_min_bytes: int = None):
+    """Yield EncodedPayload chunks covering zip(timestamps, values) in order. A repeated timestamp keeps its last value, as dict(zip()) did."""
+    head = ('{"comments":' + _encode(comments) + ',"data":{').encode("utf-8")
+    entries, chunk_timestamps, positions = [], [], {}
+    size = len(head) + 2
+    for timestamp, value in zip(timestamps, values):
+        entry = (_encode(str(timestamp)) + ":" + _encode(value)).encode("utf-8")
+        if timestamp in positions:  # same key twice in one object: replace, as dict(zip()) does
+            i = positions[timestamp]
+            size += len(entry) - len(entries[i])
+            entries[i] = entry
+            continue
+        if entries and (len(entries) >= max_samples or size + len(entry) + 1 > max_bytes):
+            yield _finish(head, entries, chunk_timestamps, compress_min_bytes)
+            entries, chunk_timestamps, positions = [], [], {}
+            size = len(head) + 2
+        positions[timestamp] = len(entries)
+        entries.append(entry)
+        chunk_timestamps.append(timestamp)
+        size += len(entry) + (1 if len(entries) > 1 else 0)
+    if entries:
+        yield _finish(head, entries, chunk_timestamps, compress_min_bytes)
+
+if __name__ == "__main__":
+    from src.pipeline.helpers import function_view
+    function_view()
@@ -0,0 +1,204 @@
+# src/pipeline/rotation.py
+'''
+Title: rotation.py
+
+Purpose:
+Time-partitioned aggregate storage. Instead of appending to one live_data.csv forever, rows go to one CSV per day
+(or month), closed partitions are compressed with stdlib gzip or lzma, and a small manifest.json records each
+partition's point set, time bounds and row count, so readers can skip partitions they do not need.
+Disk usage and scan cost stay flat over years of operation.
+
+    exports/aggregate/live_data/
+        manifest.json
+        live_data_2025-05-16.csv.gz     closed
+        live_data_2025-05-17.csv        open (today)
+
+    store = PartitionedStore(project_manager.get_aggregate_dir(), "live_data", granularity="day", codec="gzip")
+    store.append(rows)                  # rows need "ts" (epoch) or "timestamp" (ISO)
+    store.rotate()                      # compress every partition older than the current one
+    for row in store.iter_rows(start=since_ts, points={"M100FI"}): ...
+
+Rows that arrive late for a closed partition are appended to its compressed file as a new gzip member / xz stream,
+which both readers handle transparently. A batch that brings a column the partition does not have yet (a new EDS point
+attribute, sanitized rows after raw ones) rewrites that partition once under the widened header, so no column is lost.
+'''
+import csv
+import gzip
+import json
+import lzma
+import os
+import shutil
+from datetime import datetime
+
+from src.pipeline import metrics
+
+GRANULARITIES = {"day": "%Y-%m-%d", "month": "%Y-%m"}
+CODECS = {"gzip": (gzip, ".gz"), "lzma": (lzma, ".xz"), None: (None, "")}
+MANIFEST_FILE_NAME = "manifest.json"
+
+def row_ts(row) -> float:
+    ts = row.get("ts")
+    if ts not in (None, ""):
+        return float(ts)
+    return datetime.fromisoformat(row["timestamp"]).timestamp()
+
+def _open_text(path, codec, mode):
+    module = CODECS[codec][0]
+    if module is None:
+        return open(path, mode, newline="", encoding="utf-8")
+    return module.open(path, mode + "t", newline="", encoding="utf-8")
+
+def _fieldnames(rows) -> list:
+    """Every column of rows, in first-seen order."""
+    return list(dict.fromkeys(key for row in rows for key in row))
+
+class PartitionedStore:
+    def __init__(self, base_dir: str, stem: str = "live_data", granularity: str = "day", codec: str = "gzip"):
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {list(GRANULARITIES)}, got {granularity!r}")
+        if codec not in CODECS:
+            raise ValueError(f"codec must be one of {[c for c in CODECS if c]} or None, got {codec!r}")
+        self.stem = stem
+        self.granularity = granularity
+        self.codec = codec
+        self.dir = os.path.join(base_dir, stem)
+        self.manifest_path = os.path.join(self.dir, MANIFEST_FILE_NAME)
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"granularity": self.granularity, "partitions": {}}
+
+    def _save_manifest(self):
+        os.makedirs(self.dir, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def partition_key(self, ts: float) -> str:
+        return datetime.fromtimestamp(ts).strftime(GRANULARITIES[self.granularity])
+
+    def current_key(self) -> str:
+        return self.partition_key(datetime.now().timestamp())
+
+    def _path(self, entry) -> str:
+        return os.path.join(self.dir, entry["file"])
+
+    def append(self, rows: list) -> int:
+        """Append rows to their partitions. Returns the number of rows written."""
+        if not rows:
+            return 0
+        by_key = {}
+        for row in rows:
+            by_key.setdefault(self.partition_key(row_ts(row)), []).append(row)
+        os.makedirs(self.dir, exist_ok=True)
+        partitions = self.manifest["partitions"]
+        for key, key_rows in by_key.items():
+            entry = partitions.get(key)
+            if entry is None:
+                entry = partitions[key] = {"file": f"{self.stem}_{key}.csv", "codec": None, "closed": False,
+                                           "fieldnames": _fieldnames(key_rows), "rows": 0, "points": [],
+                                           "min_ts": None, "max_ts": None}
+            new_fields = [name for name in _fieldnames(key_rows) if name not in entry["fieldnames"]]
+            if new_fields:
+                self._widen(entry, new_fields)
+            path = self._path(entry)
+            write_header = not os.path.exists(path)
+            with _open_text(path, entry["codec"], "a") as f:
+                writer = csv.DictWriter(f, fieldnames=entry["fieldnames"])
+                if write_header:
+                    writer.writeheader()
+                writer.writerows(key_rows)
+            stamps = [row_ts(row) for row in key_rows]
+            entry["rows"] += len(key_rows)
+            entry["min_ts"] = min(stamps + ([entry["min_ts"]] if entry["min_ts"] is not None else []))
+            entry["max_ts"] = max(stamps + ([entry["max_ts"]] if entry["max_ts"] is not None else []))
+            entry["points"] = sorted(set(entry["points"]) | {str(row.get("iess")) for row in key_rows})
+        self._save_manifest()
+        return len(rows)
+
+    def _widen(self, entry, new_fields: list):
+        """Add columns to a partition: rewrite its file under the widened header; earlier rows get them empty."""
+        fieldnames = entry["fieldnames"] + new_fields
+        path = self._path(entry)
+        if os.path.exists(path):
+            with _open_text(path, entry["codec"], "r") as f_in, _open_text(path + ".tmp", entry["codec"], "w") as f_out:
+                writer = csv.DictWriter(f_out, fieldnames=fieldnames)
+                writer.writeheader()
+                writer.writerows(csv.DictReader(f_in))
+            os.replace(path + ".tmp", path)
+            metrics.inc("pipeline_partitions_widened_total", store=self.stem)
+        entry["fieldnames"] = fieldnames
+
+    def rotate(self, now_key: str = None) -> list:
+        """Compress every open partition older than the current one. Returns the keys that were closed."""
+        now_key = now_key or self.current_key()
+        closed = []
+        for key, entry in sorted(self.manifest["partitions"].items()):
+            if entry["closed"] or key >= now_key:
+                continue
+            if self.codec is not None:
+                source = self._path(entry)
+                target_file = entry["file"] + CODECS[self.codec][1]
+                target = os.path.join(self.dir, target_file)
+                with open(source, "rb") as f_in, CODECS[self.codec][0].open(target + ".tmp", "wb") as f_out:
+                    shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+                os.replace(target + ".tmp", target)
+                os.remove(source)
+                entry["file"], entry["codec"] = target_file, self.codec
+            entry["closed"] = True
+            entry["bytes"] = os.path.getsize(self._path(entry))
+            closed.append(key)
+            metrics.inc("pipeline_partitions_rotated_total", store=self.stem)
+        if closed:
+            self._save_manifest()
+        return closed
+
+    def partitions(self, start: float = None, end: float = None, points=None) -> list:
+        """Manifest entries that may hold rows in [start, end] for any of points, oldest first."""
+        wanted = {str(p) for p in points} if points else None
+        selected = []
+        for key, entry in sorted(self.manifest["partitions"].items()):
+            if start is not None and entry["max_ts"] is not None and entry["max_ts"] < start:
+                continue
+            if end is not None and entry["min_ts"] is not None and entry["min_ts"] > end:
+                continue
+            if wanted is not None and wanted.isdisjoint(entry["points"]):
+                continue
+            selected.append(entry)
+        return selected
+
+    def iter_rows(self, start: float = None, end: float = None, points=None):
+        wanted = {str(p) for p in points} if points else None
+        for entry in self.partitions(start, end, points):
+            with _open_text(self._path(entry), entry["codec"], "r") as f:
+                for row in csv.DictReader(f):  # the header is written once, when the partition is created
+                    if wanted is not None and row.get("iess") not in wanted:
+                        continue
+                    ts = row_ts(row)
+                    if (start is not None and ts < start) or (end is not None and ts > end):
+                        continue
+                    yield row
+
+    def ingest_file(self, csv_path: str, batch_size: int = 10000) -> int:
+        """One-off migration of a flat live_data.csv into partitions. The source file is left in place."""
+        total, batch = 0, []
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    total += self.append(batch)
+                    batch = []
+        total += self.append(batch)
+        return total
+
+    def disk_usage(self) -> int:
+        return sum(os.path.getsize(self._path(e)) for e in self.manifest["partitions"].values() if os.path.exists(self._path(e)))
+
+if __name__ == "__main__":
+    from src.pipeline.helpers import function_view
+    function_view()
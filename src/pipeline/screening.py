@@ -0,0 +1,212 @@
+# src/pipeline/screening.py
+'''
+Title: screening.py
+
+Purpose:
+Explicit, scripted quality screening of samples before they are queued for RJN. Every sample gets a bit mask of
+flags; nothing is dropped or altered, so the raw data stays available and the flags can be reported or uploaded
+alongside it.
+
+    STALE     source ts lags the sample's bucket by more than stale_after_s, or did not advance since the
+              previous sample (EDS kept returning the same reading)
+    FLATLINE  part of a run of at least flatline_samples (near-)identical values
+    SPIKE     step change larger than spike_k times the typical step size: the upper median absolute step of
+              the spike_window steps ending with its hop of spike_hop steps (a rolling window that moves one hop
+              at a time, so the median is computed n / spike_hop times rather than n times)
+    RANGE     below the point's lo_limit or above its hi_limit (optional columns in the query CSV)
+
+All checks are vectorized with numpy when it is installed (poetry install -E screening): a year of 5-minute data
+takes about 20 ms per point, the day or so the hourly upload screens well under a millisecond. Without numpy the
+same checks run in pure Python.
+
+    flags = screen_series(times, values, lo=0.0, hi=120.0)
+    flag_names(flags[i])                              # ['FLATLINE', 'RANGE']
+
+The windows look back, so a caller screening new samples passes the stored history before them as well
+(aggregator.aggregate_and_send screens a day of history ahead of the samples it is about to send).
+'''
+import math
+import statistics
+from dataclasses import dataclass
+
+try:
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+except ImportError:
+    np = None
+
+OK = 0
+STALE = 1
+FLATLINE = 2
+SPIKE = 4
+RANGE = 8
+FLAG_NAMES = {STALE: "STALE", FLATLINE: "FLATLINE", SPIKE: "SPIKE", RANGE: "RANGE"}
+
+@dataclass(frozen=True)
+class ScreeningConfig:
+    step_s: int = 300
+    stale_after_s: int = 900
+    flatline_samples: int = 12          # one hour of 5-minute samples
+    flatline_tolerance: float = 1e-9
+    spike_window: int = 288             # one day of 5-minute samples
+    spike_hop: int = 12                 # the window's median is refreshed hourly
+    spike_k: float = 12.0
+    spike_min_delta: float = 1e-6
+
+DEFAULT_CONFIG = ScreeningConfig()
+
+def flag_names(mask: int) -> list:
+    return [name for bit, name in FLAG_NAMES.items() if mask & bit]
+
+def parse_limit(text):
+    try:
+        return float(text) if text not in (None, "") else None
+    except ValueError:
+        return None
+
+def limits_from_query_rows(query_rows) -> dict:
+    """{(rjn_siteid, rjn_entityid): (lo, hi)} from the optional lo_limit / hi_limit query CSV columns."""
+    limits = {}
+    for row in query_rows:
+        lo, hi = parse_limit(row.get("lo_limit")), parse_limit(row.get("hi_limit"))
+        if lo is not None or hi is not None:
+            limits[(row.get("rjn_siteid"), row.get("rjn_entityid"))] = (lo, hi)
+    return limits
+
+def screen_series(times, values, source_times=None, lo=None, hi=None, config: ScreeningConfig = DEFAULT_CONFIG):
+    """
+    times: bucket epoch seconds, ascending. values: floats. source_times: the EDS ts of each sample, if known.
+    Returns one int flag mask per sample (a numpy array when numpy is available, else a list).
+    """
+    if np is not None:
+        return _screen_numpy(times, values, source_times, lo, hi, config)
+    return _screen_python(list(times), list(values), list(source_times) if source_times is not None else None, lo, hi, config)
+
+def _upper_median(window):
+    return statistics.median_high(window)
+
+def _window_ends(n_steps: int, config: ScreeningConfig) -> list:
+    """End (exclusive) of the rolling window of each hop of steps: the end of the hop, so a step's window holds it."""
+    return [min(start + config.spike_hop, n_steps) for start in range(0, n_steps, config.spike_hop)]
+
+def _screen_numpy(times, values, source_times, lo, hi, config):
+    t = np.asarray(times, dtype=np.float64)
+    v = np.asarray(values, dtype=np.float64)
+    n = len(v)
+    flags = np.zeros(n, dtype=np.uint8)
+    if n == 0:
+        return flags
+
+    def set_flag(mask, bit):
+        # Arithmetic rather than flags[mask] |= bit: boolean fancy indexing is ~20x slower on long series.
+        np.bitwise_or(flags, mask.view(np.uint8) * np.uint8(bit), out=flags)
+
+    dt = np.diff(t)
+    abs_dv = np.abs(np.diff(v))  # shared by the flatline and spike checks
+
+    # STALE
+    stale = np.zeros(n, dtype=bool)
+    if source_times is not None:
+        s = np.asarray(source_times, dtype=np.float64)
+        np.greater(t - s, config.stale_after_s, out=stale)
+        stale[1:] |= s[1:] <= s[:-1]
+    else:
+        np.less_equal(dt, 0, out=stale[1:])
+    set_flag(stale, STALE)
+
+    # FLATLINE: runs of near-identical consecutive values, marked through a difference array
+    if n >= config.flatline_samples:
+        starts = np.flatnonzero(abs_dv > config.flatline_tolerance) + 1
+        starts = np.concatenate(([0], starts))
+        ends = np.append(starts[1:], n)
+        long_runs = (ends - starts) >= config.flatline_samples
+        if long_runs.any():
+            marks = np.zeros(n + 1, dtype=np.int32)
+            np.add.at(marks, starts[long_runs], 1)
+            np.add.at(marks, ends[long_runs], -1)
+            set_flag(np.cumsum(marks[:n]) > 0, FLATLINE)
+
+    # SPIKE: step per nominal interval, against the (upper) median step of its window
+    if n >= 3:
+        step = abs_dv / np.maximum(dt * (1.0 / config.step_s), 1.0)
+        w = config.spike_window
+        ends = np.array(_window_ends(len(step), config))
+        medians = np.empty(len(ends))
+        short = ends < w  # the first windows: all the steps so far
+        for i in np.flatnonzero(short):
+            medians[i] = np.partition(step[:ends[i]], ends[i] // 2)[ends[i] // 2]
+        full = np.flatnonzero(~short)
+        if len(full):
+            windows = sliding_window_view(step, w)
+            for chunk in range(0, len(full), 4096):  # bounded memory: 4096 windows at a time
+                rows = full[chunk:chunk + 4096]
+                medians[rows] = np.partition(windows[ends[rows] - w], w // 2, axis=1)[:, w // 2]
+        threshold = np.repeat(np.maximum(medians, config.spike_min_delta), config.spike_hop)[:len(step)]
+        threshold *= config.spike_k
+        spike = np.zeros(n, dtype=bool)
+        np.greater(step, threshold, out=spike[1:])
+        spike[1:] &= step > config.spike_min_delta
+        set_flag(spike, SPIKE)
+
+    # RANGE
+    out_of_range = np.isnan(v)
+    if lo is not None:
+        out_of_range |= v < lo
+    if hi is not None:
+        out_of_range |= v > hi
+    set_flag(out_of_range, RANGE)
+    return flags
+
+def _screen_python(t, v, s, lo, hi, config):
+    n = len(v)
+    flags = [OK] * n
+    for i in range(n):
+        if s is not None:
+            if t[i] - s[i] > config.stale_after_s or (i and s[i] <= s[i - 1]):
+                flags[i] |= STALE
+        elif i and t[i] <= t[i - 1]:
+            flags[i] |= STALE
+
+    run_start = 0
+    for i in range(1, n + 1):
+        if i == n or abs(v[i] - v[i - 1]) > config.flatline_tolerance:
+            if i - run_start >= config.flatline_samples:
+                for j in range(run_start, i):
+                    flags[j] |= FLATLINE
+            run_start = i
+
+    if n >= 3:
+        step = [abs(v[i + 1] - v[i]) / max((t[i + 1] - t[i]) / config.step_s, 1.0) for i in range(n - 1)]
+        for end in _window_ends(len(step), config):
+            window = step[max(0, end - config.spike_window):end]
+            threshold = config.spike_k * max(_upper_median(window), config.spike_min_delta)
+            for i in range(max(0, end - config.spike_hop), end):
+                if step[i] > threshold and step[i] > config.spike_min_delta:
+                    flags[i + 1] |= SPIKE
+
+    for i, value in enumerate(v):
+        if math.isnan(value) or (lo is not None and value < lo) or (hi is not None and value > hi):
+            flags[i] |= RANGE
+    return flags
+
+def screen_records(records, lo=None, hi=None, config: ScreeningConfig = DEFAULT_CONFIG) -> list:
+    """
+    records: [(bucket epoch, value, source ts), ...] sorted by time, as read from aggregate storage (its ts and
+    source_ts columns). A record without a source ts counts as read on time.
+    """
+    times = [t for t, _, _ in records]
+    source_times = [s if s is not None else t for t, _, s in records]
+    return [int(f) for f in screen_series(times, [value for _, value, _ in records], source_times=source_times,
+                                          lo=lo, hi=hi, config=config)]
+
+def summarize(flags) -> dict:
+    counts = {name: 0 for name in FLAG_NAMES.values()}
+    for mask in flags:
+        for bit, name in FLAG_NAMES.items():
+            if mask & bit:
+                counts[name] += 1
+    return counts
+
+if __name__ == "__main__":
+    from src.pipeline.helpers import function_view
+    function_view()
@@ -0,0 +1,75 @@
+# src/pipeline/sessionpool.py
+'''
+Title: sessionpool.py
+
+Purpose:
+Logged-in EDS and RJN sessions shared across cycles and across projects in one daemon process, so that several
+pipelines pointed at the same server reuse one login and one connection pool instead of logging in every cycle.
+
+    from src.pipeline.sessionpool import SESSION_POOL
+    session = SESSION_POOL.get_eds_session(secrets_dict["eds_apis"]["Maxson"])
+    session_rjn = SESSION_POOL.get_rjn_session(secrets_dict["contractor_apis"]["RJN"])
+
+Sessions are re-used for max_age_s and then logged in again. Call invalidate() after a failure that looks like
+an expired login, and the next get_*_session() call logs in afresh.
+'''
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_AGE_S = 15 * 60
+
+class SessionPool:
+    def __init__(self, max_age_s: float = DEFAULT_MAX_AGE_S, clock=time.monotonic):
+        self.max_age_s = max_age_s
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._sessions = {}  # key -> (created, session)
+
+    @staticmethod
+    def _key(kind, config):
+        return (kind, config["url"], config.get("username") or config.get("client_id"))
+
+    def _get(self, kind, config, login):
+        key = self._key(kind, config)
+        with self._lock:
+            entry = self._sessions.get(key)
+            if entry is not None and self.clock() - entry[0] < self.max_age_s:
+                return entry[1]
+            if entry is not None:
+                entry[1].close()
+            session = login()
+            session.custom_dict = config
+            self._sessions[key] = (self.clock(), session)
+            logger.info(f"SessionPool: logged in to {kind} at {config['url']}")
+            return session
+
+    def get_eds_session(self, config: dict):
+        from src.pipeline.api import eds
+        return self._get("eds", config, lambda: eds.login_to_session(
+            api_url=config["url"], username=config["username"], password=config["password"], config=config))
+
+    def get_rjn_session(self, config: dict):
+        from src.pipeline.api import rjn
+        return self._get("rjn", config, lambda: rjn.login_to_session(
+            api_url=config["url"], client_id=config["client_id"], password=config["password"], config=config))
+
+    def invalidate(self, config: dict):
+        with self._lock:
+            for kind in ("eds", "rjn"):
+                entry = self._sessions.pop(self._key(kind, config), None)
+                if entry is not None:
+                    entry[1].close()
+
+    def close_all(self):
+        with self._lock:
+            for _, session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+    def __len__(self):
+        return len(self._sessions)
+
+SESSION_POOL = SessionPool()
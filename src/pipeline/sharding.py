@@ -0,0 +1,207 @@
+# src/pipeline/sharding.py
+'''
+Title: sharding.py
+
+Purpose:
+Process-sharded live collection for very large point lists. Past a few thousand points a single process running
+collect_live_values (HTTP, JSON decoding, sanitising) is CPU-bound; this spreads the work across cores.
+
+    - The compiled point list is partitioned by server (zd) and then by a stable hash of iess, so a point always
+      lands in the same shard and a shard only ever talks to one server.
+    - Worker processes are long-lived: each keeps its own logged-in sessions (its own SESSION_POOL) across cycles.
+    - Workers ship their rows back as JSON batches in multiprocessing.shared_memory blocks; only the block name
+      goes through the result queue.
+    - The parent is the single writer: it gathers every batch for the cycle, restores query order, and returns
+      the rows for storage.store_live_values(), so the CSV is appended once, by one process.
+
+    from src.pipeline.sharding import ShardedCollector
+    with ShardedCollector(collector.collect_live_values, workers=4) as sharded:
+        data = sharded.collect({"Maxson": secrets_dict["eds_apis"]["Maxson"]}, queries_defaultdictlist)
+
+The daemon turns this on with PIPELINE_SHARD_WORKERS=<n> (unset, 0 or 1: collect in-process as before).
+'''
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import zlib
+from multiprocessing import shared_memory
+
+from src.pipeline import metrics
+
+logger = logging.getLogger(__name__)
+
+WORKERS_ENV = "PIPELINE_SHARD_WORKERS"
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_TIMEOUT_S = 240
+
+def workers_from_env() -> int:
+    try:
+        return max(0, int(os.getenv(WORKERS_ENV, "0")))
+    except ValueError:
+        logger.warning(f"{WORKERS_ENV} must be an integer; sharding disabled.")
+        return 0
+
+def shard_key(iess) -> int:
+    # crc32 rather than hash(): str hashes are salted per process, and shards must be stable across restarts.
+    return zlib.crc32(str(iess).encode("utf-8"))
+
+def plan_shards(queries_by_server: dict, n_shards: int) -> list:
+    """
+    Split {server: rows} into at most n_shards (server, rows) shards. Every server gets at least one shard, the
+    rest are handed out in proportion to point counts, and rows are placed within a server by shard_key(iess).
+    """
+    servers = {server: rows for server, rows in queries_by_server.items() if rows}
+    if not servers:
+        return []
+    total = sum(len(rows) for rows in servers.values())
+    counts = {server: 1 for server in servers}
+    spare = remaining = max(0, n_shards - len(servers))
+    for server, rows in sorted(servers.items(), key=lambda item: -len(item[1])):
+        extra = min(remaining, round(spare * len(rows) / total), len(rows) - 1)
+        counts[server] += extra
+        remaining -= extra
+    shards = []
+    for server, rows in servers.items():
+        buckets = [[] for _ in range(counts[server])]
+        for row in rows:
+            buckets[shard_key(row.get("iess")) % len(buckets)].append(row)
+        shards.extend((server, bucket) for bucket in buckets if bucket)
+    return shards
+
+def _ship_batch(result_queue, cycle_id, rows):
+    payload = json.dumps(rows, separators=(",", ":"), default=str).encode("utf-8")
+    block = shared_memory.SharedMemory(create=True, size=max(1, len(payload)))
+    block.buf[:len(payload)] = payload
+    result_queue.put(("batch", cycle_id, block.name, len(payload)))
+    block.close()  # the parent unlinks it once read
+
+def _worker_main(collect_fn, transform_fn, task_queue, result_queue, batch_size, rate_share=1.0):
+    from src.pipeline import ratelimit
+    from src.pipeline.sessionpool import SESSION_POOL
+    ratelimit.set_share(rate_share) # rate limits are per process: the workers split each host's rate between them
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        cycle_id, config, rows = task
+        try:
+            session = SESSION_POOL.get_eds_session(config)
+            data = collect_fn(session, rows)
+            if not data:
+                SESSION_POOL.invalidate(config)
+            if data and transform_fn is not None:
+                data = transform_fn(data)
+            for start in range(0, len(data), batch_size):
+                _ship_batch(result_queue, cycle_id, data[start:start + batch_size])
+            result_queue.put(("done", cycle_id, len(data), None))
+        except Exception as e:
+            result_queue.put(("error", cycle_id, 0, f"{type(e).__name__}: {e}"))
+    SESSION_POOL.close_all()
+
+def _read_batch(name, size):
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        return json.loads(bytes(block.buf[:size]))
+    finally:
+        block.close()
+        block.unlink()
+
+class ShardedCollector:
+    """
+    Long-lived worker processes for collect_fn(session, rows) -> rows.
+    transform_fn(rows) -> rows, e.g. the sanitizer, also runs in the workers.
+    Both must be module-level functions, since workers are started with the spawn method.
+    """
+    def __init__(self, collect_fn, workers: int = None, transform_fn=None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, timeout_s: float = DEFAULT_TIMEOUT_S):
+        self.collect_fn = collect_fn
+        self.transform_fn = transform_fn
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.timeout_s = timeout_s
+        self._context = multiprocessing.get_context("spawn")
+        self._task_queue = None
+        self._result_queue = None
+        self._processes = []
+        self._cycle_id = 0
+
+    def start(self):
+        if self._processes:
+            return self
+        self._task_queue = self._context.Queue()
+        self._result_queue = self._context.Queue()
+        for index in range(self.workers):
+            process = self._context.Process(
+                target=_worker_main, name=f"pipeline-shard-{index}", daemon=True,
+                args=(self.collect_fn, self.transform_fn, self._task_queue, self._result_queue, self.batch_size,
+                      1.0 / self.workers))
+            process.start()
+            self._processes.append(process)
+        logger.info(f"ShardedCollector started {self.workers} worker processes.")
+        return self
+
+    def collect(self, server_configs: dict, queries_by_server: dict) -> list:
+        """
+        server_configs: {server: secrets entry with url, username, password}
+        queries_by_server: {server: query rows}, as from group_queries_by_api_url()
+        Returns the collected rows of every shard, in the original query order.
+        """
+        self.start()
+        self._cycle_id += 1
+        cycle_id = self._cycle_id
+        queries_by_server = {server: rows for server, rows in queries_by_server.items() if server in server_configs}
+        shards = plan_shards(queries_by_server, self.workers)
+        for server, rows in shards:
+            self._task_queue.put((cycle_id, server_configs[server], rows))
+        metrics.set_gauge("pipeline_shards", len(shards))
+
+        order = {}
+        for rows in queries_by_server.values():
+            for row in rows:
+                order.setdefault(str(row.get("iess")), len(order))
+
+        data, pending = [], len(shards)
+        while pending:
+            try:
+                kind, result_cycle, value, extra = self._result_queue.get(timeout=self.timeout_s)
+            except queue.Empty:
+                logger.error(f"ShardedCollector: {pending} shard(s) did not answer within {self.timeout_s} s.")
+                break
+            if kind == "batch":
+                batch = _read_batch(value, extra)
+                if result_cycle == cycle_id:
+                    data.extend(batch)
+                    metrics.inc("pipeline_shard_batches_total")
+                continue
+            if result_cycle != cycle_id:
+                continue  # a late answer from a cycle that already timed out
+            pending -= 1
+            if kind == "error":
+                logger.error(f"ShardedCollector: shard failed: {extra}")
+                metrics.inc("pipeline_collect_errors_total")
+        metrics.inc("pipeline_points_collected_total", len(data))
+        data.sort(key=lambda row: order.get(str(row.get("iess")), len(order)))
+        return data
+
+    def close(self):
+        if not self._processes:
+            return
+        for _ in self._processes:
+            self._task_queue.put(None)
+        for process in self._processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+if __name__ == "__main__":
+    from src.pipeline.helpers import function_view
+    function_view()
@@ -0,0 +1,186 @@
+# src/pipeline/timebuckets.py
+'''
+Title: timebuckets.py
+
+Purpose:
+Bulk, DST-aware conversion between epoch seconds and the site's local 5-minute bucket strings that RJN receives
+with "incoming_time": "DST". Per-sample datetime.fromtimestamp() + round_time_to_nearest_five_minutes() pays a
+timezone lookup for every sample, and in the fall-back hour two different instants produce the same local string.
+
+An OffsetTable holds the zone's UTC-offset transitions (found once per zone and year range), so a conversion is
+a bisect plus integer arithmetic, with one strftime per local day. Every converted sample also gets a fold flag
+(PEP 495): 0 for the first pass through a repeated local hour, 1 for the second, so duplicates can be resolved
+explicitly with resolve_folds() instead of by whichever row happens to arrive first.
+
+    strings, folds = to_local_buckets(epochs)                  # ["2025-11-02 01:05:00", ...], [0, ..., 1, ...]
+    epochs = from_local_buckets(strings, folds)                # and back; nonexistent spring-forward times
+                                                               # map like fold=0 in zoneinfo
+    records = resolve_folds(records, policy="first")           # one value per local bucket string
+
+The zone is the project's config_time.toml `timezone` key (an IANA name such as "America/Chicago"); without it,
+the host's own local zone, as the per-sample datetime.fromtimestamp() bucketing used. Every function also takes
+tz_name explicitly. On Windows, zoneinfo needs the tzdata package for named zones.
+'''
+import bisect
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+LOCAL_TIMEZONE = "local"            # the host's zone, as datetime.fromtimestamp() sees it
+DEFAULT_STEP_S = 300
+FOLD_POLICIES = ("first", "last", "mean")
+_EPOCH = datetime(1970, 1, 1)
+
+def site_timezone(project_name: str = None) -> str:
+    """The timezone key of the project's config_time.toml, or LOCAL_TIMEZONE if it has none."""
+    try:
+        from src.pipeline.configrationmanager import ConfigurationManager
+        tz_name = ConfigurationManager.instance(project_name).snapshot.config_time.get("timezone")
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"timebuckets: no project configuration ({e}); using the host's local zone")
+        tz_name = None
+    return tz_name or LOCAL_TIMEZONE
+
+def _offset_function(tz_name):
+    """epoch -> UTC offset in seconds, in tz_name."""
+    if tz_name == LOCAL_TIMEZONE:
+        return lambda t: int(datetime.fromtimestamp(t, timezone.utc).astimezone().utcoffset().total_seconds())
+    from zoneinfo import ZoneInfo
+    zone = ZoneInfo(tz_name)
+    return lambda t: int(datetime.fromtimestamp(t, timezone.utc).astimezone(zone).utcoffset().total_seconds())
+
+class OffsetTable:
+    """UTC offsets of one zone between start_year and end_year, as sorted transition instants."""
+    def __init__(self, tz_name: str = LOCAL_TIMEZONE, start_year: int = 2000, end_year: int = 2040):
+        self.tz_name = tz_name
+        self.start_year, self.end_year = start_year, end_year
+        offset_at = _offset_function(tz_name)
+
+        start = int(datetime(start_year, 1, 1, tzinfo=timezone.utc).timestamp())
+        end = int(datetime(end_year + 1, 1, 1, tzinfo=timezone.utc).timestamp())
+        self.transitions = [float("-inf")]   # transitions[i]: first UTC second at which offsets[i] applies
+        self.offsets = [offset_at(start)]
+        # Offsets change a couple of times a year at most: step a day at a time, then bisect to the second.
+        t = start
+        while t < end:
+            nxt = t + 86400
+            if offset_at(nxt) != self.offsets[-1]:
+                lo, hi = t, nxt
+                while hi - lo > 1:
+                    mid = (lo + hi) // 2
+                    if offset_at(mid) == self.offsets[-1]:
+                        lo = mid
+                    else:
+                        hi = mid
+                self.transitions.append(hi)
+                self.offsets.append(offset_at(hi))
+            t = nxt
+        self.max_offset_change = max((abs(b - a) for a, b in zip(self.offsets, self.offsets[1:])), default=0)
+
+    def index_at(self, epoch) -> int:
+        return bisect.bisect_right(self.transitions, epoch) - 1
+
+    def offset_at(self, epoch) -> int:
+        return self.offsets[self.index_at(epoch)]
+
+    def covers(self, epoch) -> bool:
+        return datetime(self.start_year, 1, 1, tzinfo=timezone.utc).timestamp() <= epoch < \
+               datetime(self.end_year + 1, 1, 1, tzinfo=timezone.utc).timestamp()
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+def get_offset_table(tz_name: str = None) -> OffsetTable:
+    tz_name = tz_name or site_timezone()
+    with _tables_lock:
+        if tz_name not in _tables:
+            _tables[tz_name] = OffsetTable(tz_name)
+        return _tables[tz_name]
+
+def to_local_buckets(epochs, step_s: int = DEFAULT_STEP_S, tz_name: str = None, sep: str = " "):
+    """
+    Epoch seconds -> (local bucket strings, folds). Buckets are floored, not rounded, to step_s in local time:
+    hh:04:59 goes to hh:00, the same as round_time_to_nearest_five_minutes(), which floors despite its name.
+    sep goes between date and time: " " for RJN, "T" for isoformat. tz_name defaults to site_timezone().
+    """
+    table = get_offset_table(tz_name)
+    tz_name = table.tz_name
+    transitions, offsets = table.transitions, table.offsets
+    day_strings = {}
+    strings, folds = [], []
+    i = 0
+    for epoch in epochs:
+        epoch = float(epoch)
+        # Samples usually arrive in order: check the current interval before bisecting.
+        if not (transitions[i] <= epoch and (i + 1 == len(transitions) or epoch < transitions[i + 1])):
+            if not table.covers(epoch):
+                raise ValueError(f"{epoch} is outside the offset table for {tz_name} ({table.start_year}-{table.end_year})")
+            i = bisect.bisect_right(transitions, epoch) - 1
+        local = int(epoch + offsets[i])
+        local -= local % step_s
+        day, second = divmod(local, 86400)
+        day_string = day_strings.get(day)
+        if day_string is None:
+            day_string = day_strings[day] = (_EPOCH + timedelta(days=day)).strftime("%Y-%m-%d")
+        hour, rest = divmod(second, 3600)
+        strings.append(f"{day_string}{sep}{hour:02d}:{rest // 60:02d}:{rest % 60:02d}")
+        # fold=1: after a backward transition, at a local time that already occurred before it
+        fold = 0
+        if i and offsets[i] < offsets[i - 1] and epoch - transitions[i] < offsets[i - 1] - offsets[i]:
+            fold = 1
+        folds.append(fold)
+    return strings, folds
+
+def _parse_local_seconds(text: str, day_cache: dict) -> int:
+    day_part, time_part = text[:10], text[11:19]
+    day = day_cache.get(day_part)
+    if day is None:
+        day = day_cache[day_part] = (datetime.strptime(day_part, "%Y-%m-%d") - _EPOCH).days
+    hour, minute, second = time_part.split(":")
+    return day * 86400 + int(hour) * 3600 + int(minute) * 60 + int(second)
+
+def from_local_buckets(strings, folds=None, tz_name: str = None) -> list:
+    """Local bucket strings ("YYYY-MM-DD HH:MM:SS" or with "T") -> epoch seconds. folds picks the pass through a repeated hour."""
+    table = get_offset_table(tz_name)
+    day_cache = {}
+    epochs = []
+    for n, text in enumerate(strings):
+        local = _parse_local_seconds(text, day_cache)
+        fold = folds[n] if folds is not None else 0
+        # Candidates: this local time read with the offset in force on either side of a nearby transition.
+        guess = local - table.offset_at(local)
+        candidates = sorted({local - table.offsets[j] for j in (table.index_at(guess - table.max_offset_change),
+                                                                  table.index_at(guess + table.max_offset_change))})
+        valid = [u for u in candidates if table.offset_at(u) == local - u]
+        if len(valid) == 2:
+            epochs.append(valid[fold])
+        elif valid:
+            epochs.append(valid[0])
+        else:  # in a spring-forward gap: read it with the offset from before the gap, as zoneinfo does for fold=0
+            epochs.append(local - table.offset_at(candidates[0] - table.max_offset_change))
+    return epochs
+
+def resolve_folds(records, policy: str = "first") -> list:
+    """
+    records: [(local string, value, epoch), ...]. Returns [(local string, value), ...] with one entry per string,
+    in string order. Records sharing a string (the repeated fall-back hour, or plain duplicate rows) are resolved
+    by policy: "first" keeps the earliest instant, "last" the latest, "mean" averages them.
+    """
+    if policy not in FOLD_POLICIES:
+        raise ValueError(f"policy must be one of {FOLD_POLICIES}, got {policy!r}")
+    by_string = {}
+    for text, value, epoch in sorted(records, key=lambda record: record[2]):
+        by_string.setdefault(text, []).append(value)
+    if policy == "first":
+        resolved = {text: values[0] for text, values in by_string.items()}
+    elif policy == "last":
+        resolved = {text: values[-1] for text, values in by_string.items()}
+    else:
+        resolved = {text: sum(values) / len(values) for text, values in by_string.items()}
+    return sorted(resolved.items())
+
+if __name__ == "__main__":
+    from src.pipeline.helpers import function_view
+    function_view()
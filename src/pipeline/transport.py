@@ -0,0 +1,134 @@
+# src/pipeline/transport.py
+'''
+Title: transport.py
+
+Purpose:
+One HTTP transport for every client (EdsClient, RjnClient, send_data_to_rjn2, make_request, ping), instead of bare
+requests.Session() objects and module-level requests.post calls:
+
+    - keep-alive connection pools sized per host (pool_maxsize connections to each host the session talks to),
+      so connection setup and TLS handshakes happen once per pool rather than once per call
+    - default (connect, read) timeouts on every request that does not pass its own
+    - certificate verification set once on the session from config (verify_ssl), not per call
+    - gzip/deflate responses requested and decoded
+    - optional gzip compression of request bodies above compress_requests_over bytes (large RJN payloads)
+    - per-host token-bucket rate limits (rate_limit_per_s; src/pipeline/ratelimit.py), shared by every session
+    - per-request timing hooks: every response is observed in pipeline_http_request_duration_seconds,
+      and add_timing_hook() lets callers attach their own
+    - the record/replay layer (src/pipeline/replay.py) still mounts on top, from the environment
+
+Optional keys in a secrets.yaml API block (eds_apis.<name> or contractor_apis.<name>):
+    verify_ssl: false                 # default: false for EDS (self-signed, often plain http), true otherwise
+    timeout: [5, 60]                  # connect, read seconds
+    pool_maxsize: 8
+    compress_requests_over: 65536     # bytes; unset means never compress request bodies
+    rate_limit_per_s: 20              # requests per second to this host, shared process-wide; unset means unlimited
+    rate_limit_burst: 40
+
+    session = make_session(secrets_dict["eds_apis"]["Maxson"], service="eds")
+'''
+import gzip
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.pipeline import metrics
+from src.pipeline import ratelimit
+from src.pipeline import replay
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = (5.0, 30.0)       # connect, read
+DEFAULT_POOL_CONNECTIONS = 4        # distinct hosts kept pooled per session
+DEFAULT_POOL_MAXSIZE = 8            # connections kept alive per host
+HTTP_HISTOGRAM = "pipeline_http_request_duration_seconds"
+DEFAULT_VERIFY = {"eds": False}     # any other service verifies certificates unless told otherwise
+
+class PipelineSession(requests.Session):
+    """A requests.Session with default timeouts, per-host rate limits and optional gzip request bodies."""
+    def __init__(self, timeout=DEFAULT_TIMEOUT, compress_min_bytes: int = None):
+        super().__init__()
+        self.timeout = timeout
+        self.compress_min_bytes = compress_min_bytes
+        self.headers["Accept-Encoding"] = "gzip, deflate"
+
+    def request(self, method, url, rate_limited: bool = True, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        if rate_limited:
+            ratelimit.acquire(url) # no-op for hosts without rate_limit_per_s
+        return super().request(method, url, **kwargs)
+
+    def prepare_request(self, request):
+        prepared = super().prepare_request(request)
+        body = prepared.body
+        if (self.compress_min_bytes is not None and body and len(body) >= self.compress_min_bytes
+                and "Content-Encoding" not in prepared.headers):
+            raw = body.encode("utf-8") if isinstance(body, str) else body
+            prepared.body = gzip.compress(raw, mtime=0)  # mtime=0 keeps identical payloads byte-identical
+            prepared.headers["Content-Encoding"] = "gzip"
+            prepared.headers["Content-Length"] = str(len(prepared.body))
+            metrics.inc("pipeline_http_request_bytes_saved_total", len(raw) - len(prepared.body))
+        return prepared
+
+def _timing_hook(response, *args, **kwargs):
+    host = urlsplit(response.url).hostname or ""
+    metrics.observe(HTTP_HISTOGRAM, response.elapsed.total_seconds(), host=host, method=response.request.method)
+    metrics.inc("pipeline_http_requests_total", host=host, status=str(response.status_code))
+
+def add_timing_hook(session, fn):
+    """fn(response) is called after every response on this session; response.elapsed holds the request time."""
+    session.hooks["response"].append(lambda response, *args, **kwargs: fn(response))
+    return session
+
+def make_session(config: dict = None, service: str = None, **overrides):
+    """
+    A pooled, timed session for one API. config is its secrets.yaml block (or None); keyword overrides win over
+    config keys of the same name.
+    """
+    options = {**(config or {}), **overrides}
+    timeout = options.get("timeout") or DEFAULT_TIMEOUT
+    session = PipelineSession(timeout=tuple(timeout) if isinstance(timeout, list) else timeout,
+                              compress_min_bytes=options.get("compress_requests_over"))
+    session.verify = bool(options.get("verify_ssl", DEFAULT_VERIFY.get(service, True)))
+    adapter = HTTPAdapter(pool_connections=int(options.get("pool_connections", DEFAULT_POOL_CONNECTIONS)),
+                          pool_maxsize=int(options.get("pool_maxsize", DEFAULT_POOL_MAXSIZE)),
+                          pool_block=False)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.hooks["response"].append(_timing_hook)
+    ratelimit.configure_from_config(options) # the bucket belongs to the host, not the session
+    replay.install_from_env(session) # no-op unless PIPELINE_TRANSPORT_MODE is record or replay
+    return session
+
+_shared_session = None
+_shared_lock = threading.Lock()
+
+def get_shared_session():
+    """Process-wide session for callers without one of their own (make_request, ping)."""
+    global _shared_session
+    with _shared_lock:
+        if _shared_session is None:
+            _shared_session = make_session()
+        return _shared_session
+
+def ping(url: str, timeout=(3.0, 5.0), verify: bool = False):
+    """
+    HTTP reachability check through the shared transport: any response, even an error status, counts as up.
+    Returns the round trip in seconds, or None if the host could not be reached.
+    """
+    start = time.perf_counter()
+    try:
+        get_shared_session().head(url, timeout=timeout, verify=verify, allow_redirects=False, rate_limited=False)
+    except requests.exceptions.RequestException as e:
+        logger.info(f"ping {url}: unreachable ({e.__class__.__name__})")
+        return None
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    from src.pipeline.helpers import function_view
+    function_view()
@@ -0,0 +1,145 @@
+# src/pipeline/trendsync.py
+'''
+Title: trendsync.py
+
+Purpose:
+Incremental tabular-trend sync driven by per-point watermarks. demo_get_trabular_trend() asks for every point
+from one get_most_recent_successful_timestamp(api_id) to now, so points that are already current are fetched
+again alongside the lagging ones. Here each point keeps its own watermark (the ts of its last persisted sample):
+
+    - points that are already current are skipped,
+    - points with similar watermarks are grouped into one shared trend/tabular request,
+    - each request covers only the missing tail, and samples at or before a point's own watermark are dropped,
+    - a long tail (after an outage) is fetched in windows of at most max_window_s, oldest first, so no single
+      request is unbounded; with time_budget_s, the run stops between windows and the next run resumes from there,
+    - watermarks advance after each window, only once persist_fn() has returned, and are written atomically
+      (temp file + os.replace), so a crash between fetch and persist re-fetches rather than skips.
+
+Trend traffic stays proportional to new data.
+
+    store = WatermarkStore(project_manager.get_watermarks_file_path())
+    summary = sync_trends(session, "Maxson", query_rows, store, persist_fn)
+    # persist_fn(api_id, {iess: [[ts, value, quality], ...]}) writes the samples wherever they belong
+'''
+import json
+import logging
+import os
+import time
+
+from src.pipeline import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STEP_S = 300
+DEFAULT_GROUP_TOLERANCE_S = 3600    # points whose watermarks lie within this of each other share a request
+DEFAULT_MAX_POINTS_PER_REQUEST = 200
+DEFAULT_INITIAL_LOOKBACK_S = 3600   # for points that have never been synced
+DEFAULT_MAX_WINDOW_S = 6 * 3600     # 72 five-minute samples per point per request
+
+class WatermarkStore:
+    """{api_id: {iess: ts}} in one JSON file, saved atomically."""
+    def __init__(self, path: str):
+        self.path = path
+        self.data = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def get(self, api_id, iess):
+        return self.data.get(api_id, {}).get(str(iess))
+
+    def advance(self, api_id, watermarks: dict):
+        """Move watermarks forward (never back) and save."""
+        points = self.data.setdefault(api_id, {})
+        for iess, ts in watermarks.items():
+            if ts is not None and ts > points.get(str(iess), float("-inf")):
+                points[str(iess)] = int(ts)
+        self.save()
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+def plan_requests(watermarks: dict, endtime: int, step: int = DEFAULT_STEP_S,
+                  tolerance_s: int = DEFAULT_GROUP_TOLERANCE_S, max_points: int = DEFAULT_MAX_POINTS_PER_REQUEST) -> list:
+    """
+    watermarks: {iess: last persisted ts}. Returns [(starttime, [iess, ...]), ...], one entry per tabular request.
+    Points with nothing missing before endtime are left out.
+    """
+    lagging = sorted((ts, iess) for iess, ts in watermarks.items() if ts + step < endtime)
+    requests = []
+    for ts, iess in lagging:
+        if requests and ts - requests[-1][0] <= tolerance_s and len(requests[-1][1]) < max_points:
+            requests[-1][1].append(iess)
+        else:
+            requests.append((ts, [iess]))
+    return [(start + step, points) for start, points in requests]
+
+def split_windows(starttime: int, endtime: int, max_window_s: int = DEFAULT_MAX_WINDOW_S) -> list:
+    """[(start, end), ...] covering starttime..endtime, oldest first, none longer than max_window_s."""
+    return [(start, min(start + max_window_s, endtime)) for start in range(starttime, endtime, max_window_s)]
+
+def sync_trends(session, api_id, query_rows, store: WatermarkStore, persist_fn, endtime: int = None,
+                step: int = DEFAULT_STEP_S, tolerance_s: int = DEFAULT_GROUP_TOLERANCE_S,
+                max_points: int = DEFAULT_MAX_POINTS_PER_REQUEST, initial_lookback_s: int = DEFAULT_INITIAL_LOOKBACK_S,
+                max_window_s: int = DEFAULT_MAX_WINDOW_S, time_budget_s: float = None, clock=time.monotonic) -> dict:
+    from src.pipeline.api.eds import EdsClient, create_tabular_request, wait_for_request_execution_session
+
+    api_url = session.custom_dict["url"]
+    endtime = endtime or int(time.time()) // step * step
+    default_watermark = endtime - initial_lookback_s - step
+    watermarks = {}
+    for row in query_rows:
+        iess = row.get("iess")
+        if iess:
+            stored = store.get(api_id, iess)
+            watermarks[iess] = stored if stored is not None else default_watermark
+
+    plan = plan_requests(watermarks, endtime, step, tolerance_s, max_points)
+    windows = [(start, end, points) for starttime, points in plan for start, end in split_windows(starttime, endtime, max_window_s)]
+    summary = {"requests": 0, "points_synced": 0, "points_current": len(watermarks) - sum(len(p) for _, p in plan),
+               "samples": 0, "requests_deferred": 0}
+    started = clock()
+    synced = set()
+    for i, (start, end, points) in enumerate(windows):
+        if time_budget_s is not None and clock() - started >= time_budget_s:
+            summary["requests_deferred"] = len(windows) - i  # resumed from the stored watermarks next run
+            break
+        request_id = create_tabular_request(session, api_url, start, end, points=points)
+        wait_for_request_execution_session(session, api_url, request_id)
+        results = EdsClient.get_tabular_mod(session, request_id, points)
+        summary["requests"] += 1
+
+        # Drop the overlap for points whose watermark is later than the shared request's start,
+        # and samples on a window boundary that the previous window already returned.
+        samples_by_point = {iess: [s for s in samples if s[0] > watermarks[iess]] for iess, samples in zip(points, results)}
+        persist_fn(api_id, samples_by_point)
+        advanced = {iess: max(s[0] for s in samples) for iess, samples in samples_by_point.items() if samples}
+        store.advance(api_id, advanced)
+        watermarks.update(advanced)
+
+        synced.update(points)
+        summary["samples"] += sum(len(samples) for samples in samples_by_point.values())
+    summary["points_synced"] = len(synced)
+    metrics.inc("pipeline_trend_samples_total", summary["samples"], api=api_id)
+    metrics.inc("pipeline_trend_requests_total", summary["requests"], api=api_id)
+    if watermarks:
+        oldest = min(store.get(api_id, iess) or default_watermark for iess in watermarks)
+        metrics.set_gauge("pipeline_trend_watermark_lag_seconds", endtime - oldest, api=api_id)
+    logger.info(f"trend sync {api_id}: {summary}")
+    return summary
+
+if __name__ == "__main__":
+    from src.pipeline.helpers import function_view
+    function_view()
@@ -0,0 +1,230 @@
+# src/pipeline/verify.py
+'''
+Title: verify.py
+
+Purpose:
+Sampled read-back verification of RJN uploads. The checkpoint file (sent_data.csv: siteid, entityid, timestamp)
+records what RJN accepted, not what it stored. Verifying every sample every hour would double the RJN traffic, so
+each run checks a sample:
+
+    - a fraction of the entities that have checkpointed samples in the lookback
+    - for each, a few of its windows (local hours, or days): windows never verified come first
+    - a window is read back from RJN (rjn.fetch_rjn_data) and compared with local storage by checksum: a digest
+      of the sorted "timestamp=value" pairs, values at the 2 decimals the aggregator sends, repeated local
+      timestamps resolved by the same fold policy
+    - a mismatched window is re-queued: its rows are removed from the checkpoint file, so the next hourly
+      upload sends the whole window again (OverwriteExistingData makes that safe)
+    - a matched window is remembered with its checksum in a small JSON state file, and only verified again
+      if the local data for it changes, or after reverify_after_s
+
+Only checkpointed timestamps are compared: a sample that is stored locally but not yet sent is the upload's
+business, not a delivery failure. Samples RJN holds beyond those (sent some other way) are ignored.
+
+    verifier = UploadVerifier("exports/aggregate/verify_state.json", entity_fraction=0.1, windows_per_entity=2)
+    summary = verifier.run(session_rjn, base_url, data_file=store, checkpoint_file="sent_data.csv", since_ts=...)
+'''
+import csv
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import time
+from collections import defaultdict
+
+from src.pipeline import metrics, timebuckets
+from src.pipeline.rotation import row_ts
+
+logger = logging.getLogger(__name__)
+
+WINDOW_PREFIX = {"hour": 13, "day": 10}  # characters of "YYYY-MM-DD HH:MM:SS" (or "...THH:...") that name the window
+DEFAULT_ENTITY_FRACTION = 0.1
+DEFAULT_WINDOWS_PER_ENTITY = 2
+DEFAULT_REVERIFY_AFTER_S = 7 * 24 * 3600
+
+def window_key(timestamp: str, window: str = "hour") -> str:
+    return timestamp[:WINDOW_PREFIX[window]]
+
+def window_checksum(samples) -> str:
+    """samples: [(timestamp string, value), ...] in any order."""
+    digest = hashlib.blake2b(digest_size=16)
+    for timestamp, value in sorted(samples):
+        digest.update(f"{timestamp}={float(value):.2f};".encode("utf-8"))
+    return digest.hexdigest()
+
+def read_checkpoint(checkpoint_file: str, window: str = "hour") -> dict:
+    """{(siteid, entityid): {window: set(timestamps)}} from the aggregator's checkpoint CSV."""
+    windows = defaultdict(lambda: defaultdict(set))
+    if not checkpoint_file or not os.path.exists(checkpoint_file):
+        return windows
+    with open(checkpoint_file, newline='') as f:
+        for row in csv.reader(f):
+            if len(row) >= 3:
+                siteid, entityid, timestamp = row[:3]
+                windows[(siteid, entityid)][window_key(timestamp, window)].add(timestamp)
+    return windows
+
+def _iter_data_rows(data_file, since_ts=None):
+    if hasattr(data_file, "iter_rows"):  # a src.pipeline.rotation.PartitionedStore
+        yield from data_file.iter_rows(start=since_ts)
+        return
+    with open(data_file, newline='') as f:
+        for row in csv.DictReader(f):
+            if since_ts is None or row_ts(row) >= since_ts:
+                yield row
+
+def local_samples(data_file, wanted: dict, since_ts=None, fold_policy: str = "first") -> dict:
+    """
+    wanted: {(siteid, entityid): set(timestamps)}. Returns {(siteid, entityid): {timestamp: value}} as the
+    aggregator would have sent them: folds resolved by fold_policy, values rounded to 2 decimals.
+    """
+    records = defaultdict(list)
+    for row in _iter_data_rows(data_file, since_ts):
+        key = (row.get("rjn_siteid"), row.get("rjn_entityid"))
+        timestamps = wanted.get(key)
+        if not timestamps or row.get("value") in ("", None):
+            continue
+        timestamp = row.get("timestamp")  # as the aggregator sent and checkpointed it
+        if timestamp and timestamp in timestamps:
+            records[key].append((timestamp, float(row["value"]), row_ts(row)))
+    return {key: {ts: round(value, 2) for ts, value in timebuckets.resolve_folds(recs, fold_policy)}
+            for key, recs in records.items()}
+
+def requeue_windows(checkpoint_file: str, windows, window: str = "hour") -> int:
+    """Remove the checkpoint rows of windows [(siteid, entityid, window), ...]. Returns the number of rows removed."""
+    windows = set(windows)
+    if not windows or not os.path.exists(checkpoint_file):
+        return 0
+    removed = 0
+    tmp_path = f"{checkpoint_file}.tmp"
+    with open(checkpoint_file, newline='') as src, open(tmp_path, "w", newline='') as dst:
+        writer = csv.writer(dst)
+        for row in csv.reader(src):
+            if len(row) >= 3 and (row[0], row[1], window_key(row[2], window)) in windows:
+                removed += 1
+                continue
+            writer.writerow(row)
+    os.replace(tmp_path, checkpoint_file)
+    return removed
+
+class UploadVerifier:
+    def __init__(self, path: str = None, window: str = "hour", entity_fraction: float = DEFAULT_ENTITY_FRACTION,
+                 windows_per_entity: int = DEFAULT_WINDOWS_PER_ENTITY, reverify_after_s: float = DEFAULT_REVERIFY_AFTER_S,
+                 fold_policy: str = "first", seed=None):
+        if window not in WINDOW_PREFIX:
+            raise ValueError(f"window must be one of {tuple(WINDOW_PREFIX)}, got {window!r}")
+        self.path = path
+        self.window = window
+        self.entity_fraction = entity_fraction
+        self.windows_per_entity = windows_per_entity
+        self.reverify_after_s = reverify_after_s
+        self.fold_policy = fold_policy
+        self._rng = random.Random(seed)
+        self._verified = {}  # "siteid|entityid|window" -> [checksum, verified_at]
+        if path:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._verified = json.load(f)
+        except FileNotFoundError:
+            return
+        except ValueError as e:
+            logger.warning(f"UploadVerifier: ignoring unreadable state {self.path}: {e}")
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._verified, f)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _state_key(siteid, entityid, window) -> str:
+        return f"{siteid}|{entityid}|{window}"
+
+    def choose_sample(self, checkpointed: dict) -> dict:
+        """
+        {(siteid, entityid): [window, ...]} for a fraction of the entities, each entity's windows in the order they
+        should be tried: never verified first (shuffled), then the least recently verified.
+        """
+        entities = sorted(checkpointed)
+        if not entities:
+            return {}
+        n_entities = min(len(entities), max(1, math.ceil(self.entity_fraction * len(entities))))
+        sample = {}
+        for key in self._rng.sample(entities, n_entities):
+            fresh = [w for w in checkpointed[key] if self._state_key(*key, w) not in self._verified]
+            self._rng.shuffle(fresh)
+            seen = sorted((w for w in checkpointed[key] if self._state_key(*key, w) in self._verified),
+                          key=lambda w: self._verified[self._state_key(*key, w)][1])
+            sample[key] = fresh + seen
+        return sample
+
+    def run(self, session, base_url: str, data_file, checkpoint_file: str, since_ts: float = None, now: float = None) -> dict:
+        from src.pipeline.api.rjn import fetch_rjn_data
+        now = time.time() if now is None else now
+        checkpointed = read_checkpoint(checkpoint_file, self.window)
+        if since_ts is not None:  # windows older than the lookback can no longer be re-sent from storage
+            oldest = window_key(timebuckets.to_local_buckets([since_ts])[0][0], self.window)
+            checkpointed = {key: {w: ts for w, ts in windows.items() if w.replace("T", " ") >= oldest}
+                            for key, windows in checkpointed.items()}
+            checkpointed = {key: windows for key, windows in checkpointed.items() if windows}
+        sample = self.choose_sample(checkpointed)
+        wanted = {key: set().union(*(checkpointed[key][w] for w in windows)) for key, windows in sample.items()}
+        local = local_samples(data_file, wanted, since_ts, self.fold_policy)
+
+        summary = {"entities": len(sample), "windows": 0, "matched": 0, "mismatched": 0, "errors": 0, "requeued_rows": 0}
+        mismatched = []
+        for (siteid, entityid), windows in sample.items():
+            checked = 0
+            for window in windows:
+                if checked >= self.windows_per_entity:
+                    break
+                timestamps = checkpointed[(siteid, entityid)][window]
+                expected = {ts: value for ts, value in local.get((siteid, entityid), {}).items() if ts in timestamps}
+                if not expected:
+                    continue  # no longer in local storage: nothing to compare against
+                local_checksum = window_checksum(expected.items())
+                state_key = self._state_key(siteid, entityid, window)
+                verified = self._verified.get(state_key)
+                if verified and verified[0] == local_checksum and now - verified[1] < self.reverify_after_s:
+                    continue  # verified, and nothing local has changed since
+                checked += 1
+                summary["windows"] += 1
+                try:
+                    remote = fetch_rjn_data(session, base_url, siteid, entityid, start=min(timestamps), end=max(timestamps))
+                except Exception as e:
+                    logger.warning(f"UploadVerifier: read-back of {state_key} failed: {e}")
+                    summary["errors"] += 1
+                    metrics.inc("pipeline_verify_windows_total", outcome="error")
+                    continue
+                remote_samples = [(ts, value) for ts, value in remote.items() if ts in expected and value is not None]
+                if window_checksum(remote_samples) == local_checksum:
+                    self._verified[state_key] = [local_checksum, now]
+                    summary["matched"] += 1
+                    metrics.inc("pipeline_verify_windows_total", outcome="match")
+                else:
+                    self._verified.pop(state_key, None)
+                    mismatched.append((siteid, entityid, window))
+                    summary["mismatched"] += 1
+                    metrics.inc("pipeline_verify_windows_total", outcome="mismatch")
+                    logger.warning(f"UploadVerifier: {state_key} differs from local storage "
+                                   f"({len(remote_samples)} of {len(expected)} samples read back); re-queued")
+
+        summary["requeued_rows"] = requeue_windows(checkpoint_file, mismatched, self.window)
+        metrics.inc("pipeline_verify_requeued_rows_total", summary["requeued_rows"])
+        # Forget windows that have left the checkpoint file, so the state stays the size of the lookback.
+        live = {self._state_key(*key, w) for key, windows in checkpointed.items() for w in windows}
+        self._verified = {key: value for key, value in self._verified.items() if key in live}
+        if self.path:
+            self.save()
+        return summary
+
+if __name__ == "__main__":
+    from src.pipeline.helpers import function_view
+    function_view()
@@ -0,0 +1,8 @@
+# tests/conftest.py
+# The code imports 'src.pipeline' and 'projects' from the repository root, as the CLI and daemon do.
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
@@ -0,0 +1,59 @@
+# tests/test_dedup.py
+import pytest
+
+from src.pipeline.dedup import DedupIndex
+from projects.eds_to_rjn.scripts import daemon_runner
+
+T0 = 1747400000.0 // 300 * 300  # start of a 5-minute bucket
+
+class FakeProjectManager:
+    def __init__(self, aggregate_dir):
+        self.aggregate_dir = str(aggregate_dir)
+
+    def get_aggregate_dir(self):
+        return self.aggregate_dir
+
+@pytest.fixture
+def project_manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(daemon_runner, "_dedup_indexes", {})
+    return FakeProjectManager(tmp_path)
+
+def row(iess, ts):
+    return {"iess": iess, "ts": ts, "value": 1.0}
+
+def test_buckets_floor():
+    index = DedupIndex()
+    index.mark([row("M100FI", T0 + 299)])
+    assert index.seen("M100FI", T0)
+    assert not index.seen("M100FI", T0 + 300)
+
+def test_filter_new_drops_seen_and_repeated_rows():
+    index = DedupIndex()
+    index.mark([row("M100FI", T0)])
+    fresh = index.filter_new([row("M100FI", T0 + 10), row("FI8001", T0), row("FI8001", T0 + 20)], mark=False)
+    assert fresh == [row("FI8001", T0)]
+    assert not index.seen("FI8001", T0)  # mark=False: recorded only once stored
+
+def test_marks_survive_a_restart(tmp_path):
+    path = str(tmp_path / "dedup_index_live_data.log")
+    DedupIndex(path).mark([row("M100FI", T0)])
+    assert DedupIndex(path).seen("M100FI", T0)
+
+def test_each_store_has_its_own_index(project_manager):
+    live = daemon_runner.get_dedup_index(project_manager, "live_data")
+    trend = daemon_runner.get_dedup_index(project_manager, "trend_data")
+    assert live is not trend
+    assert daemon_runner.get_dedup_index(project_manager) is live
+    assert live.path != trend.path
+
+def test_trend_mark_does_not_drop_a_later_live_row_in_the_same_bucket(project_manager):
+    # A sample stored in another store (here a trend_data store) marks its bucket first...
+    trend = daemon_runner.get_dedup_index(project_manager, "trend_data")
+    trend.mark(trend.filter_new([row("M100FI", T0 + 5)], mark=False))
+    # ...then a live reading from that bucket must still reach live_data, the store the hourly upload reads.
+    live = daemon_runner.get_dedup_index(project_manager, "live_data")
+    assert live.filter_new([row("M100FI", T0 + 120)], mark=False) == [row("M100FI", T0 + 120)]
+    # The same holds after a restart, when both indexes are reloaded from their logs.
+    daemon_runner._dedup_indexes.clear()
+    assert daemon_runner.get_dedup_index(project_manager, "live_data").filter_new([row("M100FI", T0 + 120)]) == [row("M100FI", T0 + 120)]
+    assert daemon_runner.get_dedup_index(project_manager, "trend_data").seen("M100FI", T0)
@@ -0,0 +1,82 @@
+# tests/test_host.py
+import sys
+import types
+
+import pytest
+import schedule
+
+from src.pipeline import metrics
+from src.pipeline.daemon import host as host_module
+from src.pipeline.daemon.host import ProjectHost
+from projects.eds_to_rjn.scripts import daemon_runner
+
+@pytest.fixture(autouse=True)
+def quiet(monkeypatch):
+    statuses = []
+    monkeypatch.setattr(host_module, "update_status", lambda state, message: statuses.append((state, message)))
+    monkeypatch.setattr(metrics, "write_textfile", lambda *args, **kwargs: None)
+    metrics.REGISTRY.reset()
+    return statuses
+
+def fake_project(monkeypatch, name, setup_schedules=None):
+    module = types.ModuleType(f"projects.{name}.scripts.daemon_runner")
+    module.calls = []
+    if setup_schedules is not None:
+        module.setup_schedules = setup_schedules
+    monkeypatch.setitem(sys.modules, module.__name__, module)
+    return module
+
+def test_each_project_registers_on_the_shared_scheduler(monkeypatch):
+    def setup_a(scheduler):
+        scheduler.every(5).minutes.do(a.calls.append, "live")
+        scheduler.every().hour.at(":00").do(a.calls.append, "hourly")
+    def setup_b(scheduler):
+        scheduler.every(1).minutes.do(b.calls.append, "probe")
+    a = fake_project(monkeypatch, "fake_a", setup_a)
+    b = fake_project(monkeypatch, "fake_b", setup_b)
+    shared = schedule.Scheduler()
+    host = ProjectHost(["fake_a", "fake_b"], scheduler=shared)
+    assert list(host.load_projects()) == ["fake_a", "fake_b"]
+    assert len(shared.jobs) == 3
+    shared.run_all()
+    assert (a.calls, b.calls) == (["live", "hourly"], ["probe"])
+
+def test_projects_without_a_daemon_runner_or_setup_schedules_are_skipped(monkeypatch):
+    fake_project(monkeypatch, "fake_no_setup")
+    host = ProjectHost(["fake_missing_project", "fake_no_setup"], scheduler=schedule.Scheduler())
+    assert host.load_projects() == {}
+    assert host.scheduler.jobs == []
+
+def test_a_failing_cycle_does_not_stop_the_other_projects(monkeypatch, quiet):
+    def broken_cycle():
+        raise RuntimeError("EDS login refused")
+    fake_project(monkeypatch, "fake_broken", lambda scheduler: scheduler.every(5).minutes.do(broken_cycle))
+    ok = fake_project(monkeypatch, "fake_ok", lambda scheduler: scheduler.every(5).minutes.do(ok.calls.append, "live"))
+    host = ProjectHost(["fake_broken", "fake_ok"], scheduler=schedule.Scheduler())
+    host.load_projects()
+    host.scheduler.run_all()
+    host.scheduler.run_all()
+    assert ok.calls == ["live", "live"]
+    assert quiet == [("error", "fake_broken: EDS login refused")] * 2
+    assert len(host.scheduler.jobs) == 2  # the failing job stays scheduled
+
+def test_run_guarded_swallows_and_reports(quiet):
+    host = ProjectHost([], scheduler=schedule.Scheduler())
+    host.run_guarded("fake", lambda: 1 / 0)
+    assert quiet == [("error", "fake: division by zero")]
+    host.run_guarded("fake", lambda: None)
+    assert len(quiet) == 1
+
+def test_a_hosted_cycle_is_counted_once(monkeypatch):
+    def failing_cycle():
+        raise RuntimeError("down")
+    def setup(scheduler):
+        scheduler.every(5).minutes.do(daemon_runner.run_instrumented, "live", lambda: None)
+        scheduler.every(5).minutes.do(daemon_runner.run_instrumented, "hourly", failing_cycle)
+    fake_project(monkeypatch, "fake_instrumented", setup)
+    host = ProjectHost(["fake_instrumented"], scheduler=schedule.Scheduler())
+    host.load_projects()
+    host.scheduler.run_all()
+    cycles = {key: value for key, value in metrics.REGISTRY.counters.items() if "cycles" in key[0]}
+    assert cycles == {("pipeline_cycles_total", (("cycle", "live"), ("outcome", "ok"))): 1,
+                      ("pipeline_cycles_total", (("cycle", "hourly"), ("outcome", "error"))): 1}
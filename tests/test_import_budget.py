@@ -0,0 +1,43 @@
+# tests/test_import_budget.py
+'''
+Starting the dispatcher (pipeline --help, pipeline <command>) must stay cheap: the heavy dependencies are imported
+lazily by the command that needs them. The wall-clock budget is only checked where PIPELINE_IMPORT_BUDGET_MS is
+set (a benchmark machine); the heavy-module check runs everywhere.
+'''
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src.pipeline import cli
+
+def test_dispatcher_import_pulls_in_no_heavy_modules():
+    # Diffed within one interpreter, so whatever site or a .pth file imported at startup does not count.
+    code = ("import json, sys; before = set(sys.modules); import src.pipeline.cli as cli; "
+            "print(json.dumps(sorted(m for m in set(sys.modules) - before if m.split('.')[0] in cli.HEAVY_MODULES)))")
+    completed = subprocess.run([sys.executable, "-c", code], cwd=cli.ROOT, capture_output=True, text=True, check=True)
+    assert json.loads(completed.stdout) == []
+
+def test_heavy_import_is_caught():
+    # transport.py imports requests at module level: the same check must see it.
+    total_ms, modules, heavy = cli.measure_import("src.pipeline.transport")
+    assert "requests" in heavy
+    assert cli.check_import_budget(["--module", "src.pipeline.transport", "--budget-ms", "1e9"]) == 1
+
+def test_startup_imports_are_left_out():
+    # encodings is imported by every interpreter before any code runs.
+    total_ms, modules, heavy = cli.measure_import("encodings")
+    assert (modules, heavy) == ([], [])
+    assert cli.check_import_budget(["--module", "encodings", "--budget-ms", "1e9"]) == 0
+
+def test_dispatcher_passes_its_own_check():
+    assert cli.check_import_budget(["--budget-ms", "1e9"]) == 0
+
+@pytest.mark.skipif("PIPELINE_IMPORT_BUDGET_MS" not in os.environ,
+                    reason="wall-clock budget; set PIPELINE_IMPORT_BUDGET_MS on a machine with stable timings")
+def test_dispatcher_import_within_budget():
+    budget_ms = float(os.environ["PIPELINE_IMPORT_BUDGET_MS"])
+    total_ms = min(cli.measure_import()[0] for _ in range(3))  # best of three
+    assert total_ms <= budget_ms, f"importing the dispatcher took {total_ms:.1f} ms (budget {budget_ms:.1f} ms)"
@@ -0,0 +1,108 @@
+# tests/test_ratelimit.py
+import asyncio
+
+import pytest
+
+from src.pipeline import ratelimit
+
+class FakeClock:
+    """Injected as both clock and sleep: sleeping advances time instead of waiting."""
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    monkeypatch.setattr(ratelimit, "_buckets", {})
+    monkeypatch.setattr(ratelimit, "_share", 1.0)
+
+def test_burst_then_paced(clock):
+    bucket = ratelimit.TokenBucket(rate=10, burst=3, clock=clock, sleep=clock.sleep)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Each later caller queues behind the one before it: 0.1 s apart at 10/s.
+    assert [round(bucket.reserve(), 9) for _ in range(3)] == [0.1, 0.2, 0.3]
+
+def test_refill_is_capped_at_burst(clock):
+    bucket = ratelimit.TokenBucket(rate=10, burst=3, clock=clock, sleep=clock.sleep)
+    for _ in range(3):
+        bucket.reserve()
+    clock.now += 0.15  # 1.5 tokens back
+    assert bucket.reserve() == 0.0
+    assert round(bucket.reserve(), 9) == 0.05
+    clock.now += 3600  # a long idle period refills to burst, not beyond
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() > 0
+
+def test_acquire_sleeps_for_the_reserved_wait(clock):
+    bucket = ratelimit.TokenBucket(rate=4, burst=1, clock=clock, sleep=clock.sleep)
+    start = clock.now
+    for _ in range(5):
+        bucket.acquire()
+    assert clock.slept == [0.25] * 4
+    assert clock.now - start == pytest.approx(1.0)
+
+def test_reconfigure_keeps_debt_and_trims_tokens(clock):
+    bucket = ratelimit.TokenBucket(rate=10, burst=10, clock=clock, sleep=clock.sleep)
+    bucket.configure(rate=1, burst=2)
+    assert [bucket.reserve() for _ in range(2)] == [0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(1.0)
+
+def test_invalid_rate():
+    with pytest.raises(ValueError):
+        ratelimit.TokenBucket(rate=0)
+
+def test_hosts_are_isolated_and_sessions_share_a_host():
+    ratelimit.configure("http://eds.example:43084/api/v1/", rate=1, burst=1)
+    assert ratelimit.get_bucket("http://eds.example:43084/api/v1/points") is ratelimit.get_bucket("http://EDS.example:43084/other")
+    assert ratelimit.get_bucket("http://eds.example:8080/") is None  # another port is another service
+    assert ratelimit.get_bucket("https://rjn.example/") is None
+    assert ratelimit.acquire("https://rjn.example/data") == 0.0  # unlimited hosts are never paced
+    assert ratelimit.acquire("http://eds.example:43084/a") == 0.0
+    assert ratelimit.get_bucket("http://eds.example:43084/").reserve() > 0  # that host's bucket is now empty
+    assert ratelimit.acquire("https://rjn.example/data") == 0.0
+
+def test_default_ports():
+    assert ratelimit.host_key("https://rjn.example/v1") == "rjn.example:443"
+    assert ratelimit.host_key("http://rjn.example/v1") == "rjn.example:80"
+
+def test_configure_from_config_and_share():
+    assert ratelimit.configure_from_config({}) is None
+    bucket = ratelimit.configure_from_config({"url": "http://eds.example/", "rate_limit_per_s": 20, "rate_limit_burst": 40})
+    assert (bucket.rate, bucket.burst) == (20, 40)
+    ratelimit.set_share(0.25)  # e.g. one of four sharded worker processes
+    assert (bucket.rate, bucket.burst) == (5, 10)
+    assert ratelimit.limits() == {"eds.example:80": (20.0, 40.0)}
+    ratelimit.configure("http://eds.example/", None)
+    assert ratelimit.get_bucket("http://eds.example/") is None
+
+def test_async_callers_share_the_bucket(monkeypatch):
+    waits = []
+    async def fake_sleep(seconds):
+        waits.append(seconds)
+    monkeypatch.setattr(ratelimit.asyncio, "sleep", fake_sleep)
+    clock = FakeClock()
+    bucket = ratelimit.TokenBucket(rate=2, burst=1, clock=clock, sleep=clock.sleep)
+    async def run():
+        return await asyncio.gather(*(bucket.acquire_async() for _ in range(3)))
+    assert asyncio.run(run()) == [0.0, 0.5, 1.0]
+    assert waits == [0.5, 1.0]
+
+def test_a_reload_without_the_key_removes_the_limit():
+    config = {"url": "http://eds.example:43084/api/v1/", "rate_limit_per_s": 5}
+    ratelimit.configure_from_config(config)
+    assert ratelimit.limits() == {"eds.example:43084": (5.0, 5.0)}
+    del config["rate_limit_per_s"]  # removed from secrets.yaml, picked up by the next make_session()
+    assert ratelimit.configure_from_config(config) is None
+    assert ratelimit.limits() == {}
+    assert ratelimit.acquire("http://eds.example:43084/api/v1/points") == 0.0
@@ -0,0 +1,72 @@
+# tests/test_ringbuffer.py
+import pytest
+
+from src.pipeline.ringbuffer import HEADER_SIZE, SLOT_HEADER_STRUCT, RingBuffer
+
+@pytest.fixture
+def ring(tmp_path):
+    ring = RingBuffer(str(tmp_path / "ring.bin"), capacity=4, slot_size=64)
+    yield ring
+    ring.close()
+
+def test_empty_ring(ring):
+    assert ring.seq() == 0
+    assert ring.latest() is None
+    assert ring.tail(3) == []
+    assert ring.read_since(0) == (0, [])
+
+def test_append_and_read_back(ring):
+    for i in range(3):
+        assert ring.append({"i": i}) == i
+    assert ring.latest() == {"i": 2}
+    assert ring.tail(2) == [{"i": 1}, {"i": 2}]
+    assert ring.read_since(1) == (3, [{"i": 1}, {"i": 2}])
+
+def test_wraparound_keeps_the_newest_capacity_records(ring):
+    for i in range(10):
+        ring.append({"i": i})
+    assert ring.seq() == 10
+    assert ring.latest() == {"i": 9}
+    assert ring.tail(100) == [{"i": i} for i in range(6, 10)]
+    # A reader that fell more than a ring behind gets what is still held, and the seq to resume from.
+    assert ring.read_since(0) == (10, [{"i": i} for i in range(6, 10)])
+    assert ring.read_since(8) == (10, [{"i": 8}, {"i": 9}])
+
+def test_torn_slot_is_skipped(ring):
+    for i in range(4):
+        ring.append({"i": i})
+    # What a reader sees while the writer is refilling slot 1: the slot is invalidated before it is written.
+    ring._open()
+    SLOT_HEADER_STRUCT.pack_into(ring._mm, HEADER_SIZE + 1 * ring.slot_size, 0, 2**64 - 1)
+    assert ring.tail(4) == [{"i": 0}, {"i": 2}, {"i": 3}]
+    assert ring.read_since(0) == (4, [{"i": 0}, {"i": 2}, {"i": 3}])
+
+def test_slot_from_a_previous_lap_is_skipped(ring):
+    for i in range(5):
+        ring.append({"i": i})
+    # Slot 0 now holds seq 4; asking for seq 0 must not return it.
+    assert ring._read_slot(0) is None
+    assert ring._read_slot(4) == {"i": 4}
+
+def test_oversized_record_is_rejected(ring):
+    with pytest.raises(ValueError):
+        ring.append({"message": "x" * 100})
+    assert ring.seq() == 0
+
+def test_reader_takes_sizes_from_the_file(tmp_path):
+    path = str(tmp_path / "ring.bin")
+    reader = RingBuffer(path, create=False)
+    assert reader.seq() == 0 and reader.latest() is None  # no file yet: empty, and nothing is created
+    assert not (tmp_path / "ring.bin").exists()
+    with RingBuffer(path, capacity=4, slot_size=64) as writer:
+        for i in range(6):
+            writer.append({"i": i})
+        assert reader.tail(10) == [{"i": i} for i in range(2, 6)]
+        assert (reader.capacity, reader.slot_size) == (4, 64)
+    reader.close()
+
+def test_not_a_ring_file(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"\0" * 512)
+    with pytest.raises(ValueError):
+        RingBuffer(str(path), create=False).seq()
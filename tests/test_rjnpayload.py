@@ -0,0 +1,106 @@
+# tests/test_rjnpayload.py
+import gzip
+import json
+
+import pytest
+import requests
+
+from src.pipeline import rjnpayload
+from src.pipeline.api import rjn
+
+TIMESTAMPS = [f"2025-01-01 00:{m:02d}:00" for m in range(0, 60, 5)]
+VALUES = [round(1.5 * i, 2) for i in range(len(TIMESTAMPS))]
+
+def decode(payload):
+    body = gzip.decompress(payload.body) if payload.headers.get("Content-Encoding") == "gzip" else payload.body
+    return json.loads(body)
+
+def test_empty_input_yields_no_payload():
+    assert list(rjnpayload.iter_payloads([], [])) == []
+
+def test_one_payload_matches_the_old_body():
+    payloads = list(rjnpayload.iter_payloads(TIMESTAMPS, VALUES))
+    assert len(payloads) == 1
+    assert decode(payloads[0]) == {"comments": rjnpayload.DEFAULT_COMMENTS, "data": dict(zip(TIMESTAMPS, VALUES))}
+    assert payloads[0].timestamps == tuple(TIMESTAMPS)
+    assert payloads[0].headers == {"Content-Type": "application/json"}
+
+def test_payload_exactly_at_the_byte_limit_is_not_split():
+    size = len(next(rjnpayload.iter_payloads(TIMESTAMPS[:2], VALUES[:2])).body)
+    at_limit = list(rjnpayload.iter_payloads(TIMESTAMPS[:2], VALUES[:2], max_bytes=size))
+    assert [len(p.body) for p in at_limit] == [size]
+    one_under = list(rjnpayload.iter_payloads(TIMESTAMPS[:2], VALUES[:2], max_bytes=size - 1))
+    assert [p.n_samples for p in one_under] == [1, 1]
+    assert all(len(p.body) <= size - 1 for p in one_under)
+
+def test_row_larger_than_the_limit_goes_alone():
+    # It cannot be split, so it is sent by itself rather than dropped; its neighbours still respect the limit.
+    comments = "c"
+    small = len(next(rjnpayload.iter_payloads(TIMESTAMPS[:1], [1.0], comments=comments)).body)
+    huge = 1 / 3  # "0.3333333333333333": 15 bytes longer than "1.0", so this row alone is over the limit
+    payloads = list(rjnpayload.iter_payloads(TIMESTAMPS[:3], [1.0, huge, 2.0], comments=comments, max_bytes=small + 5))
+    assert [p.timestamps for p in payloads] == [(TIMESTAMPS[0],), (TIMESTAMPS[1],), (TIMESTAMPS[2],)]
+    assert len(payloads[1].body) > small + 5
+    assert decode(payloads[1])["data"] == {TIMESTAMPS[1]: huge}
+
+def test_sample_limit_and_order():
+    payloads = list(rjnpayload.iter_payloads(TIMESTAMPS, VALUES, max_samples=5))
+    assert [p.n_samples for p in payloads] == [5, 5, 2]
+    assert sum((p.timestamps for p in payloads), ()) == tuple(TIMESTAMPS)
+
+def test_chunks_add_up_to_dict_zip_including_repeated_timestamps():
+    timestamps = TIMESTAMPS + TIMESTAMPS[:2]
+    values = VALUES + [-1.0, -2.0]
+    merged = {}
+    for payload in rjnpayload.iter_payloads(timestamps, values, max_bytes=150):
+        assert len(payload.body) <= 150
+        merged.update(decode(payload)["data"])
+    assert merged == dict(zip(timestamps, values))
+
+def test_gzip_only_above_the_threshold_and_deterministic():
+    small, = rjnpayload.iter_payloads(TIMESTAMPS[:1], VALUES[:1], compress_min_bytes=10_000)
+    assert "Content-Encoding" not in small.headers
+    first, = rjnpayload.iter_payloads(TIMESTAMPS, VALUES, compress_min_bytes=0)
+    second, = rjnpayload.iter_payloads(TIMESTAMPS, VALUES, compress_min_bytes=0)
+    assert first.headers["Content-Encoding"] == "gzip"
+    assert first.body == second.body  # mtime=0: a retry or a re-run sends identical bytes
+    assert decode(first)["data"] == dict(zip(TIMESTAMPS, VALUES))
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.text = ""
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"HTTP {self.status_code}")
+
+class FakeSession:
+    def __init__(self, statuses, **custom):
+        self.statuses = list(statuses)
+        self.bodies = []
+        self.custom_dict = custom
+
+    def post(self, url, data, headers, params):
+        self.bodies.append(data)
+        return FakeResponse(self.statuses.pop(0))
+
+@pytest.fixture(autouse=True)
+def no_retry_sleep(monkeypatch):
+    monkeypatch.setattr(rjn.time, "sleep", lambda s: None)
+
+def test_send_reports_only_accepted_chunks():
+    session = FakeSession([200, 400], max_payload_samples=5)
+    sent = rjn.send_data_to_rjn2(session, "http://rjn", "p", 1, TIMESTAMPS, VALUES)
+    assert sent == TIMESTAMPS[:5]  # the second chunk failed, and the third was not attempted
+    assert len(session.bodies) == 2
+
+def test_send_retries_with_the_same_bytes():
+    session = FakeSession([503, 200])
+    assert rjn.send_data_to_rjn2(session, "http://rjn", "p", 1, TIMESTAMPS, VALUES) == TIMESTAMPS
+    assert len(session.bodies) == 2 and session.bodies[0] is session.bodies[1]
+
+def test_send_nothing():
+    session = FakeSession([])
+    assert rjn.send_data_to_rjn2(session, "http://rjn", "p", 1, [], []) == []
+    assert session.bodies == []
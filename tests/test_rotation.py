@@ -0,0 +1,127 @@
+# tests/test_rotation.py
+import csv
+import gzip
+import json
+import lzma
+import os
+from datetime import datetime
+
+import pytest
+
+from src.pipeline.rotation import PartitionedStore, row_ts
+
+DAY1 = datetime(2025, 5, 16, 12, 0).timestamp()
+DAY2 = datetime(2025, 5, 17, 12, 0).timestamp()
+DAY3 = datetime(2025, 5, 18, 12, 0).timestamp()
+
+def rows(ts, points=("M100FI", "FI8001"), value="1.5"):
+    return [{"ts": ts, "iess": point, "value": value} for point in points]
+
+def test_row_ts_prefers_epoch_and_falls_back_to_iso():
+    assert row_ts({"ts": "1747400000", "timestamp": "2000-01-01T00:00:00"}) == 1747400000.0
+    assert row_ts({"ts": "", "timestamp": "2025-05-16T12:00:00"}) == DAY1
+    assert row_ts({"timestamp": "2025-05-16T12:00:00"}) == DAY1
+
+def test_invalid_arguments(tmp_path):
+    with pytest.raises(ValueError):
+        PartitionedStore(str(tmp_path), granularity="week")
+    with pytest.raises(ValueError):
+        PartitionedStore(str(tmp_path), codec="zstd")
+
+def test_append_splits_rows_by_partition(tmp_path):
+    store = PartitionedStore(str(tmp_path))
+    assert store.append(rows(DAY1) + rows(DAY2, points=("M100FI",))) == 3
+    assert store.append([]) == 0
+    assert sorted(os.listdir(store.dir)) == ["live_data_2025-05-16.csv", "live_data_2025-05-17.csv", "manifest.json"]
+    entry = store.manifest["partitions"]["2025-05-16"]
+    assert (entry["rows"], entry["points"], entry["min_ts"], entry["max_ts"]) == (2, ["FI8001", "M100FI"], DAY1, DAY1)
+    store.append(rows(DAY1 + 60))
+    with open(os.path.join(store.dir, "live_data_2025-05-16.csv"), newline="") as f:
+        assert len(list(csv.DictReader(f))) == 4  # the header is written once
+    assert store.manifest["partitions"]["2025-05-16"]["max_ts"] == DAY1 + 60
+
+def test_month_granularity(tmp_path):
+    store = PartitionedStore(str(tmp_path), granularity="month")
+    store.append(rows(DAY1) + rows(DAY3))
+    assert list(store.manifest["partitions"]) == ["2025-05"]
+
+@pytest.mark.parametrize("codec, module, suffix", [("gzip", gzip, ".gz"), ("lzma", lzma, ".xz")])
+def test_rotate_compresses_closed_partitions(tmp_path, codec, module, suffix):
+    store = PartitionedStore(str(tmp_path), codec=codec)
+    store.append(rows(DAY1) + rows(DAY2) + rows(DAY3))
+    assert store.rotate(now_key="2025-05-18") == ["2025-05-16", "2025-05-17"]
+    assert store.rotate(now_key="2025-05-18") == []  # already closed
+    partitions = store.manifest["partitions"]
+    for key in ("2025-05-16", "2025-05-17"):
+        entry = partitions[key]
+        assert (entry["file"], entry["codec"], entry["closed"]) == (f"live_data_{key}.csv{suffix}", codec, True)
+        assert entry["bytes"] == os.path.getsize(os.path.join(store.dir, entry["file"]))
+        assert not os.path.exists(os.path.join(store.dir, f"live_data_{key}.csv"))
+        with module.open(os.path.join(store.dir, entry["file"]), "rt", newline="") as f:
+            assert [row["iess"] for row in csv.DictReader(f)] == ["M100FI", "FI8001"]
+    assert partitions["2025-05-18"]["closed"] is False
+    assert len(list(store.iter_rows())) == 6
+
+def test_rotate_without_codec_only_closes(tmp_path):
+    store = PartitionedStore(str(tmp_path), codec=None)
+    store.append(rows(DAY1))
+    assert store.rotate(now_key="2025-05-18") == ["2025-05-16"]
+    assert store.manifest["partitions"]["2025-05-16"]["file"] == "live_data_2025-05-16.csv"
+
+@pytest.mark.parametrize("codec", ["gzip", "lzma"])
+def test_manifest_survives_reload_and_late_rows_append_to_closed_partitions(tmp_path, codec):
+    store = PartitionedStore(str(tmp_path), codec=codec)
+    store.append(rows(DAY1) + rows(DAY2))
+    store.rotate(now_key="2025-05-17")
+    with open(store.manifest_path) as f:
+        assert json.load(f) == store.manifest
+
+    reloaded = PartitionedStore(str(tmp_path), codec=codec)
+    assert reloaded.manifest == store.manifest
+    reloaded.append(rows(DAY1 + 300, points=("LATE",)))  # a new gzip member / xz stream on the closed file
+    entry = reloaded.manifest["partitions"]["2025-05-16"]
+    assert (entry["rows"], entry["max_ts"], "LATE" in entry["points"]) == (3, DAY1 + 300, True)
+    assert [row["iess"] for row in reloaded.iter_rows(end=DAY1 + 300)] == ["M100FI", "FI8001", "LATE"]
+
+def test_iter_rows_filters_by_time_and_point(tmp_path):
+    store = PartitionedStore(str(tmp_path))
+    store.append(rows(DAY1) + rows(DAY2) + rows(DAY3, points=("FI8001",)))
+    store.rotate(now_key="2025-05-18")
+    assert [float(row["ts"]) for row in store.iter_rows(start=DAY2)] == [DAY2, DAY2, DAY3]
+    assert [float(row["ts"]) for row in store.iter_rows(end=DAY2)] == [DAY1, DAY1, DAY2, DAY2]
+    assert [(float(row["ts"]), row["iess"]) for row in store.iter_rows(start=DAY2, end=DAY2, points={"M100FI"})] == [(DAY2, "M100FI")]
+    # The manifest lets readers skip partitions: DAY3 has no M100FI, DAY1 ends before start.
+    assert [e["file"] for e in store.partitions(start=DAY2, points={"M100FI"})] == ["live_data_2025-05-17.csv.gz"]
+
+def test_ingest_file_migrates_a_flat_csv_in_batches(tmp_path):
+    flat = tmp_path / "live_data.csv"
+    with open(flat, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["timestamp", "ts", "iess", "value"])
+        writer.writeheader()
+        for ts in (DAY1, DAY1 + 300, DAY2, DAY3):
+            writer.writerow({"timestamp": datetime.fromtimestamp(ts).isoformat(), "ts": ts, "iess": "M100FI", "value": 2})
+    store = PartitionedStore(str(tmp_path / "aggregate"))
+    assert store.ingest_file(str(flat), batch_size=3) == 4
+    assert flat.exists()
+    assert {key: entry["rows"] for key, entry in store.manifest["partitions"].items()} == {
+        "2025-05-16": 2, "2025-05-17": 1, "2025-05-18": 1}
+    assert store.disk_usage() == sum(os.path.getsize(os.path.join(store.dir, name))
+                                     for name in os.listdir(store.dir) if name != "manifest.json")
+
+@pytest.mark.parametrize("codec", [None, "gzip", "lzma"])
+def test_new_columns_widen_the_partition(tmp_path, codec):
+    store = PartitionedStore(str(tmp_path), codec=codec)
+    store.append(rows(DAY1))
+    store.rotate(now_key="2025-05-18")  # compressed when codec is set
+    # Sanitized rows with a timestamp column, landing in the partition raw rows opened.
+    store.append([{"timestamp": "2025-05-16T12:05:00", "ts": DAY1 + 300, "iess": "M100FI", "value": "2.5"}])
+    entry = store.manifest["partitions"]["2025-05-16"]
+    assert entry["fieldnames"] == ["ts", "iess", "value", "timestamp"]
+    got = [(row["iess"], row["value"], row["timestamp"]) for row in store.iter_rows()]
+    assert got == [("M100FI", "1.5", ""), ("FI8001", "1.5", ""), ("M100FI", "2.5", "2025-05-16T12:05:00")]
+    assert PartitionedStore(str(tmp_path), codec=codec).manifest["partitions"]["2025-05-16"]["fieldnames"] == entry["fieldnames"]
+
+def test_columns_of_every_row_in_a_batch_are_kept(tmp_path):
+    store = PartitionedStore(str(tmp_path))
+    store.append([{"ts": DAY1, "iess": "A", "value": "1"}, {"ts": DAY1, "iess": "B", "value": "2", "un": "MGD"}])
+    assert [row["un"] for row in store.iter_rows()] == ["", "MGD"]
@@ -0,0 +1,72 @@
+# tests/test_sessionpool.py
+import pytest
+
+from src.pipeline.api import eds, rjn
+from src.pipeline.sessionpool import SessionPool
+
+EDS = {"url": "http://eds.example:43084/api/v1/", "username": "operator", "password": "x"}
+RJN = {"url": "https://rjn.example/api/", "client_id": "plant", "password": "y"}
+
+class FakeSession:
+    def __init__(self, api_url):
+        self.api_url = api_url
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def logins(monkeypatch):
+    logins = []
+    def login_to_session(api_url, password, config=None, **kwargs):
+        logins.append(api_url)
+        return FakeSession(api_url)
+    monkeypatch.setattr(eds, "login_to_session", login_to_session)
+    monkeypatch.setattr(rjn, "login_to_session", login_to_session)
+    return logins
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+def test_sessions_are_reused_until_max_age(logins, clock):
+    pool = SessionPool(max_age_s=900, clock=clock)
+    first = pool.get_eds_session(EDS)
+    clock.now += 899
+    assert pool.get_eds_session(dict(EDS)) is first  # another project's copy of the same block
+    assert first.custom_dict == EDS
+    assert logins == [EDS["url"]]
+    clock.now += 1
+    second = pool.get_eds_session(EDS)
+    assert second is not first and first.closed
+    assert len(logins) == 2 and len(pool) == 1
+
+def test_servers_and_users_get_their_own_sessions(logins, clock):
+    pool = SessionPool(clock=clock)
+    eds_session, rjn_session = pool.get_eds_session(EDS), pool.get_rjn_session(RJN)
+    other_user = pool.get_eds_session({**EDS, "username": "engineer"})
+    assert len({id(eds_session), id(rjn_session), id(other_user)}) == 3
+    assert len(pool) == 3
+
+def test_invalidate_forces_a_fresh_login(logins, clock):
+    pool = SessionPool(clock=clock)
+    eds_session, rjn_session = pool.get_eds_session(EDS), pool.get_rjn_session(RJN)
+    pool.invalidate(EDS)
+    assert eds_session.closed and not rjn_session.closed
+    assert pool.get_eds_session(EDS) is not eds_session
+    assert pool.get_rjn_session(RJN) is rjn_session
+    assert logins == [EDS["url"], RJN["url"], EDS["url"]]
+    pool.invalidate({"url": "http://unknown.example/"})  # nothing pooled for it: a no-op
+
+def test_close_all(logins, clock):
+    pool = SessionPool(clock=clock)
+    sessions = [pool.get_eds_session(EDS), pool.get_rjn_session(RJN)]
+    pool.close_all()
+    assert all(session.closed for session in sessions) and len(pool) == 0
@@ -0,0 +1,60 @@
+# tests/test_status.py
+import asyncio
+import json
+
+import pytest
+
+from src.pipeline.daemon import status
+
+@pytest.fixture(autouse=True)
+def status_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(status, "STATUS_PATH", str(tmp_path / "status_daemon_log.txt"))
+    monkeypatch.setattr(status, "STATUS_RING_PATH", str(tmp_path / "status_ring.bin"))
+    monkeypatch.setattr(status, "STATUS_RING_CAPACITY", 4)
+    monkeypatch.setattr(status, "_writer_ring", None)
+    monkeypatch.setattr(status, "_reader_ring", None)
+    yield tmp_path
+    for ring in (status._writer_ring, status._reader_ring):
+        if ring is not None:
+            ring.close()
+
+def test_unknown_before_the_daemon_has_written():
+    assert status.get_latest_status() == status.UNKNOWN_STATUS
+    assert status.get_status_history() == []
+
+def test_cached_reader_sees_the_ring_once_it_exists():
+    status.get_latest_status()  # the reader is created, and cached, before the ring file exists
+    status.update_status("ok", "first")
+    status.update_status("warning", "second")
+    latest = status.get_latest_status()
+    assert (latest["status"], latest["message"]) == ("warning", "second")
+    assert [e["message"] for e in status.get_status_history(5)] == ["first", "second"]
+
+def test_history_is_bounded_by_the_ring(status_files):
+    for i in range(7):
+        status.update_status("ok", f"m{i}")
+    assert [e["message"] for e in status.get_status_history(20)] == ["m3", "m4", "m5", "m6"]
+    # The audit log keeps everything.
+    lines = (status_files / "status_daemon_log.txt").read_text().splitlines()
+    assert [json.loads(line)["message"] for line in lines] == [f"m{i}" for i in range(7)]
+
+def test_long_message_is_clipped_in_the_ring_only(status_files):
+    message = "x" * 2000
+    status.update_status("error", message)
+    latest = status.get_latest_status()
+    assert latest["status"] == "error"
+    assert 0 < len(latest["message"]) < len(message) and message.startswith(latest["message"])
+    logged = json.loads((status_files / "status_daemon_log.txt").read_text())
+    assert logged["message"] == message
+
+def test_stream_starts_from_the_latest_entry():
+    status.update_status("ok", "old")
+    status.update_status("ok", "new")
+    async def first_event():
+        stream = status.stream_status(poll_interval=0)
+        try:
+            return await stream.__anext__()
+        finally:
+            await stream.aclose()
+    event = asyncio.run(first_event())
+    assert event.startswith("data: ") and json.loads(event[len("data: "):])["message"] == "new"
@@ -0,0 +1,108 @@
+# tests/test_trendsync.py
+import pytest
+
+from src.pipeline import trendsync
+from src.pipeline.api import eds
+from src.pipeline.trendsync import WatermarkStore, plan_requests, split_windows, sync_trends
+
+STEP = 300
+END = 1747400000 // STEP * STEP
+
+class FakeEds:
+    """trend/tabular over a point set that has a 5-minute sample at every step, period bounds inclusive."""
+    def __init__(self, monkeypatch):
+        self.requests = []
+        monkeypatch.setattr(eds, "create_tabular_request", self.create_tabular_request)
+        monkeypatch.setattr(eds, "wait_for_request_execution_session", lambda session, api_url, request_id: None)
+        monkeypatch.setattr(eds.EdsClient, "get_tabular_mod", staticmethod(self.get_tabular_mod))
+
+    def create_tabular_request(self, session, api_url, starttime, endtime, points):
+        self.requests.append((starttime, endtime, list(points)))
+        return len(self.requests) - 1
+
+    def get_tabular_mod(self, session, request_id, points):
+        starttime, endtime, _ = self.requests[request_id]
+        first = -(-starttime // STEP) * STEP
+        return [[[ts, float(ts % 7), "G"] for ts in range(first, endtime + 1, STEP)] for _ in points]
+
+class FakeSession:
+    custom_dict = {"url": "http://eds.example:43084/api/v1/"}
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += 10  # every request takes 10 s
+        return self.now
+
+@pytest.fixture
+def fake_eds(monkeypatch):
+    return FakeEds(monkeypatch)
+
+@pytest.fixture
+def store(tmp_path):
+    return WatermarkStore(str(tmp_path / "watermarks.json"))
+
+class Persisted:
+    def __init__(self):
+        self.samples = {}
+
+    def __call__(self, api_id, samples_by_point):
+        for iess, samples in samples_by_point.items():
+            self.samples.setdefault(iess, []).extend(ts for ts, *_ in samples)
+
+def test_plan_groups_points_with_similar_watermarks():
+    watermarks = {"A": END - 3600, "B": END - 3000, "C": END - 86400, "D": END - STEP}
+    assert plan_requests(watermarks, END) == [(END - 86400 + STEP, ["C"]), (END - 3600 + STEP, ["A", "B"])]
+
+def test_split_windows():
+    assert split_windows(0, 10, 4) == [(0, 4), (4, 8), (8, 10)]
+    assert split_windows(0, 8, 4) == [(0, 4), (4, 8)]
+    assert split_windows(5, 5, 4) == []
+
+def test_a_long_gap_is_fetched_in_bounded_windows(fake_eds, store):
+    store.advance("Maxson", {"A": END - 2 * 86400})
+    persisted = Persisted()
+    summary = sync_trends(FakeSession(), "Maxson", [{"iess": "A"}], store, persisted, endtime=END, max_window_s=6 * 3600)
+    assert summary["requests"] == 8 and summary["requests_deferred"] == 0
+    assert all(end - start <= 6 * 3600 for start, end, _ in fake_eds.requests)
+    # Every sample of the gap exactly once, although window bounds overlap by one sample.
+    assert persisted.samples["A"] == list(range(END - 2 * 86400 + STEP, END + 1, STEP))
+    assert store.get("Maxson", "A") == END
+
+def test_watermark_advances_per_window_and_a_budget_resumes_next_run(fake_eds, store):
+    store.advance("Maxson", {"A": END - 86400, "B": END - 86400})
+    persisted = Persisted()
+    rows = [{"iess": "A"}, {"iess": "B"}]
+    summary = sync_trends(FakeSession(), "Maxson", rows, store, persisted, endtime=END,
+                          max_window_s=3 * 3600, time_budget_s=25, clock=FakeClock())
+    assert (summary["requests"], summary["requests_deferred"]) == (2, 6)
+    assert store.get("Maxson", "A") == END - 86400 + STEP + 2 * 3 * 3600  # the end of the second window
+    summary = sync_trends(FakeSession(), "Maxson", rows, store, persisted, endtime=END, max_window_s=3 * 3600)
+    assert (summary["requests"], summary["requests_deferred"]) == (6, 0)
+    assert persisted.samples["B"] == list(range(END - 86400 + STEP, END + 1, STEP))
+
+def test_a_failed_persist_does_not_advance_the_watermark(fake_eds, store):
+    store.advance("Maxson", {"A": END - 12 * 3600})
+    calls = []
+    def persist(api_id, samples_by_point):
+        calls.append(api_id)
+        if len(calls) == 2:
+            raise OSError("disk full")
+    with pytest.raises(OSError):
+        sync_trends(FakeSession(), "Maxson", [{"iess": "A"}], store, persist, endtime=END, max_window_s=6 * 3600)
+    assert store.get("Maxson", "A") == END - 6 * 3600 + STEP  # the first window only
+    assert WatermarkStore(store.path).get("Maxson", "A") == END - 6 * 3600 + STEP
+
+def test_current_points_are_skipped(fake_eds, store):
+    store.advance("Maxson", {"A": END})
+    summary = sync_trends(FakeSession(), "Maxson", [{"iess": "A"}, {"iess": ""}], store, Persisted(), endtime=END)
+    assert summary["requests"] == 0 and summary["points_current"] == 1
+    assert fake_eds.requests == []
+
+def test_unsynced_points_start_from_the_initial_lookback(fake_eds, store):
+    persisted = Persisted()
+    sync_trends(FakeSession(), "Maxson", [{"iess": "A"}], store, persisted, endtime=END, initial_lookback_s=3600)
+    assert persisted.samples["A"] == list(range(END - 3600, END + 1, STEP))
+    assert trendsync.DEFAULT_MAX_WINDOW_S >= 3600